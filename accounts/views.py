@@ -11,6 +11,7 @@ from django.utils.http import urlsafe_base64_decode
 from django.utils.http import urlsafe_base64_encode
 
 from accounts.decorators import anonymous_required
+from dictionary.rendering import prefetch_for_display
 from dictionary.models import Definition, Vote
 from .forms import SignUpForm
 from .tokens import account_activation_token
@@ -18,10 +19,14 @@ from .tokens import account_activation_token
 
 @login_required
 def profile(request):
-    definitions = Definition.approved_definitions.filter(user=request.user).order_by('-created')
-    user_votes = Vote.objects.filter(user=request.user).filter(definition__deleteFl=False)
+    definitions = Definition.approved_definitions.filter(user=request.user)\
+        .select_related('term', 'user').order_by('-created')
+    user_votes = Vote.objects.filter(user=request.user).filter(definition__deleteFl=False)\
+        .select_related('definition__term', 'definition__user')
     upvotes = user_votes.filter(vote_type=Vote.UPVOTE).order_by('-created')
     downvotes = user_votes.filter(vote_type=Vote.DOWNVOTE).order_by('-created')
+    # resolve the interlinks of any definitions which weren't rendered when they were saved in one query
+    prefetch_for_display([*definitions, *(vote.definition for vote in [*upvotes, *downvotes])])
 
     context = {
         'definitions': definitions,
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DictionaryConfig(AppConfig):
     name = 'dictionary'
+
+    def ready(self):
+        from dictionary import signals  # noqa: F401
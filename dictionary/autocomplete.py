@@ -0,0 +1,90 @@
+from bisect import bisect_left, insort
+
+from django.urls import reverse
+
+from dictionary.indexes import InMemoryTermIndex
+
+# the highest code point, appending it to a prefix gives the upper bound of the keys starting with that prefix
+MAX_CHAR = '\U0010ffff'
+
+
+def normalise(text):
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex(InMemoryTermIndex):
+    """
+    Sorted arrays of (lowercased term text, term id) for all the approved terms and for the terms of each sport. The
+    terms starting with a prefix are a contiguous slice of the array which is found with two binary searches.
+    """
+    version_cache_key = 'dictionary-prefix-index-version'
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.all_terms = []
+        self.terms_by_sport = {}
+        self.terms = {}
+
+    def load(self, terms):
+        # appending everything and sorting once is far quicker than inserting each term into its sorted position
+        with self._lock:
+            super().load(terms)
+            self.all_terms.sort()
+            for sport_terms in self.terms_by_sport.values():
+                sport_terms.sort()
+
+    def add_term(self, term_id, text, sport_slug, slug):
+        key = (normalise(text), term_id)
+        self.terms[term_id] = (key, text, sport_slug, slug)
+        sport_terms = self.terms_by_sport.setdefault(sport_slug, [])
+        if self._built:
+            insort(self.all_terms, key)
+            insort(sport_terms, key)
+        else:
+            self.all_terms.append(key)
+            sport_terms.append(key)
+
+    def remove_term(self, term_id):
+        term = self.terms.pop(term_id, None)
+        if term is None:
+            return
+        key, _, sport_slug, _ = term
+        for sorted_terms in (self.all_terms, self.terms_by_sport[sport_slug]):
+            i = bisect_left(sorted_terms, key)
+            if i < len(sorted_terms) and sorted_terms[i] == key:
+                del sorted_terms[i]
+
+    def complete(self, prefix, sport_slug=None, limit=10):
+        """
+        Returns up to limit dicts of the text, sport slug and url of the terms starting with prefix in alphabetical
+        order, optionally only the terms of a sport
+        """
+        prefix = normalise(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            sorted_terms = self.all_terms if sport_slug is None else self.terms_by_sport.get(sport_slug, [])
+            start = bisect_left(sorted_terms, (prefix,))
+            end = min(bisect_left(sorted_terms, (prefix + MAX_CHAR,)), start + limit)
+            matches = [self.terms[term_id] for _, term_id in sorted_terms[start:end]]
+
+        return [
+            {
+                'text': text,
+                'sport': term_sport_slug,
+                'url': reverse('term_detail', args=(term_sport_slug, slug)),
+            }
+            for _, text, term_sport_slug, slug in matches
+        ]
+
+
+prefix_index = PrefixIndex()
+
+
+def complete(prefix, sport_slug=None, limit=10):
+    prefix_index.ensure_built()
+    return prefix_index.complete(prefix, sport_slug=sport_slug, limit=limit)
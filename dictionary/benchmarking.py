@@ -0,0 +1,303 @@
+import glob
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, OperationalError
+from django.db.models import Count, Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dictionary.models import Sport, Category, Term, Definition, Vote
+
+TERMS_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_text_files', 'terms')
+
+
+def load_terms_corpus():
+    """
+    Returns a dict of sport file name (e.g. 'table_tennis') -> list of term texts from data_text_files/terms
+    """
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(TERMS_CORPUS_DIR, '*.txt'))):
+        sport = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            corpus[sport] = [line.strip() for line in f if line.strip()]
+    return corpus
+
+
+def expand_corpus(texts, size):
+    """
+    Replicates texts up to size entries, suffixing each copy after the first with its copy number so every
+    entry stays unique
+    """
+    expanded = []
+    copy_number = 0
+    while len(expanded) < size:
+        for text in texts:
+            if len(expanded) == size:
+                break
+            expanded.append(text if copy_number == 0 else f'{text} {copy_number}')
+        copy_number += 1
+    return expanded
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of samples
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(math.ceil(pct / 100 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def summarise(samples):
+    """
+    Summarises a list of durations in seconds as milliseconds
+    """
+    return {
+        'count': len(samples),
+        'mean_ms': sum(samples) / len(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p90_ms': percentile(samples, 90) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'max_ms': max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def time_calls(func, args_list):
+    """
+    Calls func once per entry in args_list and returns the duration of each call in seconds
+    """
+    durations = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+# region Voting
+MAX_VOTE_ATTEMPTS = 50
+
+
+def create_vote_fixtures(run_id, num_definitions, num_users):
+    """
+    Creates a sport with a term, num_definitions definitions of it & num_users users to vote on them with. Returns the
+    sport, the definition ids & the user ids.
+    """
+    sport = Sport.objects.create(name=f'Vote benchmark {run_id}')
+    term = Term.objects.create(text=f'Vote benchmark {run_id}', sport=sport)
+    users = [User.objects.create(username=f'votebenchmark-{run_id}-{i}') for i in range(num_users)]
+    definitions = [Definition.objects.create(text=f'Definition {i}', term=term, user=users[0])
+                   for i in range(num_definitions)]
+    return sport, [definition.id for definition in definitions], [user.id for user in users]
+
+
+def delete_vote_fixtures(sport, user_ids):
+    sport.delete()
+    User.objects.filter(id__in=user_ids).delete()
+
+
+def run_vote_workers(vote, definition_ids, user_ids, num_processes, votes_per_process, seed):
+    """
+    Calls vote(definition_id, user_id, vote_type) with random arguments votes_per_process times in each of
+    num_processes forked processes. Returns the total number of votes made & of retries after the database was locked.
+    """
+    worker_args = [(vote, definition_ids, user_ids, votes_per_process, seed + i) for i in range(num_processes)]
+    if num_processes == 1:
+        results = [vote_worker(*worker_args[0])]
+    else:
+        # each process must open its own database connection
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(num_processes) as pool:
+            results = pool.starmap(vote_worker, worker_args)
+    return sum(num_votes for num_votes, _ in results), sum(num_retries for _, num_retries in results)
+
+
+def vote_worker(vote, definition_ids, user_ids, num_votes, seed):
+    rng = random.Random(seed)
+    num_retries = 0
+    for _ in range(num_votes):
+        args = (rng.choice(definition_ids), rng.choice(user_ids), rng.choice((Vote.UPVOTE, Vote.DOWNVOTE)))
+        for attempt in range(MAX_VOTE_ATTEMPTS):
+            try:
+                vote(*args)
+                break
+            except OperationalError:
+                if attempt == MAX_VOTE_ATTEMPTS - 1:
+                    raise
+                num_retries += 1
+                time.sleep(rng.uniform(0, 0.01 * (attempt + 1)))
+    return num_votes, num_retries
+
+
+def vote_counter_drift(definition_ids):
+    """
+    Returns (definition id, num_upvotes, upvote rows, num_downvotes, downvote rows, net_votes) for each of the
+    definitions whose vote counters don't match its Vote rows
+    """
+    definitions = Definition.objects.filter(id__in=definition_ids).order_by('id').annotate(
+        upvote_rows=Count('votes', filter=Q(votes__vote_type=Vote.UPVOTE)),
+        downvote_rows=Count('votes', filter=Q(votes__vote_type=Vote.DOWNVOTE)),
+    )
+    return [
+        (d.id, d.num_upvotes, d.upvote_rows, d.num_downvotes, d.downvote_rows, d.net_votes)
+        for d in definitions
+        if (d.num_upvotes, d.num_downvotes, d.net_votes) != (d.upvote_rows, d.downvote_rows,
+                                                              d.upvote_rows - d.downvote_rows)
+    ]
+# endregion
+
+
+# region Pages
+def pick_page_urls(num_terms, seed):
+    """
+    Returns the URLs of the index, every active sport's page & the pages of num_terms random approved terms, the pages
+    anonymous users read the most
+    """
+    rng = random.Random(seed)
+    term_ids = list(Term.approved_terms.values_list('id', flat=True))
+    term_ids = rng.sample(term_ids, min(num_terms, len(term_ids)))
+    terms = Term.objects.filter(id__in=term_ids).select_related('sport')
+    return [reverse('index'), *(sport.get_absolute_url() for sport in Sport.active_sports.all()),
+            *(term.get_absolute_url() for term in terms)]
+
+
+def time_requests(client, urls, num_requests, seed):
+    """
+    Requests num_requests of the urls picked at random with client and returns the duration of each request in seconds
+    """
+    rng = random.Random(seed)
+    durations = []
+    for _ in range(num_requests):
+        url = rng.choice(urls)
+        start = time.perf_counter()
+        response = client.get(url)
+        durations.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise ValueError(f'{url} responded with {response.status_code}')
+    return durations
+# endregion
+
+
+# region Views
+# the benchmarks of each view and AJAX endpoint, in the order they're run, the definitions are deleted last so the pages
+# read before still show them
+VIEW_BENCHMARKS = ('index', 'search', 'sport_index', 'sport_index_category', 'term_detail', 'random_term', 'upvote',
+                   'downvote', 'profile', 'delete_definition')
+NUM_SAMPLED_ROWS = 200
+
+
+class ViewRequests:
+    """
+    Picks the requests the view benchmarks make from the rows of the dataset, at random from seed. Each
+    <benchmark>_request method returns (method, path, data, expected status code, whether it's made logged in).
+    """
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        term_ids = list(Term.approved_terms.values_list('id', flat=True))
+        term_ids = self.rng.sample(term_ids, min(NUM_SAMPLED_ROWS, len(term_ids)))
+        self.terms = list(Term.objects.filter(id__in=term_ids).select_related('sport').order_by('id'))
+        self.sports = list(Sport.active_sports.order_by('id'))
+        self.categories = list(Category.objects.filter(terms__approvedFl=True).distinct()
+                               .select_related('sport').order_by('id'))
+        if not self.terms or not self.categories:
+            raise ValueError('The dataset has no terms or categories to request')
+        # the profile lists every definition & vote of the user, the most active users have thousands of them so a
+        # typical author's, the median one's, is requested
+        authors = list(Definition.approved_definitions.values('user').annotate(n=Count('id'))
+                       .order_by('n', 'user').values_list('user', flat=True))
+        self.user = User.objects.get(pk=authors[len(authors) // 2])
+        definition_ids = list(Definition.approved_definitions.values_list('id', flat=True))
+        self.rng.shuffle(definition_ids)
+        self.definition_ids = definition_ids
+
+    def index_request(self):
+        return 'get', reverse('index'), {}, 200, False
+
+    def search_request(self):
+        word = self.rng.choice(self.rng.choice(self.terms).text.split())
+        return 'get', reverse('search'), {'term': word}, 200, False
+
+    def sport_index_request(self):
+        return 'get', self.rng.choice(self.sports).get_absolute_url(), {}, 200, False
+
+    def sport_index_category_request(self):
+        category = self.rng.choice(self.categories)
+        return 'get', category.sport.get_absolute_url(), {'category': category.name}, 200, False
+
+    def term_detail_request(self):
+        return 'get', self.rng.choice(self.terms).get_absolute_url(), {}, 200, False
+
+    def random_term_request(self):
+        return 'get', reverse('random_term'), {}, 302, False
+
+    def upvote_request(self):
+        return 'post', f'/ajax/upvote/{self.rng.choice(self.definition_ids[:NUM_SAMPLED_ROWS])}', {}, 200, True
+
+    def downvote_request(self):
+        return 'post', f'/ajax/downvote/{self.rng.choice(self.definition_ids[:NUM_SAMPLED_ROWS])}', {}, 200, True
+
+    def profile_request(self):
+        return 'get', reverse('profile'), {}, 200, True
+
+    def delete_definition_request(self):
+        # a different definition each time, as deleting one again changes nothing
+        if not self.definition_ids:
+            raise ValueError('There are no definitions left to delete')
+        return 'post', f'/ajax/delete-definition/{self.definition_ids.pop()}', {}, 200, True
+
+
+def time_view(anonymous_client, user_client, make_request, num_requests):
+    """
+    Makes num_requests requests from make_request with the test client and returns the duration in seconds, the number
+    of queries and the number of bytes of the body of each of them
+    """
+    durations, num_queries, num_bytes = [], [], []
+    for _ in range(num_requests):
+        method, path, data, expected_status, logged_in = make_request()
+        client = user_client if logged_in else anonymous_client
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, data)
+            durations.append(time.perf_counter() - start)
+        if response.status_code != expected_status:
+            raise ValueError(f'{method.upper()} {path} responded with {response.status_code}')
+        num_queries.append(len(queries))
+        num_bytes.append(len(response.content))
+    return durations, num_queries, num_bytes
+
+
+def summarise_view(durations, num_queries, num_bytes):
+    """
+    Summarises the results of time_view as its latency percentiles, queries per request & bytes per response
+    """
+    return {
+        **summarise(durations),
+        'queries_mean': sum(num_queries) / len(num_queries),
+        'queries_max': max(num_queries),
+        'bytes_mean': sum(num_bytes) / len(num_bytes),
+        'bytes_max': max(num_bytes),
+    }
+
+
+def compare_view_results(previous, current):
+    """
+    Returns (view, previous p50 ms, p50 ms, change in p50, previous queries, queries) for each view benchmarked in both
+    of the results of two runs
+    """
+    rows = []
+    for view, stats in current['views'].items():
+        if view not in previous['views']:
+            continue
+        before = previous['views'][view]
+        change = stats['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0.0
+        rows.append((view, before['p50_ms'], stats['p50_ms'], change, before['queries_mean'], stats['queries_mean']))
+    return rows
+# endregion
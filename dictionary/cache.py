@@ -0,0 +1,310 @@
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+INVALIDATION_SEQUENCE_KEY = 'tiered-cache-invalidations'
+# a process which falls further behind than this, or whose entries have expired, drops its whole local tier instead
+INVALIDATION_LOG_TIMEOUT = 60
+INVALIDATION_LOG_READ_LIMIT = 1000
+# logged by clear() in place of a key
+CLEARED = '*'
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """
+    File based cache whose add & incr hold an exclusive lock on a file in the cache directory, so they are atomic across
+    processes like memcached's rather than a read followed by a write. incr keeps the time the entry expires at.
+    """
+    lock_file_name = 'cache.lock'
+
+    @contextmanager
+    def lock(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_file_name), 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.lock():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.lock():
+            value = expiry = None
+            try:
+                with open(self._key_to_file(key, version), 'rb') as f:
+                    expiry = pickle.load(f)
+                    if expiry is None or expiry >= time.time():
+                        value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                pass
+            if value is None:
+                raise ValueError(f"Key '{key}' not found")
+            new_value = value + delta
+            self.set(key, new_value, None if expiry is None else expiry - time.time(), version)
+            return new_value
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend with a bounded in-process LRU tier in front of a cache shared by all the processes, e.g. a
+    LockingFileBasedCache. LOCATION is the alias of the shared cache in CACHES.
+
+    Reads are served from the local tier when they can, otherwise from the shared cache, and are then kept locally for
+    up to LOCAL_TIMEOUT seconds or until the shared entry expires if that's sooner. The least recently used entries are
+    evicted once the pickled values held locally add up to more than MAX_SIZE bytes.
+
+    Every write appends the key to an invalidation log in the shared cache, numbered by an atomic incr of the shared
+    cache (memcached, redis & LockingFileBasedCache have one, FileBasedCache doesn't). Each process reads the entries
+    logged since its last read at most once every INVALIDATION_CHECK_INTERVAL seconds and drops just those keys from its
+    local tier, so a value changed by another process is seen within that interval. A process which can't tell what
+    was written, as the log entries have expired or it's too far behind, drops its whole local tier.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared = caches[location]
+        self._max_size = options.get('MAX_SIZE', 16 * 1024 * 1024)
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self._invalidation_check_interval = options.get('INVALIDATION_CHECK_INTERVAL', 1)
+
+        self._lock = threading.RLock()
+        # key -> (pickled value, expiry time), most recently used last
+        self._local = OrderedDict()
+        self._local_size = 0
+        # the last invalidation read from the log & the ones logged by this process since, which it can skip
+        self._invalidations_read = None
+        self._own_invalidations = set()
+        self._invalidations_checked_at = None
+        self._stats = dict.fromkeys(('local_hits', 'shared_hits', 'misses', 'sets', 'deletes', 'evictions',
+                                     'expirations', 'invalidations'), 0)
+
+    # region Local tier
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            pickled, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove_local(key)
+                self._stats['expirations'] += 1
+                return None
+            self._local.move_to_end(key)
+            return pickled
+
+    def _set_local(self, key, pickled, expires_at):
+        local_timeout = self._local_timeout if expires_at is None else min(expires_at - time.time(), self._local_timeout)
+        if len(pickled) > self._max_size or local_timeout <= 0:
+            with self._lock:
+                self._remove_local(key)
+            return
+        with self._lock:
+            self._remove_local(key)
+            self._local[key] = (pickled, time.monotonic() + local_timeout)
+            self._local_size += len(pickled)
+            while self._local_size > self._max_size:
+                oldest_key = next(iter(self._local))
+                self._remove_local(oldest_key)
+                self._stats['evictions'] += 1
+
+    def _remove_local(self, key):
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            self._local_size -= len(entry[0])
+        return entry is not None
+
+    def _clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._local_size = 0
+    # endregion
+
+    # region Cross-process invalidation
+    def _check_invalidations(self):
+        now = time.monotonic()
+        if self._invalidations_checked_at is not None \
+                and now - self._invalidations_checked_at < self._invalidation_check_interval:
+            return
+        self._invalidations_checked_at = now
+        self._read_invalidations(self.shared.get(INVALIDATION_SEQUENCE_KEY))
+
+    def _read_invalidations(self, latest):
+        """
+        Drops the keys logged by the other processes up to the latest invalidation from the local tier, or all of them
+        when some of those entries can't be read. Returns the keys, or None when it dropped all of them.
+        """
+        with self._lock:
+            last_read = self._invalidations_read
+            keys = set()
+            if latest == last_read:
+                return keys
+            if latest is None or last_read is None or not 0 < latest - last_read <= INVALIDATION_LOG_READ_LIMIT:
+                keys = None
+            else:
+                numbers = [n for n in range(last_read + 1, latest + 1) if n not in self._own_invalidations]
+                logged = self.shared.get_many([self._invalidation_key(n) for n in numbers])
+                keys = set(logged.values())
+                if len(logged) < len(numbers) or CLEARED in keys:
+                    keys = None
+
+            if keys is None:
+                self._stats['invalidations'] += len(self._local)
+                self._clear_local()
+            else:
+                self._stats['invalidations'] += sum(map(self._remove_local, keys))
+            self._invalidations_read = latest
+            self._own_invalidations = {n for n in self._own_invalidations if latest is not None and n > latest}
+            return keys
+
+    def _log_invalidation(self, key):
+        """
+        Logs a write of the key for the other processes, this process's own local tier is updated by the write itself.
+        Returns the keys written by the other processes since the last read, or None if they aren't known.
+        """
+        try:
+            number = self.shared.incr(INVALIDATION_SEQUENCE_KEY)
+        except ValueError:
+            # start from the time so the numbers of a log which expired or was cleared aren't reused
+            initial = time.time_ns()
+            if self.shared.add(INVALIDATION_SEQUENCE_KEY, initial, None):
+                number = initial
+                with self._lock:
+                    if self._invalidations_read is None:
+                        # this process started the log so there's nothing before this in it
+                        self._invalidations_read = initial - 1
+            else:
+                number = self.shared.incr(INVALIDATION_SEQUENCE_KEY)
+        self.shared.set(self._invalidation_key(number), key, INVALIDATION_LOG_TIMEOUT)
+        with self._lock:
+            self._own_invalidations.add(number)
+        # catch up with the writes of the other processes since the last read, if there were any
+        return self._read_invalidations(number)
+
+    @staticmethod
+    def _invalidation_key(number):
+        return f'{INVALIDATION_SEQUENCE_KEY}:{number}'
+    # endregion
+
+    # region Cache API
+    def get(self, key, default=None, version=None):
+        self._check_invalidations()
+        local_key = self.make_key(key, version=version)
+        pickled = self._get_local(local_key)
+        if pickled is not None:
+            self._stats['local_hits'] += 1
+            return pickle.loads(pickled)
+
+        entry = self._get_shared(key, version)
+        if entry is None:
+            self._stats['misses'] += 1
+            return default
+        self._stats['shared_hits'] += 1
+        value, expires_at = entry
+        self._set_local(local_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at)
+        return value
+
+    def _get_shared(self, key, version):
+        # values are stored in the shared cache along with the time they expire at, which it doesn't hand back
+        entry = self.shared.get(key, version=version)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            return None
+        return entry
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(key, value, timeout, version, self.shared.set)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(key, value, timeout, version, self.shared.add)
+
+    def _write(self, key, value, timeout, version, shared_write):
+        self._check_invalidations()
+        timeout = self._relative_timeout(timeout)
+        expires_at = None if timeout is None else time.time() + timeout
+        written = shared_write(key, (value, expires_at), timeout, version=version)
+        if written is False:
+            return False
+        local_key = self.make_key(key, version=version)
+        invalidated = self._log_invalidation(local_key)
+        self._stats['sets'] += 1
+        if invalidated is None or local_key in invalidated:
+            # another process wrote the key around the same time, so the shared cache may hold its value rather than this
+            with self._lock:
+                self._remove_local(local_key)
+        else:
+            self._set_local(local_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._relative_timeout(timeout)
+        with self._shared_lock():
+            entry = self._get_shared(key, version)
+            if entry is None:
+                return False
+            self.shared.set(key, (entry[0], None if timeout is None else time.time() + timeout), timeout,
+                            version=version)
+        # the local copies expire at the same time or sooner so they can be kept
+        return True
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        local_key = self.make_key(key, version=version)
+        self._log_invalidation(local_key)
+        self._stats['deletes'] += 1
+        with self._lock:
+            self._remove_local(local_key)
+
+    def incr(self, key, delta=1, version=None):
+        with self._shared_lock():
+            entry = self._get_shared(key, version)
+            if entry is None:
+                raise ValueError(f"Key '{key}' not found")
+            value, expires_at = entry
+            value += delta
+            self.shared.set(key, (value, expires_at), None if expires_at is None else expires_at - time.time(),
+                            version=version)
+        local_key = self.make_key(key, version=version)
+        self._log_invalidation(local_key)
+        with self._lock:
+            self._remove_local(local_key)
+        return value
+
+    def has_key(self, key, version=None):
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def clear(self):
+        self.shared.clear()
+        self._log_invalidation(CLEARED)
+        self._clear_local()
+    # endregion
+
+    def _shared_lock(self):
+        # incr & touch read & write the entry, which is only atomic when the shared cache can lock
+        lock = getattr(self.shared, 'lock', None)
+        return lock() if lock is not None else nullcontext()
+
+    def _relative_timeout(self, timeout):
+        # unlike get_backend_timeout this keeps the timeout in seconds from now, to pass on to the shared cache
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def stats(self):
+        """
+        Returns this process's hit, miss & eviction counters and the size of its local tier, for monitoring
+        """
+        with self._lock:
+            return dict(self._stats, local_entries=len(self._local), local_size=self._local_size,
+                        max_size=self._max_size)
@@ -0,0 +1,135 @@
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from dictionary.indexes import InMemoryIndex
+from dictionary.models import Category, Sport
+
+
+class CatalogueSport(namedtuple('CatalogueSport', ['id', 'name', 'slug', 'emoji', 'active', 'url'])):
+    __slots__ = ()
+
+    def get_absolute_url(self):
+        return self.url
+
+    def __str__(self):
+        return self.name
+
+
+class SportsCatalogue(InMemoryIndex):
+    """
+    Every sport, and the URL of every category, held in the memory of each process so listing the sports on every
+    page and building the URLs of terms & categories doesn't query the database. The sport & category signals
+    invalidate it whenever one is saved or deleted.
+    """
+    version_cache_key = 'dictionary-sports-catalogue-version'
+
+    def __init__(self):
+        super().__init__()
+        self.sports_by_id = {}
+        self.sports_by_slug = {}
+        self.active_sports = []
+        self.category_urls = {}
+        self._rebuilt_for_miss_at = None
+
+    def build(self):
+        self.load(Sport.objects.order_by('name').values_list('id', 'name', 'slug', 'emoji', 'active'),
+                  Category.objects.values_list('id', 'sport_id', 'name'))
+
+    def load(self, sports, categories=()):
+        """
+        Replaces the contents of the catalogue with sports, an iterable of (id, name, slug, emoji, active) tuples in
+        the order they are listed, and categories, an iterable of (id, sport id, name) tuples
+        """
+        sports = [CatalogueSport(*sport, url=reverse('sport_index', args=(sport[2],))) for sport in sports]
+        sports_by_id = {sport.id: sport for sport in sports}
+        category_urls = {
+            category_id: category_url_of(sports_by_id[sport_id], name)
+            for category_id, sport_id, name in categories if sport_id in sports_by_id
+        }
+        with self._lock:
+            self.sports_by_id = sports_by_id
+            self.sports_by_slug = {sport.slug: sport for sport in sports}
+            self.active_sports = [sport for sport in sports if sport.active]
+            self.category_urls = category_urls
+            self._built = True
+
+    def rebuild_for_miss(self):
+        """
+        Rebuilds the catalogue when a sport or category isn't in it, as another process may have created it since the
+        catalogue was last checked. Lookups of ones which don't exist, e.g. from a mistyped interlink, rebuild it at
+        most once every IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._rebuilt_for_miss_at is not None \
+                    and now - self._rebuilt_for_miss_at < settings.IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL:
+                return
+            self._rebuilt_for_miss_at = now
+            self.build()
+
+
+sports_catalogue = SportsCatalogue()
+
+
+def active_sports():
+    """
+    Returns the active sports ordered by name
+    """
+    sports_catalogue.ensure_built()
+    return sports_catalogue.active_sports
+
+
+def get_sport(sport_id):
+    """
+    Returns the CatalogueSport of the sport with sport_id, or None if there is no such sport
+    """
+    if sport_id is None:
+        return None
+    sports_catalogue.ensure_built()
+    sport = sports_catalogue.sports_by_id.get(sport_id)
+    if sport is None:
+        sports_catalogue.rebuild_for_miss()
+        sport = sports_catalogue.sports_by_id.get(sport_id)
+    return sport
+
+
+def sport_slugs_to_ids(sport_slugs):
+    """
+    Returns a dict of slug -> sport id for those of sport_slugs which are the slugs of sports
+    """
+    sports_catalogue.ensure_built()
+    sport_slugs = set(sport_slugs)
+    if not sport_slugs <= sports_catalogue.sports_by_slug.keys():
+        sports_catalogue.rebuild_for_miss()
+    return {slug: sports_catalogue.sports_by_slug[slug].id
+            for slug in sport_slugs if slug in sports_catalogue.sports_by_slug}
+
+
+def category_url_of(sport, category_name):
+    """
+    Returns the URL of a sport's term listing filtered by one of its categories
+    """
+    return f'{sport.get_absolute_url()}?{urlencode({"category": category_name})}'
+
+
+def category_url(category_id):
+    """
+    Returns the URL of the category with category_id, or None if there is no such category
+    """
+    if category_id is None:
+        return None
+    sports_catalogue.ensure_built()
+    url = sports_catalogue.category_urls.get(category_id)
+    if url is None:
+        sports_catalogue.rebuild_for_miss()
+        url = sports_catalogue.category_urls.get(category_id)
+    return url
+
+
+def sport_slug(sport_id):
+    sport = get_sport(sport_id)
+    return sport and sport.slug
@@ -2,7 +2,7 @@ from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.utils.functional import SimpleLazyObject
 
-from dictionary.models import Sport
+from dictionary.catalogue import active_sports
 
 
 def from_settings(request):
@@ -13,9 +13,8 @@ def from_settings(request):
 
 
 def all_sports(request):
-    sports = Sport.active_sports.all().order_by('name')
     return {
-        'all_sports': sports,
+        'all_sports': active_sports(),
     }
 
 
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test import override_settings
+
+
+def dataset_path(tier):
+    """
+    Path of the snapshot of the benchmark dataset of a tier built by builddataset
+    """
+    return os.path.join(settings.BENCHMARK_DATASET_DIR, f'{tier}.sqlite3')
+
+
+def copy_dataset(tier, path):
+    """
+    Copies the snapshot of a tier's dataset to path, for a benchmark to run against without changing the snapshot
+    """
+    snapshot = dataset_path(tier)
+    if not os.path.exists(snapshot):
+        raise FileNotFoundError(f'The {tier} dataset hasn\'t been built, run builddataset {tier} first')
+    shutil.copyfile(snapshot, path)
+
+
+def isolated_caches(directory):
+    """
+    Returns the CACHES of the tiered cache with the shared tier in directory and template fragments of their own, so
+    the processes using them share their entries with each other but with nothing else
+    """
+    tiered = settings.CACHE_CONFIGS['tiered']
+    return {
+        **tiered,
+        'shared': {**tiered['shared'], 'LOCATION': directory},
+        'template_fragments': {**tiered['template_fragments'], 'LOCATION': directory},
+    }
+
+
+@contextmanager
+def use_database(path):
+    """
+    Points the default database at the SQLite file at path within the block, through a connection of its own so the
+    connection to the configured database (and any transaction it's in) is left as it was. The caches are swapped for
+    the isolated_caches of a temporary directory, so the entries cached from either database, e.g. the dependency
+    generations, list counts & pages, are never read with the other.
+    """
+    from dictionary.catalogue import sports_catalogue
+    from dictionary.signals import in_memory_term_indexes
+
+    original = connections[DEFAULT_DB_ALIAS]
+    database = original.__class__({**original.settings_dict, 'NAME': path}, DEFAULT_DB_ALIAS)
+    connections[DEFAULT_DB_ALIAS] = database
+    # the in-memory indexes hold the rows of the database they were built from
+    for index in [sports_catalogue, *in_memory_term_indexes]:
+        index.discard()
+    try:
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES=isolated_caches(directory)):
+            yield database
+    finally:
+        database.close()
+        connections[DEFAULT_DB_ALIAS] = original
+        for index in [sports_catalogue, *in_memory_term_indexes]:
+            index.discard()
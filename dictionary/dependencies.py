@@ -0,0 +1,92 @@
+import hashlib
+import json
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+GENERATION_CACHE_KEY_PREFIX = 'dictionary-generation:'
+
+# the sports & their categories, listed on every page
+SPORTS_LIST = 'sports:list'
+# the list of terms of the day on the index page
+TOTD_LIST = 'totd:list'
+# every list of terms across sports, i.e. search results
+TERM_LISTS = 'terms:list'
+
+
+def sport_dependency(sport_slug):
+    """
+    Dependency of a sport's page & its lists of terms
+    """
+    return f'sport:{sport_slug}'
+
+
+def term_dependency(term_id):
+    """
+    Dependency of a term's page & its definitions
+    """
+    return f'term:{term_id}'
+
+
+def generations(dependencies):
+    """
+    Returns the current generation of each of the dependencies, reading them all from the cache at once
+    """
+    keys = [GENERATION_CACHE_KEY_PREFIX + dependency for dependency in dependencies]
+    found = cache.get_many(keys)
+    current = []
+    for key in keys:
+        generation = found.get(key)
+        if generation is None:
+            generation = new_generation()
+            if not cache.add(key, generation, None):
+                # another process stored one first, unless the cache failed to store any, as the database cache does
+                # while another process has the database locked
+                generation = cache.get(key, generation)
+        current.append(generation)
+    return current
+
+
+def bump(*dependencies):
+    """
+    Moves each of the dependencies onto a new generation, so every entry cached under a key from cache_key with any of
+    them is never read again and expires on its own rather than the whole cache being flushed. Within a transaction
+    they are moved onto another one once it commits too, as other requests can cache what they read of the rows before
+    then under the first.
+    """
+    dependencies = {dependency for dependency in dependencies if dependency}
+    if dependencies:
+        _store_new_generation(dependencies)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: _store_new_generation(dependencies))
+
+
+def _store_new_generation(dependencies):
+    generation = new_generation()
+    cache.set_many({GENERATION_CACHE_KEY_PREFIX + dependency: generation for dependency in dependencies}, None)
+
+
+def new_generation():
+    # prefixed with the time it starts so the generations also tell when anything depending on them last changed
+    return f'{time.time():.6f}-{uuid.uuid4().hex}'
+
+
+def last_changed(generations):
+    """
+    Returns the time the most recent of the generations started as a timestamp, a generation which had expired from the
+    cache is taken to have started when it was read again
+    """
+    return max(float(generation.split('-', 1)[0]) for generation in generations)
+
+
+def cache_key(prefix, dependencies, *parts):
+    """
+    Cache key for an entry identified by parts, which must be json serialisable, which has to be recomputed whenever
+    any of the dependencies is bumped
+    """
+    dependencies = sorted(set(dependencies))
+    key = [parts, dependencies, generations(dependencies)]
+    digest = hashlib.md5(json.dumps(key, separators=(',', ':')).encode()).hexdigest()
+    return f'{prefix}:{digest}'
@@ -0,0 +1,160 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from dictionary.models import Term
+
+# the links between versions only have to last until every process has checked for changes since they were added
+VERSION_LINK_TIMEOUT = 60 * 60 * 24
+
+
+class InMemoryIndex:
+    """
+    Base class for data held in the memory of each process which is read far more often than it changes.
+
+    The index is built lazily the first time it is used. Every change adds a new version to the shared cache so copies
+    held by other processes can tell they are stale and rebuild themselves the next time they are used. The versions
+    form a chain: each version has at most one successor, stored with cache.add so only one change can follow it, and
+    a process only patches its copy in place if the change it made directly follows the version it holds. The shared
+    version is only checked once every IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL seconds so lookups in between don't touch
+    the cache at all.
+
+    Changes are applied once the transaction making them commits (see IN_MEMORY_INDEX_CHANGES_ON_COMMIT), so rows
+    which are rolled back never end up in the index.
+    """
+    version_cache_key = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._version = None
+        self._version_checked_at = None
+
+    # Methods for subclasses to implement
+    def build(self):
+        raise NotImplementedError
+
+    # Methods
+    def ensure_built(self):
+        now = time.monotonic()
+        if self._built and self._version_checked_at is not None \
+                and now - self._version_checked_at < settings.IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+
+        version = self._current_version()
+
+        with self._lock:
+            if not self._built or version != self._version:
+                self.build()
+                self._version = version
+
+    def invalidate(self):
+        self._change_on_commit(None)
+
+    def discard(self):
+        """
+        Drops this process's copy so it's built again the next time it's used, without telling the other processes
+        """
+        with self._lock:
+            self._built = False
+
+    def _change_on_commit(self, change):
+        if settings.IN_MEMORY_INDEX_CHANGES_ON_COMMIT:
+            # run straight away outside of a transaction
+            transaction.on_commit(lambda: self._apply_change(change))
+        else:
+            self._apply_change(change)
+
+    def _apply_change(self, change):
+        new_version = uuid.uuid4().hex
+        version = self._current_version()
+        while not cache.add(self._next_version_key(version), new_version, VERSION_LINK_TIMEOUT):
+            # another process changed the index since, the change follows the latest version instead
+            latest_version = self._current_version(version)
+            if latest_version == version:
+                # the cache failed to store the link, as the database cache does while the database is locked, the
+                # new version still tells the other processes to rebuild
+                version = None
+                break
+            version = latest_version
+        # only a shortcut to the end of the chain, which is followed from here
+        cache.set(self.version_cache_key, new_version, None)
+
+        with self._lock:
+            # only patch the index in place if it hasn't missed a change made by another process
+            if change and self._built and version is not None and version == self._version:
+                change()
+                self._version = new_version
+            else:
+                self._built = False
+
+    def _current_version(self, version=None):
+        """
+        Returns the latest version, following the chain from version or the version the shared cache points to
+        """
+        if version is None:
+            version = cache.get(self.version_cache_key)
+            if version is None:
+                version = uuid.uuid4().hex
+                if not cache.add(self.version_cache_key, version, None):
+                    version = cache.get(self.version_cache_key, version)
+        while True:
+            next_version = cache.get(self._next_version_key(version))
+            if next_version is None:
+                return version
+            version = next_version
+
+    def _next_version_key(self, version):
+        return f'{self.version_cache_key}:after:{version}'
+
+
+class InMemoryTermIndex(InMemoryIndex):
+    """
+    Base class for indexes over the approved terms which are held in the memory of each process, kept up to date
+    in-process by the term signals
+    """
+
+    # Methods for subclasses to implement
+    def clear(self):
+        raise NotImplementedError
+
+    def add_term(self, term_id, text, sport_slug, slug):
+        raise NotImplementedError
+
+    def remove_term(self, term_id):
+        raise NotImplementedError
+
+    # Methods
+    def build(self):
+        terms = Term.approved_terms.order_by('id').values_list('id', 'text', 'sport__slug', 'slug')
+        self.load(terms.iterator())
+
+    def load(self, terms):
+        """
+        Replaces the contents of the index with terms, an iterable of (id, text, sport slug, slug) tuples
+        """
+        with self._lock:
+            self._built = False
+            self.clear()
+            for term_id, text, sport_slug, slug in terms:
+                self.add_term(term_id, text, sport_slug, slug)
+            self._built = True
+
+    def term_saved(self, term):
+        # read now as the term may be changed again, or deleted, before the change is applied
+        values = (term.pk, term.text, term.sport_id, term.slug, term.approvedFl)
+        self._change_on_commit(lambda: self._readd_term(*values))
+
+    def term_deleted(self, term_id):
+        self._change_on_commit(lambda: self.remove_term(term_id))
+
+    def _readd_term(self, term_id, text, sport_id, slug, approved):
+        self.remove_term(term_id)
+        if approved:
+            from dictionary.catalogue import sport_slug
+            self.add_term(term_id, text, sport_slug(sport_id), slug)
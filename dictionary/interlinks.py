@@ -0,0 +1,102 @@
+import re
+
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from dictionary.catalogue import sport_slug, sport_slugs_to_ids
+from dictionary.models import Term
+
+# definitions link to other terms with [[term-slug]], [[sport-slug:term-slug]] or either followed by |label
+interlink_re = re.compile(r'\[\[([a-zA-Z-]+:)?([a-zA-Z0-9-]+){1}(\|[a-zA-Z0-9- ]+)?\]\]')
+word_split_re = re.compile(r'[ \t]+(?![^\[]*\])')
+
+
+def parse_interlink(word):
+    """
+    Returns the (sport slug or None, term slug, label or None) of an interlink, or None if word isn't one
+    """
+    match = interlink_re.match(word)
+    if not match:
+        return None
+    sport_slug = match.group(1)[:-1] if match.group(1) else None
+    label = match.group(3)[1:].strip() if match.group(3) else None
+    return sport_slug, match.group(2), label
+
+
+def split_words(text):
+    text = text.replace('\r', ' \r')
+    text = text.replace('\n', '\n ')
+    return word_split_re.split(escape(text))
+
+
+def interlink_keys(text, sport_slug):
+    """
+    Returns the set of (sport slug, term slug) linked to in text, links without a sport are to terms of sport_slug
+    """
+    keys = set()
+    for word in split_words(text):
+        interlink = parse_interlink(word)
+        if interlink:
+            link_sport_slug, term_slug, _ = interlink
+            keys.add((link_sport_slug or sport_slug, term_slug))
+    return keys
+
+
+def resolve_interlinks(keys):
+    """
+    Returns a dict of (sport slug, term slug) -> (url, term text) for the keys which are terms, in one query
+    """
+    keys = set(keys)
+    sport_ids = sport_slugs_to_ids({sport_slug for sport_slug, _ in keys})
+    if not sport_ids:
+        return {}
+
+    sport_slugs = {sport_id: slug for slug, sport_id in sport_ids.items()}
+    terms = Term.objects.filter(sport_id__in=sport_slugs, slug__in={term_slug for _, term_slug in keys})\
+        .values_list('sport_id', 'slug', 'text')
+    resolved = {}
+    for sport_id, slug, text in terms:
+        key = (sport_slugs[sport_id], slug)
+        if key in keys:
+            resolved[key] = (reverse('term_detail', args=key), text)
+    return resolved
+
+
+def render_interlinks(text, sport_slug, resolved):
+    """
+    Escapes text and replaces its interlinks with anchors, using resolved from resolve_interlinks to look up the terms
+    """
+    words = split_words(text)
+    for i, word in enumerate(words):
+        interlink = parse_interlink(word)
+        if interlink:
+            words[i] = interlink_anchor(*interlink, sport_slug, resolved)
+    return mark_safe(' '.join(words))
+
+
+def interlink_anchor(link_sport_slug, term_slug, label, sport_slug, resolved):
+    term = resolved.get((link_sport_slug or sport_slug, term_slug))
+    if term is not None and not label and not link_sport_slug:
+        label = term[1].lower()
+    if not label:
+        label = term_slug
+
+    if term is None:
+        return f'<a href="#" class="bad-link">{label}</a>'
+    return f'<a href="{term[0]}" class="term-link-in-definition">{label}</a>'
+
+
+def prefetch_interlinks(definitions):
+    """
+    Resolves the interlinks in all of the definitions in one query and stores them on each definition as
+    resolved_interlinks for the interlinked filter. The definitions' terms should be select_related.
+    """
+    definitions = list(definitions)
+    keys = set()
+    for definition in definitions:
+        keys |= interlink_keys(definition.text, sport_slug(definition.term.sport_id))
+
+    resolved = resolve_interlinks(keys)
+    for definition in definitions:
+        definition.resolved_interlinks = resolved
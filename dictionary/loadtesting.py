@@ -0,0 +1,219 @@
+import bisect
+import http.client
+import os
+import random
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+
+from dictionary.benchmarking import pick_page_urls, summarise
+from dictionary.models import Term, Definition
+
+# the scenarios loadtest replays and how often each is picked, relative to the others
+TRAFFIC_MIX = {'browse': 60, 'search': 20, 'login': 5, 'vote': 15}
+# the upper bounds of the buckets of the latency histograms, the last bucket holds everything slower
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        # a line per request would swamp the load test's output
+        pass
+
+
+class PreforkWSGIServer(WSGIServer):
+    # enough for every connection of the highest concurrency to queue up while the workers are busy
+    request_queue_size = 256
+
+
+@contextmanager
+def serve_wsgi(application, num_workers):
+    """
+    Serves the WSGI application on a free localhost port from num_workers forked processes which accept connections
+    from the same listening socket, each serving one request at a time like gunicorn's sync workers. Yields the port.
+    """
+    server = PreforkWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler)
+    server.set_app(application)
+    # each process must open its own database connection
+    connection.close()
+    pids = []
+    try:
+        for _ in range(num_workers):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    server.serve_forever()
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        yield server.server_address[1]
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        server.server_close()
+
+
+class LoadTestSession:
+    """
+    A visitor making requests to the server on port, sending back the cookies it's been set. Each request is added to
+    samples as (scenario, duration in seconds, whether it got the expected status).
+    """
+
+    def __init__(self, port, samples, timeout):
+        self.port = port
+        self.samples = samples
+        self.timeout = timeout
+        self.cookies = {}
+
+    def request(self, scenario, method, path, expected_status=200, data=None):
+        """
+        Returns the body of the response or None if the request failed
+        """
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        http_connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+        start = time.perf_counter()
+        try:
+            http_connection.request(method, path, body, headers)
+            response = http_connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.samples.append((scenario, time.perf_counter() - start, False))
+            return None
+        finally:
+            http_connection.close()
+        self.samples.append((scenario, time.perf_counter() - start, response.status == expected_status))
+
+        for header in response.msg.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return content if response.status == expected_status else None
+
+
+class TrafficMix:
+    """
+    Replays the scenarios in mix picked at random in proportion to their weights: anonymous visitors browsing the
+    index, sport & term pages, anonymous searches, logins and bursts of upvotes from logged in users. The rows they
+    request are picked from the database, at random from seed, before the server's workers are forked. The users log in
+    with password.
+    """
+
+    def __init__(self, mix, seed, password, burst_size=10, num_terms=200, num_users=20, num_definitions=20):
+        unknown_scenarios = sorted(set(mix) - set(TRAFFIC_MIX))
+        if unknown_scenarios:
+            raise ValueError(f'Unknown scenarios {", ".join(unknown_scenarios)}')
+        self.mix = mix
+        self.password = password
+        self.burst_size = burst_size
+        rng = random.Random(seed)
+        self.page_urls = pick_page_urls(num_terms, seed)
+        term_texts = list(Term.approved_terms.values_list('text', flat=True))
+        self.search_words = sorted({word.lower() for text in rng.sample(term_texts, min(num_terms, len(term_texts)))
+                                    for word in text.split() if len(word) > 2})
+        usernames = list(User.objects.filter(is_active=True, is_staff=False).values_list('username', flat=True))
+        self.usernames = rng.sample(usernames, min(num_users, len(usernames)))
+        # the votes of a burst all go to a few definitions, so their rows are contended like a popular page's
+        definition_ids = list(Definition.approved_definitions.values_list('id', flat=True))
+        self.definition_ids = rng.sample(definition_ids, min(num_definitions, len(definition_ids)))
+        if not self.search_words or not self.usernames or not self.definition_ids:
+            raise ValueError('The database has no terms, users or definitions to request')
+
+    def run(self, session, voter, rng):
+        """
+        Replays one scenario, the votes are made by the voter session, which stays logged in between bursts
+        """
+        scenario = rng.choices(list(self.mix), list(self.mix.values()))[0]
+        getattr(self, scenario)(voter if scenario == 'vote' else session, rng)
+
+    def browse(self, session, rng):
+        session.request('browse', 'GET', rng.choice(self.page_urls))
+
+    def search(self, session, rng):
+        session.request('search', 'GET', f'{reverse("search")}?{urlencode({"term": rng.choice(self.search_words)})}')
+
+    def login(self, session, rng, scenario='login'):
+        # the login page sets the CSRF cookie which has to be sent back with the form
+        if session.request(scenario, 'GET', reverse('login')) is None:
+            return False
+        data = {'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''), 'username': rng.choice(self.usernames),
+                'password': self.password}
+        return session.request(scenario, 'POST', reverse('login'), 302, data) is not None
+
+    def vote(self, session, rng):
+        if 'sessionid' not in session.cookies and not self.login(session, rng, 'vote'):
+            return
+        for _ in range(self.burst_size):
+            session.request('vote', 'POST', f'/ajax/upvote/{rng.choice(self.definition_ids)}', 200,
+                            {'csrfmiddlewaretoken': session.cookies['csrftoken']})
+
+
+def run_load(port, traffic_mix, concurrency, duration, seed, timeout):
+    """
+    Replays the traffic mix against the server on port from concurrency threads, each a visitor making one request at
+    a time, for duration seconds. Returns the samples of every request & the seconds they took.
+    """
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    def visitor(number):
+        rng = random.Random(f'{seed}-{concurrency}-{number}')
+        voter = LoadTestSession(port, samples, timeout)
+        while time.perf_counter() < deadline:
+            traffic_mix.run(LoadTestSession(port, samples, timeout), voter, rng)
+
+    threads = [threading.Thread(target=visitor, args=(number,)) for number in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def latency_histogram(durations):
+    """
+    Returns (upper bound in ms, number of durations in seconds in the bucket) for each of LATENCY_BUCKETS_MS, the last
+    bucket's upper bound is None
+    """
+    counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for duration in durations:
+        counts[bisect.bisect_left(LATENCY_BUCKETS_MS, duration * 1000)] += 1
+    return list(zip([*LATENCY_BUCKETS_MS, None], counts))
+
+
+def summarise_load(samples, elapsed):
+    """
+    Summarises the samples of run_load as requests per second, error rate, latency percentiles & histogram, overall
+    and for each scenario
+    """
+    def errors(scenario_samples):
+        return sum(1 for _, _, ok in scenario_samples if not ok)
+
+    scenarios = {}
+    for scenario in sorted({scenario for scenario, _, _ in samples}):
+        scenario_samples = [sample for sample in samples if sample[0] == scenario]
+        scenarios[scenario] = {**summarise([duration for _, duration, _ in scenario_samples]),
+                               'errors': errors(scenario_samples)}
+    durations = [duration for _, duration, _ in samples]
+    return {
+        **summarise(durations),
+        'requests_per_second': len(samples) / elapsed if elapsed else 0.0,
+        'error_rate': errors(samples) / len(samples) if samples else 0.0,
+        'histogram': latency_histogram(durations),
+        'scenarios': scenarios,
+    }
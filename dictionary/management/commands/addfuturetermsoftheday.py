@@ -23,19 +23,31 @@ class Command(BaseCommand):
         today = date.today()
         dates_to_add = pd.date_range(start=today, periods=days_in_future).to_list()
 
+        existing_days = set(TermOfTheDay.objects.filter(day__gte=today).values_list('day', flat=True))
+        days_to_add = [d.date() for d in dates_to_add if d.date() not in existing_days]
+
+        # draw all the terms at once, avoiding terms which have already been a term of the day while there are others
+        used_term_ids = TermOfTheDay.objects.values_list('term_id', flat=True)
+        random_terms = Term.approved_terms.sample(len(days_to_add), exclude=used_term_ids)
+        picked_term_ids = {t.id for t in random_terms}
+        while len(random_terms) < len(days_to_add):
+            # then fall back to terms which have been a term of the day, without repeating the ones just drawn
+            more_terms = Term.approved_terms.sample(len(days_to_add) - len(random_terms), exclude=picked_term_ids)
+            if not more_terms:
+                if not picked_term_ids:
+                    break
+                # every approved term has been drawn, so there are more days than terms and they have to repeat
+                picked_term_ids = set()
+                continue
+            random_terms += more_terms
+            picked_term_ids.update(t.id for t in more_terms)
+
         num_totd_added = 0
 
-        for d in dates_to_add:
-            day = d.date()
-            try:
-                TermOfTheDay.objects.get(day=day)
-                continue
-            except TermOfTheDay.DoesNotExist:
-                # add a term for this day as it doesn't already exist
-                random_term = Term.approved_terms.random()
-                totd = TermOfTheDay(day=day, term=random_term)
-                totd.save()
-                num_totd_added += 1
-                print(f'Added new term of the day for date {day}')
+        for day, random_term in zip(days_to_add, random_terms):
+            totd = TermOfTheDay(day=day, term=random_term)
+            totd.save()
+            num_totd_added += 1
+            print(f'Added new term of the day for date {day}')
 
         print(f'Added {num_totd_added} new terms of the day')
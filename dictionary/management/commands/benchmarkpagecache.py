@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from dictionary.benchmarking import pick_page_urls, summarise, time_requests
+from dictionary.middleware import page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks how many requests per second anonymous users are served for the index, sport and term pages ' \
+           'with the page cache turned off and on, reading the configured database (run seeddb first)'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='the number of pages to request with the page cache off and then on',
+        )
+        parser.add_argument(
+            '--terms',
+            type=int,
+            default=50,
+            help='the number of different term pages to request',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for picking the terms and the order the pages are requested in',
+        )
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='the host the requests are made to, which must be in ALLOWED_HOSTS',
+        )
+
+    def handle(self, *args, **options):
+        urls = pick_page_urls(options['terms'], options['seed'])
+        if len(urls) == 1:
+            raise CommandError('There are no sports or terms to request, run seeddb first')
+        client = Client(HTTP_HOST=options['host'])
+
+        print(f'{"page cache":>10} {"requests":>10} {"seconds":>10} {"requests/s":>10} {"p50 ms":>10} {"p99 ms":>10} '
+              f'{"hit rate":>10}')
+        for page_cache in (False, True):
+            reset_page_cache_stats()
+            with override_settings(PAGE_CACHE=page_cache):
+                start_time = time.time()
+                durations = time_requests(client, urls, options['requests'], options['seed'])
+                elapsed_time = time.time() - start_time
+            stats = summarise(durations)
+            print(f'{"on" if page_cache else "off":>10} {len(durations):>10} {elapsed_time:>10.2f} '
+                  f'{len(durations) / elapsed_time:>10.0f} {stats["p50_ms"]:>10.3f} {stats["p99_ms"]:>10.3f} '
+                  f'{page_cache_stats()["hit_rate"]:>10.1%}')
@@ -0,0 +1,102 @@
+import random
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand
+
+from dictionary import search
+from dictionary.benchmarking import load_terms_corpus, expand_corpus, summarise, time_calls
+
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the latency of the FTS5 search against the icontains search at different numbers of terms. ' \
+           'Runs against a throwaway in-memory SQLite database built from the data_text_files terms corpus so the ' \
+           'configured database is never touched'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--sizes',
+            default='10000,100000,1000000',
+            help='comma separated list of the numbers of terms to benchmark at',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='the number of search queries to time for each engine at each size',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for picking the search keys',
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        texts = [text for sport_texts in load_terms_corpus().values() for text in sport_texts]
+        search_keys = pick_search_keys(texts, options['queries'], options['seed'])
+
+        print(f'{"terms":>10} {"engine":>10} {"p50 ms":>10} {"p99 ms":>10} {"mean ms":>10}')
+        for size in sizes:
+            db = build_database(expand_corpus(texts, size))
+            for engine, run_search in (('icontains', icontains_search), ('fts5', fts_search)):
+                durations = time_calls(run_search, [(db, key) for key in search_keys])
+                stats = summarise(durations)
+                print(f'{size:>10} {engine:>10} {stats["p50_ms"]:>10.3f} {stats["p99_ms"]:>10.3f} '
+                      f'{stats["mean_ms"]:>10.3f}')
+            db.close()
+
+
+def pick_search_keys(texts, num_keys, seed):
+    rng = random.Random(seed)
+    words = sorted({word for text in texts for word in search.token_re.findall(text.lower()) if len(word) >= 3})
+    keys = []
+    for _ in range(num_keys):
+        word = rng.choice(words)
+        # a mix of whole words & the partially typed words prefix matching is meant for
+        keys.append(word if rng.random() < 0.5 else word[:rng.randint(3, len(word))])
+    return keys
+
+
+def build_database(texts):
+    start_time = time.time()
+
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE dictionary_term (id INTEGER PRIMARY KEY, text VARCHAR(100), approvedFl BOOL)')
+    db.execute('CREATE INDEX dictionary_term_text ON dictionary_term (text)')
+    db.execute(search.FTS_TABLE_DDL.format(table=search.FTS_TABLE))
+    db.execute(search.FTS_RANK_CONFIG.format(table=search.FTS_TABLE))
+    rows = [(i, text, True) for i, text in enumerate(texts, start=1)]
+    db.executemany('INSERT INTO dictionary_term (id, text, approvedFl) VALUES (?, ?, ?)', rows)
+    db.executemany(f'INSERT INTO {search.FTS_TABLE} (rowid, text, definitions) VALUES (?, ?, \'\')',
+                   [(i, text) for i, text, _ in rows])
+    db.execute(f"INSERT INTO {search.FTS_TABLE} ({search.FTS_TABLE}) VALUES ('optimize')")
+    db.commit()
+
+    print(f'Built database with {len(texts)} terms in {time.time() - start_time:.2f} seconds')
+    return db
+
+
+def icontains_search(db, search_key):
+    # mirrors the count & first page queries the paginator runs for Term.objects.filter(text__icontains=...)
+    pattern = f'%{search_key}%'
+    db.execute('SELECT COUNT(*) FROM dictionary_term WHERE approvedFl = 1 AND text LIKE ? ESCAPE \'\\\'',
+               (pattern,)).fetchone()
+    db.execute('SELECT id, text FROM dictionary_term WHERE approvedFl = 1 AND text LIKE ? ESCAPE \'\\\' '
+               'ORDER BY text LIMIT ?', (pattern, PAGE_SIZE)).fetchall()
+
+
+def fts_search(db, search_key):
+    # mirrors the count & first page queries the paginator runs for search.search_terms()
+    fts = search.FTS_TABLE
+    match_query = search.build_match_query(search_key)
+    db.execute(f'SELECT COUNT(*) FROM dictionary_term, {fts} WHERE dictionary_term.approvedFl = 1 '
+               f'AND {fts}.rowid = dictionary_term.id AND {fts} MATCH ?', (match_query,)).fetchone()
+    db.execute(f'SELECT dictionary_term.id, dictionary_term.text FROM dictionary_term, {fts} '
+               f'WHERE dictionary_term.approvedFl = 1 AND {fts}.rowid = dictionary_term.id AND {fts} MATCH ? '
+               f'ORDER BY {fts}.rank, dictionary_term.text, dictionary_term.id LIMIT ?',
+               (match_query, PAGE_SIZE)).fetchall()
@@ -0,0 +1,75 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from dictionary.benchmarking import load_terms_corpus, expand_corpus, summarise, time_calls
+from dictionary.suggestions import TrigramIndex, words
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the latency of "did you mean" suggestions from the trigram index for misspelt searches. ' \
+           'The index is built straight from the data_text_files terms corpus (replicated up to each size) so no ' \
+           'database is needed'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--sizes',
+            default='3212,100000,1000000',
+            help='comma separated list of the numbers of terms to benchmark at',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=1000,
+            help='the number of misspelt searches to time at each size',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for generating the misspelt searches',
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        texts = [text for sport_texts in load_terms_corpus().values() for text in sport_texts]
+        rng = random.Random(options['seed'])
+        originals = [rng.choice(texts) for _ in range(options['queries'])]
+        misspellings = [misspell(text, rng) for text in originals]
+
+        print(f'{"terms":>10} {"words":>10} {"build s":>10} {"p50 ms":>10} {"p99 ms":>10} {"mean ms":>10} '
+              f'{"fixed %":>10}')
+        for size in sizes:
+            index = TrigramIndex()
+            start_time = time.time()
+            for term_id, text in enumerate(expand_corpus(texts, size), start=1):
+                index.add_term(term_id, text, '', '')
+            build_time = time.time() - start_time
+
+            stats = summarise(time_calls(index.suggest, [(query,) for query in misspellings]))
+
+            # a misspelling counts as fixed if one of the suggestions is the original text
+            fixed = sum(1 for original, query in zip(originals, misspellings)
+                        if ' '.join(words(original)) in index.suggest(query))
+            print(f'{size:>10} {len(index.words):>10} {build_time:>10.2f} {stats["p50_ms"]:>10.3f} '
+                  f'{stats["p99_ms"]:>10.3f} {stats["mean_ms"]:>10.3f} {fixed / len(misspellings) * 100:>10.1f}')
+
+
+def misspell(text, rng):
+    """
+    Applies a single random deletion, insertion, substitution or transposition to text
+    """
+    if len(text) < 3:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    edit = rng.choice(('delete', 'insert', 'substitute', 'transpose'))
+    if edit == 'delete':
+        return text[:i] + text[i + 1:]
+    if edit == 'insert':
+        return text[:i] + rng.choice(string.ascii_lowercase) + text[i:]
+    if edit == 'substitute':
+        return text[:i] + rng.choice(string.ascii_lowercase) + text[i + 1:]
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
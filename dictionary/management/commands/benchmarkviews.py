@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from dictionary.benchmarking import VIEW_BENCHMARKS, ViewRequests, compare_view_results, summarise_view, time_view
+from dictionary.catalogue import sports_catalogue
+from dictionary.datasets import copy_dataset, use_database
+from dictionary.seeding import DATASET_TIERS
+from dictionary.signals import in_memory_term_indexes
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the latency, queries and bytes rendered of every dictionary view and AJAX endpoint through the ' \
+           'test client against a copy of a benchmark dataset (run builddataset first) and writes the results to JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tier',
+            choices=list(DATASET_TIERS),
+            help='the size tier of the dataset to benchmark against',
+        )
+
+        # Named (optional) arguments
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='the number of requests to time for each view',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='the number of requests made to each view before timing it',
+        )
+        parser.add_argument(
+            '--views',
+            help=f'comma separated views to benchmark (defaults to all of {",".join(VIEW_BENCHMARKS)})',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for picking the rows to request',
+        )
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='the host the requests are made to, which must be in ALLOWED_HOSTS',
+        )
+        parser.add_argument(
+            '--output',
+            help='where to write the results (defaults to views-<tier>-<time>.json in BENCHMARK_RESULTS_DIR)',
+        )
+        parser.add_argument(
+            '--compare',
+            help='the results of an earlier run to compare the latencies against',
+        )
+
+    def handle(self, *args, **options):
+        views = options['views'].split(',') if options['views'] else list(VIEW_BENCHMARKS)
+        unknown_views = sorted(set(views) - set(VIEW_BENCHMARKS))
+        if unknown_views:
+            raise CommandError(f'Unknown views {", ".join(unknown_views)}, choose from {", ".join(VIEW_BENCHMARKS)}')
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                previous = json.load(f)
+        tier = options['tier']
+        output = options['output'] or os.path.join(settings.BENCHMARK_RESULTS_DIR,
+                                                   f'views-{tier}-{time.strftime("%Y%m%d-%H%M%S")}.json')
+
+        results = {'tier': tier, 'seed': options['seed'], 'requests': options['requests'],
+                   'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'views': {}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'{tier}.sqlite3')
+            try:
+                copy_dataset(tier, path)
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            # the views are run rather than their pages read from the page cache, the votes & deletions are applied
+            # to the copy straight away
+            with use_database(path), override_settings(PAGE_CACHE=False, VOTE_BUFFER_ENABLED=False):
+                for index in [sports_catalogue, *in_memory_term_indexes]:
+                    index.ensure_built()
+                requests = ViewRequests(options['seed'])
+                anonymous_client, user_client = Client(HTTP_HOST=options['host']), Client(HTTP_HOST=options['host'])
+                user_client.force_login(requests.user)
+
+                print(f'{"view":<22} {"p50 ms":>10} {"p90 ms":>10} {"p99 ms":>10} {"queries":>10} {"bytes":>10}')
+                for view in views:
+                    make_request = getattr(requests, f'{view}_request')
+                    time_view(anonymous_client, user_client, make_request, options['warmup'])
+                    stats = summarise_view(*time_view(anonymous_client, user_client, make_request,
+                                                      options['requests']))
+                    results['views'][view] = stats
+                    print(f'{view:<22} {stats["p50_ms"]:>10.3f} {stats["p90_ms"]:>10.3f} {stats["p99_ms"]:>10.3f} '
+                          f'{stats["queries_mean"]:>10.1f} {stats["bytes_mean"]:>10.0f}')
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote the results to {output}')
+
+        if previous is not None:
+            print(f'{"view":<22} {"was p50 ms":>10} {"p50 ms":>10} {"change":>10} {"was q":>10} {"queries":>10}')
+            for view, before, after, change, queries_before, queries_after in compare_view_results(previous, results):
+                print(f'{view:<22} {before:>10.3f} {after:>10.3f} {change:>+10.1%} {queries_before:>10.1f} '
+                      f'{queries_after:>10.1f}')
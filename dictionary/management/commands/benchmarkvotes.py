@@ -0,0 +1,96 @@
+import functools
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dictionary import votes
+from dictionary.benchmarking import create_vote_fixtures, delete_vote_fixtures, run_vote_workers, vote_counter_drift
+from dictionary.votebuffer import VoteBuffer, buffer_vote
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks how many votes per second are accepted when voting synchronously against the write-behind ' \
+           'vote buffer, with several processes voting at once against the configured database. The sport, term, ' \
+           'definitions & users it votes with are created for the run and deleted afterwards'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=8,
+            help='the number of processes voting at the same time',
+        )
+        parser.add_argument(
+            '--votes',
+            type=int,
+            default=200,
+            help='the number of votes each process makes',
+        )
+        parser.add_argument(
+            '--definitions',
+            type=int,
+            default=20,
+            help='the number of definitions to vote on',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=100,
+            help='the number of users voting',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for picking the votes',
+        )
+        parser.add_argument(
+            '--no-fsync',
+            action='store_true',
+            help="don't fsync the vote buffer log after each vote",
+        )
+
+    def handle(self, *args, **options):
+        num_processes = options['processes']
+        if num_processes > 1 and connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('An in-memory SQLite database can\'t be shared between processes, '
+                               'use --processes 1 or an on-disk database')
+
+        sport, definition_ids, user_ids = create_vote_fixtures(uuid.uuid4().hex[:8], options['definitions'],
+                                                               options['users'])
+        run_args = (definition_ids, user_ids, num_processes, options['votes'], options['seed'])
+
+        try:
+            print(f'{"mode":>20} {"votes":>10} {"seconds":>10} {"votes/s":>10} {"retries":>10}')
+
+            start_time = time.time()
+            num_votes, num_retries = run_vote_workers(votes.toggle_vote, *run_args)
+            print_row('synchronous', num_votes, time.time() - start_time, num_retries)
+
+            with tempfile.TemporaryDirectory() as directory:
+                vote_buffer = VoteBuffer(directory, fsync=not options['no_fsync'])
+                start_time = time.time()
+                num_votes, num_retries = run_vote_workers(functools.partial(buffer_vote, vote_buffer=vote_buffer),
+                                                          *run_args)
+                print_row('buffered (accept)', num_votes, time.time() - start_time, num_retries)
+
+                start_time = time.time()
+                num_read, num_changed = vote_buffer.flush()
+                print_row('buffered (flush)', num_read, time.time() - start_time, 0)
+                print(f'The flush changed {num_changed} votes')
+
+            drift = vote_counter_drift(definition_ids)
+        finally:
+            delete_vote_fixtures(sport, user_ids)
+
+        if drift:
+            raise CommandError(f'The vote counters of {len(drift)} definitions drifted from their Vote rows')
+        print('No drift between the Vote rows and the vote counters')
+
+
+def print_row(mode, num_votes, elapsed_time, num_retries):
+    print(f'{mode:>20} {num_votes:>10} {elapsed_time:>10.2f} {num_votes / elapsed_time:>10.0f} {num_retries:>10}')
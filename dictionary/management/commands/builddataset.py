@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dictionary.datasets import dataset_path, use_database
+from dictionary.models import Term, Definition, Vote
+from dictionary.seeding import DATASET_TIERS, DatasetBuilder
+
+# the seed every tier is built from unless another is given, so the same tier is the same dataset everywhere
+DATASET_SEED = 2020
+
+
+class Command(BaseCommand):
+    help = 'Builds the benchmark dataset of a size tier from the terms corpus and writes it to an SQLite snapshot for ' \
+           'benchmarks to copy'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tier',
+            choices=list(DATASET_TIERS),
+            help='the size tier to build',
+        )
+
+        # Named (optional) arguments
+        parser.add_argument(
+            '--output',
+            help='where to write the snapshot (defaults to <tier>.sqlite3 in BENCHMARK_DATASET_DIR)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='build the dataset again if the snapshot already exists',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=DATASET_SEED,
+            help='build a different dataset of the same size',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='the number of processes generating the definitions and votes',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='the number of rows to generate & insert at a time',
+        )
+
+    def handle(self, *args, **options):
+        tier_name = options['tier']
+        tier = DATASET_TIERS[tier_name]
+        path = options['output'] or dataset_path(tier_name)
+        if os.path.exists(path) and not options['force']:
+            print(f'The {tier_name} dataset is already built at {path}, pass --force to build it again')
+            return
+        if connection.vendor != 'sqlite':
+            raise CommandError('Benchmark datasets are SQLite snapshots, the default database must be SQLite')
+
+        start_time = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # built next to the snapshot and moved over it once complete so a failed build never leaves half a dataset
+        building_path = f'{path}.building'
+        if os.path.exists(building_path):
+            os.remove(building_path)
+
+        with use_database(building_path) as database:
+            call_command('migrate', verbosity=0)
+            call_command('createcachetable')
+            builder = DatasetBuilder(batch_size=options['batch_size'], seed=options['seed'],
+                                     workers=options['workers'])
+            builder.build(tier)
+            # statistics for the query planner, the same as a database which has been running for a while has
+            with database.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            counts = [(model._meta.verbose_name_plural, model.objects.count())
+                      for model in (User, Term, Definition, Vote)]
+        os.replace(building_path, path)
+
+        for stage in builder.stages.values():
+            print(stage)
+        print(f'Built the {tier_name} dataset ({", ".join(f"{count} {name}" for name, count in counts)}) with '
+              f'--seed {options["seed"]} in {time.time() - start_time:.2f} seconds at {path}')
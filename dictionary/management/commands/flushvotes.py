@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dictionary.votebuffer import get_vote_buffer
+
+
+class Command(BaseCommand):
+    help = 'Applies the votes buffered while VOTE_BUFFER_ENABLED is on to the database in batches, replaying any ' \
+           'flush which didn\'t finish first. Keeps flushing every VOTE_BUFFER_FLUSH_INTERVAL seconds unless --once ' \
+           'is given'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='flush the buffered votes once and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.VOTE_BUFFER_FLUSH_INTERVAL,
+            help='the number of seconds to wait between flushes',
+        )
+
+    def handle(self, *args, **options):
+        vote_buffer = get_vote_buffer()
+        while True:
+            start_time = time.time()
+            num_read, num_changed = vote_buffer.flush()
+            elapsed_time = time.time() - start_time
+            if num_read or num_changed or options['once']:
+                print(f'Flushed {num_read} buffered votes ({num_changed} votes changed) in {elapsed_time:.2f} seconds')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.test import override_settings
+
+from dictionary.catalogue import sports_catalogue
+from dictionary.datasets import copy_dataset, use_database
+from dictionary.loadtesting import TRAFFIC_MIX, TrafficMix, run_load, serve_wsgi, summarise_load
+from dictionary.seeding import DATASET_TIERS, SEED_PASSWORD
+from dictionary.signals import in_memory_term_indexes
+
+HISTOGRAM_WIDTH = 40
+
+
+def parse_mix(value):
+    """
+    Parses a traffic mix of the form browse=60,search=20 into a dict of scenario -> weight
+    """
+    mix = {}
+    for part in value.split(','):
+        scenario, _, weight = part.partition('=')
+        try:
+            mix[scenario.strip()] = int(weight)
+        except ValueError:
+            raise CommandError(f'Invalid traffic mix {value}, expected e.g. browse=60,search=20')
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Load tests the app served by a local WSGI server with a pool of worker processes against a copy of a ' \
+           'benchmark dataset (run builddataset first), replaying a mix of traffic at increasing concurrency levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tier',
+            choices=list(DATASET_TIERS),
+            help='the size tier of the dataset to serve',
+        )
+
+        # Named (optional) arguments
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='the number of server processes',
+        )
+        parser.add_argument(
+            '--concurrency',
+            default='1,2,4,8,16',
+            help='comma separated numbers of visitors making requests at the same time, each level is run in turn',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='the number of seconds to run each concurrency level for',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=float,
+            default=2,
+            help='the number of seconds to make requests for before the first level, which aren\'t counted',
+        )
+        parser.add_argument(
+            '--mix',
+            default=','.join(f'{scenario}={weight}' for scenario, weight in TRAFFIC_MIX.items()),
+            help=f'the weight of each scenario in the traffic, out of {", ".join(TRAFFIC_MIX)}',
+        )
+        parser.add_argument(
+            '--burst-size',
+            type=int,
+            default=10,
+            help='the number of upvotes in each vote burst',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30,
+            help='the number of seconds after which a request counts as an error',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for picking the rows to request and the order of the scenarios',
+        )
+        parser.add_argument(
+            '--output',
+            help='where to write the results (defaults to loadtest-<tier>-<time>.json in BENCHMARK_RESULTS_DIR)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            concurrency_levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError(f'Invalid concurrency levels {options["concurrency"]}, expected e.g. 1,2,4')
+        mix = parse_mix(options['mix'])
+        tier = options['tier']
+        output = options['output'] or os.path.join(settings.BENCHMARK_RESULTS_DIR,
+                                                   f'loadtest-{tier}-{time.strftime("%Y%m%d-%H%M%S")}.json')
+
+        results = {'tier': tier, 'workers': options['workers'], 'mix': mix, 'duration': options['duration'],
+                   'seed': options['seed'], 'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'levels': {}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'{tier}.sqlite3')
+            try:
+                copy_dataset(tier, path)
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            # served like in production, through the tiered cache & the page cache, rather than with the debug
+            # pages, which keep every query in memory
+            with use_database(path), override_settings(DEBUG=False, PAGE_CACHE=True,
+                                                       ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1']):
+                try:
+                    traffic_mix = TrafficMix(mix, options['seed'], SEED_PASSWORD, burst_size=options['burst_size'])
+                except ValueError as e:
+                    raise CommandError(str(e))
+                application = get_internal_wsgi_application()
+                # loaded once before forking so the workers share them rather than each loading every term
+                for index in [sports_catalogue, *in_memory_term_indexes]:
+                    index.ensure_built()
+
+                with serve_wsgi(application, options['workers']) as port:
+                    print(f'Serving the {tier} dataset on 127.0.0.1:{port} with {options["workers"]} workers')
+                    if options['warmup']:
+                        run_load(port, traffic_mix, max(concurrency_levels), options['warmup'], options['seed'],
+                                 options['timeout'])
+                    for concurrency in concurrency_levels:
+                        samples, elapsed = run_load(port, traffic_mix, concurrency, options['duration'],
+                                                    options['seed'], options['timeout'])
+                        results['levels'][concurrency] = summarise_load(samples, elapsed)
+
+        print(f'{"concurrency":>11} {"requests":>10} {"requests/s":>10} {"errors":>10} {"p50 ms":>10} {"p90 ms":>10} '
+              f'{"p99 ms":>10}')
+        for concurrency, stats in results['levels'].items():
+            print(f'{concurrency:>11} {stats["count"]:>10} {stats["requests_per_second"]:>10.1f} '
+                  f'{stats["error_rate"]:>10.1%} {stats["p50_ms"]:>10.3f} {stats["p90_ms"]:>10.3f} '
+                  f'{stats["p99_ms"]:>10.3f}')
+        for concurrency, stats in results['levels'].items():
+            print(f'\nLatency at concurrency {concurrency}')
+            most = max(count for _, count in stats['histogram']) or 1
+            for bound, count in stats['histogram']:
+                label = f'<= {bound} ms' if bound is not None else f'> {stats["histogram"][-2][0]} ms'
+                print(f'{label:>12} {count:>8} {"#" * round(count / most * HISTOGRAM_WIDTH)}')
+            for scenario, scenario_stats in stats['scenarios'].items():
+                print(f'{scenario:>12} {scenario_stats["count"]:>8} requests, {scenario_stats["errors"]} errors, '
+                      f'p50 {scenario_stats["p50_ms"]:.3f} ms, p99 {scenario_stats["p99_ms"]:.3f} ms')
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nWrote the results to {output}')
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dictionary import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for terms from scratch'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='the number of terms to index per batch',
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            print('Full-text search is not available (it requires SQLite with FTS5 and SEARCH_FULL_TEXT_ENABLED)')
+            return
+
+        start_time = time.time()
+        num_indexed = search.rebuild_index(batch_size=options['batch_size'])
+        elapsed_time = time.time() - start_time
+
+        print(f'Indexed {num_indexed} terms in {elapsed_time:.2f} seconds')
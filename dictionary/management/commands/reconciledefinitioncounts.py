@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dictionary import dependencies
+from dictionary.models import Term
+from dictionary.signals import term_list_dependencies
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored number of definitions and top definition of every term from its definitions, ' \
+           'e.g. after loading fixtures or bulk imports which bypass Definition.save'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='the number of terms to update per transaction',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        start_time = time.time()
+
+        term_ids = list(Term.objects.order_by('id').values_list('id', flat=True))
+        num_changed = 0
+        for start in range(0, len(term_ids), batch_size):
+            batch = Term.objects.filter(id__gte=term_ids[start], id__lte=term_ids[start:start + batch_size][-1])
+            with transaction.atomic():
+                fields = ('id', 'sport_id', 'num_definitions', 'top_definition')
+                before = set(batch.values_list(*fields))
+                batch.update(**Term.definition_stats())
+                changed = before - set(batch.values_list(*fields))
+                # update() sends no signals so the pages & lists showing the changed terms are bumped here
+                dependencies.bump(*(dependencies.term_dependency(term_id) for term_id, _, _, _ in changed),
+                                  *term_list_dependencies(*{sport_id for _, sport_id, _, _ in changed}))
+                num_changed += len(changed)
+
+        elapsed_time = time.time() - start_time
+        print(f'Reconciled the definition counts of {len(term_ids)} terms ({num_changed} were out of date) '
+              f'in {elapsed_time:.2f} seconds')
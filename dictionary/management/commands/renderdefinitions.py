@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from dictionary.models import Definition
+from dictionary.rendering import RENDER_VERSION, rerender_definitions
+from dictionary.seeding import CAN_FORK
+
+
+class Command(BaseCommand):
+    help = 'Renders the HTML stored with every definition, in batches spread over a pool of processes, e.g. after ' \
+           'changing how definitions are rendered or loading fixtures which bypass Definition.save'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='the number of processes rendering definitions (1 where processes can\'t be forked, e.g. on Windows)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='the number of definitions each process renders & stores at a time',
+        )
+        parser.add_argument(
+            '--stale',
+            action='store_true',
+            help='only render the definitions which were rendered by an older version or not at all',
+        )
+
+    def handle(self, *args, **options):
+        num_processes = options['processes'] if CAN_FORK else 1
+        batch_size = options['batch_size']
+        if num_processes > 1 and connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('An in-memory SQLite database can\'t be shared between processes, '
+                               'use --processes 1 or an on-disk database')
+        start_time = time.time()
+
+        definitions = Definition.objects.order_by('id')
+        if options['stale']:
+            definitions = definitions.exclude(rendered_version=RENDER_VERSION)
+        definition_ids = list(definitions.values_list('id', flat=True))
+        batches = [definition_ids[start:start + batch_size] for start in range(0, len(definition_ids), batch_size)]
+
+        if num_processes == 1 or len(batches) <= 1:
+            num_rendered = sum(map(rerender_definitions, batches))
+        else:
+            # each process must open its own database connection
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(num_processes) as pool:
+                num_rendered = sum(pool.imap_unordered(rerender_definitions, batches))
+
+        elapsed_time = time.time() - start_time
+        print(f'Rendered {num_rendered} definitions with {min(num_processes, len(batches) or 1)} processes '
+              f'in {elapsed_time:.2f} seconds')
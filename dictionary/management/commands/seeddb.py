@@ -1,4 +1,5 @@
 import datetime
+import os
 import random
 import time
 
@@ -9,6 +10,7 @@ from django.core.management.base import BaseCommand
 from faker import Faker
 
 from dictionary.models import Sport, Term, Definition, Vote, Category, TermOfTheDay
+from dictionary.seeding import BulkSeeder, SPORT_EMOJIS
 
 fake = Faker()
 
@@ -74,6 +76,37 @@ class Command(BaseCommand):
             help='the number of terms of the day to add (if this is greater than the supplied num terms value it will '
                  'instead match the number of terms',
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='generate the rows in memory and insert them in batches, for seeding databases with millions of rows',
+        )
+        parser.add_argument(
+            '-mnv',
+            '--max-num-votes',
+            type=int,
+            default=10,
+            help='the maximum number of votes to add for each definition with --bulk (without it every user votes on '
+                 'about half of the definitions)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='the number of rows to generate & insert at a time with --bulk',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='the number of processes generating the fake users & terms with --bulk (1 generates them in this '
+                 'process, as does any number where processes can\'t be forked, e.g. on Windows)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='seed the random data with this so seeding an empty db again adds the same rows',
+        )
 
     def handle(self, *args, **options):
         num_users = options['num_users']
@@ -94,6 +127,23 @@ class Command(BaseCommand):
 
         start_time = time.time()
 
+        if options['bulk']:
+            if overwrite:
+                delete_existing_rows(overwrite_superusers)
+            seeder = BulkSeeder(batch_size=options['batch_size'], seed=options['seed'], workers=options['workers'])
+            seeder.seed(num_users=num_users, num_sports=num_sports, num_categories=num_categories,
+                        num_terms=num_terms, max_num_definitions=max_num_definitions,
+                        max_num_votes=options['max_num_votes'], num_terms_of_the_day=num_terms_of_the_day)
+            for stage in seeder.stages.values():
+                print(stage)
+            print(f'Seeding DB with {seeder.workers} workers and --seed {seeder.random_seed} took: '
+                  f'{time.time() - start_time:.2f} seconds')
+            return
+
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+            fake.seed_instance(options['seed'])
+
         # run seeds
         seed_users(num_entries=num_users, overwrite=overwrite, overwrite_superusers=overwrite_superusers)
         seed_sports(num_entries=num_sports, overwrite=overwrite)
@@ -110,6 +160,14 @@ class Command(BaseCommand):
         print("Seeding DB took: {} minutes {} seconds".format(minutes, seconds))
 
 
+def delete_existing_rows(overwrite_superusers):
+    print("Overwriting Votes, Definitions, Terms of the day, Terms, Categories, Sports and Users")
+    for model in (Vote, Definition, TermOfTheDay, Term, Category, Sport):
+        model.objects.all().delete()
+    users = User.objects.all() if overwrite_superusers else User.objects.filter(is_staff=False)
+    users.delete()
+
+
 def seed_users(num_entries=10, overwrite=False, overwrite_superusers=False):
     """
     Creates num_entries worth a new users
@@ -181,10 +239,7 @@ def seed_sports(num_entries, overwrite):
             except ObjectDoesNotExist:
                 retry = False
 
-        emoji = random.choice('🤺 🏇 ⛷️ 🏂 🏌️‍♂️ 🏌️‍♀️ 🏄‍♂️ 🏄‍♀️ 🚣‍♂️ 🚣‍♀️ 🏊‍♂️ 🏊‍♀️ ⛹️‍♂️ ⛹️‍♀️ 🏋️‍♂️ '
-                              '🏋️‍♀️ 🚴‍♂️ 🚴‍♀️ 🚵‍♂️ 🚵‍♀️ 🏎️ 🏍️ 🤸 🤸‍♂️ 🤸‍♀️ 🤼 🤼‍♂️ 🤼‍♀️ 🤽 🤽‍♂️ 🤽‍♀️ 🤾 '
-                              '🤾‍♂️ 🤾‍♀️ 🤹 🤹‍♂️ 🤹‍♀️ 🎖️ 🏆 🏅 🥇 🥈 🥉 ⚽ ⚾ 🏀 🏐 🏈 🏉 🎾 🎳 🏏 🏑 🏒 🏓 🏸 🥊 '
-                              '🥋 🥅 ⛸️ 🎣 🎿 🛷 🥌 🎯 🎱 🧗‍♂️ 🧗‍♀️'.split(' '))
+        emoji = random.choice(SPORT_EMOJIS)
         sport = Sport(
             name=sport_name,
             slug=sport_name.replace(' ', '-'),
@@ -307,10 +362,10 @@ def seed_terms_of_the_day(num_entries, overwrite):
         num_entries = Term.objects.count()
 
     today = datetime.date.today()
+    random_terms = Term.approved_terms.sample(num_entries)
 
-    for i in range(num_entries):
+    for i, random_term in enumerate(random_terms):
         day = today - datetime.timedelta(days=i)
-        random_term = Term.approved_terms.random()
         totd = TermOfTheDay(day=day, term=random_term)
         totd.save()
         count += 1
@@ -0,0 +1,80 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dictionary import votes
+from dictionary.benchmarking import create_vote_fixtures, delete_vote_fixtures, run_vote_workers, vote_counter_drift
+
+
+class Command(BaseCommand):
+    help = 'Stress tests voting by toggling random votes from several processes at once against the configured ' \
+           'database, then checks the vote counters of every definition still match its Vote rows. The sport, ' \
+           'term, definitions & users it votes with are created for the run and deleted afterwards'
+
+    def add_arguments(self, parser):
+        # Named (optional) arguments
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=8,
+            help='the number of processes voting at the same time',
+        )
+        parser.add_argument(
+            '--votes',
+            type=int,
+            default=200,
+            help='the number of votes each process makes',
+        )
+        parser.add_argument(
+            '--definitions',
+            type=int,
+            default=3,
+            help='the number of definitions to vote on, fewer definitions means more contention',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10,
+            help='the number of users voting',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed for picking the votes',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help="don't delete the sport, term, definitions & users created for the run",
+        )
+
+    def handle(self, *args, **options):
+        num_processes = options['processes']
+        if num_processes > 1 and connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('An in-memory SQLite database can\'t be shared between processes, '
+                               'use --processes 1 or an on-disk database')
+
+        sport, definition_ids, user_ids = create_vote_fixtures(uuid.uuid4().hex[:8], options['definitions'],
+                                                               options['users'])
+
+        start_time = time.time()
+        num_votes, num_retries = run_vote_workers(votes.toggle_vote, definition_ids, user_ids, num_processes,
+                                                  options['votes'], options['seed'])
+        elapsed_time = time.time() - start_time
+        print(f'{num_processes} processes made {num_votes} votes in {elapsed_time:.2f} seconds '
+              f'({num_votes / elapsed_time:.0f} votes/s, {num_retries} retries after lock timeouts)')
+
+        drift = vote_counter_drift(definition_ids)
+        if not options['keep']:
+            delete_vote_fixtures(sport, user_ids)
+
+        if drift:
+            print(f'{"definition":>10} {"upvotes":>10} {"up rows":>10} {"downvotes":>10} {"down rows":>10} '
+                  f'{"net":>10}')
+            for row in drift:
+                print(' '.join(f'{value:>10}' for value in row))
+            raise CommandError(f'The vote counters of {len(drift)} definitions drifted from their Vote rows')
+        print('No drift between the Vote rows and the vote counters')
@@ -1,8 +1,6 @@
 from datetime import date
-from random import randint
 
 from django.db import models as models
-from django.db.models import Count
 
 
 class SportManager(models.Manager):
@@ -20,9 +18,32 @@ class ApprovedTermManager(models.Manager):
         return super().get_queryset().filter(approvedFl=True)
 
     def random(self):
-        count = self.get_queryset().aggregate(count=Count('id'))['count']
-        random_index = randint(0, count - 1)
-        return self.all()[random_index]
+        """
+        Returns a random approved term, or None if there are none, picked in constant time from the in-memory term
+        sampler rather than with an OFFSET scan
+        """
+        from dictionary.sampling import random_term_id, term_sampler
+
+        for _ in range(2):
+            term_id = random_term_id()
+            if term_id is None:
+                return None
+            term = self.get_queryset().filter(pk=term_id).first()
+            if term is not None:
+                return term
+            # the term was deleted or disapproved by another process since the sampler was last checked
+            term_sampler.invalidate()
+        return None
+
+    def sample(self, k, exclude=()):
+        """
+        Returns up to k distinct random approved terms, excluding the terms whose ids are in exclude, in one query
+        """
+        from dictionary.sampling import sample_term_ids
+
+        term_ids = sample_term_ids(k, exclude=exclude)
+        terms = self.get_queryset().in_bulk(term_ids)
+        return [terms[term_id] for term_id in term_ids if term_id in terms]
 
 
 class PendingSuggestedTermManager(models.Manager):
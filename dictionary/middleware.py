@@ -0,0 +1,119 @@
+import threading
+from datetime import date
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from dictionary import dependencies
+
+# the pages served from the page cache & the query string parameters which change what they show, any other
+# parameters are left out of the cache key
+CACHED_PAGES = {'index', 'sport_index', 'term_detail'}
+CACHED_QUERY_PARAMS = ('category', 'cursor', 'page')
+
+_stats_lock = threading.Lock()
+_stats = dict.fromkeys(('hits', 'misses', 'stale', 'stores', 'bypasses'), 0)
+
+
+class PageCacheMiddleware:
+    """
+    Serves the pages in CACHED_PAGES to anonymous users from the cache, as they're rendered for them, without running
+    the view. Each page is stored along with the dependencies of its view and the generations they were on before the
+    view ran, which ConditionalGetMixin attaches to the response, and is rendered again once any of them has been
+    bumped by the model signals. Logged in users always get the page rendered for them.
+
+    Goes after the AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PAGE_CACHE or not is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = page_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            page_dependencies, page_generations, response = entry
+            if dependencies.generations(page_dependencies) == page_generations:
+                count('hits')
+                # the validators the view sent with the page are still current, as nothing it depends on has changed
+                response = get_conditional_response(
+                    request, etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(response.get('Last-Modified', '')), response=response)
+                response['X-Page-Cache'] = 'hit'
+                return response
+            count('stale')
+        else:
+            count('misses')
+
+        response = self.get_response(request)
+        dependency_generations = getattr(response, 'dependency_generations', None)
+        if dependency_generations is not None and is_cacheable_response(request, response):
+            cache.set(key, (list(dependency_generations), list(dependency_generations.values()), response),
+                      settings.PAGE_CACHE_TIMEOUT)
+            count('stores')
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+
+def is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    try:
+        url_name = resolve(request.path_info).url_name
+    except Resolver404:
+        return False
+    if url_name not in CACHED_PAGES:
+        return False
+    if request.user.is_authenticated:
+        count('bypasses')
+        return False
+    return True
+
+
+def is_cacheable_response(request, response):
+    # a page with a CSRF token or setting cookies is specific to the user it was rendered for
+    if request.META.get('CSRF_COOKIE_USED') or response.cookies:
+        return False
+    cache_control = response.get('Cache-Control', '')
+    return response.status_code == 200 and not response.streaming \
+        and 'private' not in cache_control and 'no-store' not in cache_control
+
+
+def page_cache_key(request):
+    """
+    Cache key of a page identified by its path & the parameters in CACHED_QUERY_PARAMS, in a normalised order
+    """
+    query = urlencode([(param, value) for param in CACHED_QUERY_PARAMS
+                       for value in sorted(request.GET.getlist(param))])
+    # the terms of the day up to today are listed so a page is never served on a different day to the one it was
+    # rendered on
+    return dependencies.cache_key('dictionary-page', [], request.method, request.path, query, date.today().isoformat())
+
+
+def count(stat):
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+def page_cache_stats():
+    """
+    Returns this process's page cache counters and the hit rate of the requests which could be served from it
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses'] + stats['stale']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_page_cache_stats():
+    with _stats_lock:
+        for stat in _stats:
+            _stats[stat] = 0
@@ -1,10 +1,10 @@
 import re
 
-from django.core.cache import cache
-
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models as models, IntegrityError
+from django.db import models as models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.template.defaultfilters import slugify
 from django.urls import reverse
 
@@ -141,15 +141,8 @@ class Category(models.Model):
         return f'{self.name}'
 
     def get_absolute_url(self):
-        name = self.name.replace(' ', '_')
-        cache_key = f'{self.id}-{name}'
-        cache_time = 86400
-        data = cache.get(cache_key)
-        if not data:
-            base_url = reverse('sport_index', args=(self.sport.slug,))
-            data = f'{base_url}?category={self.name}'
-            cache.set(cache_key, data, cache_time)
-        return data
+        from dictionary.catalogue import category_url, category_url_of
+        return category_url(self.id) or category_url_of(self.sport, self.name)
 # endregion
 
 
@@ -187,12 +180,19 @@ class Term(AbstractTerm):
     # Fields
     slug = models.SlugField()
     approvedFl = models.BooleanField(default=True)
+    # denormalised from the term's approved definitions, kept up to date by update_definition_stats
+    num_definitions = models.PositiveIntegerField(default=0, editable=False)
 
     # Relationship Fields
     suggested_term = models.OneToOneField(
         'dictionary.SuggestedTerm',
         on_delete=models.CASCADE, null=True
     )
+    top_definition = models.ForeignKey(
+        'dictionary.Definition',
+        on_delete=models.SET_NULL, related_name='+',
+        null=True, blank=True, editable=False
+    )
 
     # Managers
     approved_terms = ApprovedTermManager()
@@ -203,12 +203,27 @@ class Term(AbstractTerm):
         constraints = [
             models.UniqueConstraint(fields=['text', 'sport'], name='unique_term_in_sport'),
         ]
+        indexes = [
+            # a sport's approved terms in the order they are listed in
+            models.Index(fields=['sport', 'text', 'id'], name='term_approved_in_sport_idx',
+                         condition=Q(approvedFl=True)),
+        ]
         permissions = [
             ("can_approve_term", "Can approve a term"),
             ("can_disapprove_term", "Can disapprove a term"),
         ]
 
     # Methods
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember what interlinks to the term resolved to so definitions linking to it are re-rendered when it changes
+        instance._loaded_link_target = instance.link_target()
+        return instance
+
+    def link_target(self):
+        return self.__dict__.get('sport_id'), self.__dict__.get('slug'), self.__dict__.get('text')
+
     def save(self, *args, **kwargs):
         if self.pk is None:
             value = self.text
@@ -216,7 +231,8 @@ class Term(AbstractTerm):
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
-        return reverse('term_detail', args=(self.sport.slug, self.slug))
+        from dictionary.catalogue import sport_slug
+        return reverse('term_detail', args=(sport_slug(self.sport_id) or self.sport.slug, self.slug))
 
     def get_update_url(self):
         return reverse('dictionary_term_update', args=(self.slug,))
@@ -225,6 +241,28 @@ class Term(AbstractTerm):
         return self.definitions.filter(approvedFl=True).count()
     num_approved_definitions.short_description = 'Approved Definitions'
 
+    @staticmethod
+    def definition_stats():
+        """
+        Expressions for the number of approved definitions of a term and its highest ranked approved definition, for
+        use in a queryset update or annotation of terms
+        """
+        definitions = Definition.approved_definitions.filter(term=OuterRef('pk')).order_by()
+        num_definitions = definitions.values('term').annotate(count=Count('pk')).values('count')
+        top_definition = definitions.order_by(*Definition.RANKING).values('pk')[:1]
+        return {
+            'num_definitions': Coalesce(Subquery(num_definitions), 0),
+            'top_definition': Subquery(top_definition),
+        }
+
+    @classmethod
+    def update_definition_stats(cls, term_ids):
+        """
+        Recomputes num_definitions and top_definition for the terms in a single UPDATE so concurrent changes to a
+        term's definitions can't leave the counter out of step
+        """
+        return cls.objects.filter(pk__in=term_ids).update(**cls.definition_stats())
+
 
 class SuggestedTerm(AbstractTerm):
     definitionText = models.TextField()
@@ -331,6 +369,10 @@ class Definition(models.Model):
     num_upvotes = models.IntegerField(default=0)
     num_downvotes = models.IntegerField(default=0)
     deleteFl = models.BooleanField(default=False)
+    # the text rendered to HTML with its interlinks when it is saved, see dictionary/rendering.py
+    rendered_html = models.TextField(blank=True, editable=False)
+    rendered_summary = models.TextField(blank=True, editable=False)
+    rendered_version = models.PositiveSmallIntegerField(default=0, editable=False)
 
     # Relationship Fields
     term = models.ForeignKey(
@@ -346,17 +388,52 @@ class Definition(models.Model):
     objects = models.Manager()
     approved_definitions = ApprovedDefinitionManager()
 
+    # the order definitions are listed in on a term's page, the first approved definition is the top definition
+    RANKING = ('-net_votes', '-created', 'id')
+    # only ever changed by the dictionary.votes service & the vote buffer
+    VOTE_COUNT_FIELDS = ('num_upvotes', 'num_downvotes', 'net_votes')
+
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            # a term's approved definitions in the order they are ranked in, see RANKING
+            models.Index(fields=['term', '-net_votes', '-created', 'id'], name='definition_ranking_idx',
+                         condition=Q(approvedFl=True, deleteFl=False)),
+            # the definitions on a user's profile, newest first
+            models.Index(fields=['user', '-created'], name='definition_user_created_idx'),
+        ]
         permissions = [
             ("can_approve_definition", "Can approve a definition"),
             ("can_disapprove_definition", "Can disapprove a definition"),
         ]
 
     # Methods
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the term loaded from the database so moving a definition updates the stats of both terms
+        instance._loaded_term_id = instance.__dict__.get('term_id')
+        return instance
+
     def save(self, *args, **kwargs):
-        self.net_votes = self.num_upvotes - self.num_downvotes
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding:
+            self.net_votes = self.num_upvotes - self.num_downvotes
+        elif update_fields is None:
+            # the vote counters are changed in the database by the dictionary.votes service, so saving an instance
+            # loaded before a vote mustn't write its counts back
+            update_fields = kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                                       if not field.primary_key and field.name not in self.VOTE_COUNT_FIELDS]
+        if update_fields is None or 'text' in update_fields:
+            from dictionary import rendering
+            rendering.render_definition(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *rendering.RENDERED_FIELDS}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            term_ids = {self.term_id, getattr(self, '_loaded_term_id', None)} - {None}
+            Term.update_definition_stats(term_ids)
+        self._loaded_term_id = self.term_id
 
     def __str__(self):
         return f'{self.text}'
@@ -366,44 +443,32 @@ class Definition(models.Model):
         return self.net_votes > 0
 
     # Voting methods
-    # TODO: ensure any concurrency issues are sorted out
+    # votes are applied by the dictionary.votes service which updates the counters atomically in the database, these
+    # methods also refresh the counters held by this instance
     def upvote(self, user):
+        from dictionary import votes
         try:
-            if self.votes.filter(user=user).filter(vote_type=Vote.DOWNVOTE).exists():
-                self.delete_downvote(user=user)
-            self.votes.create(user=user, definition=self, vote_type=Vote.UPVOTE)
-            self.num_upvotes += 1
-            self.save()
-        except IntegrityError:
+            self._set_vote_counts(votes.cast_vote(self.pk, user.pk, Vote.UPVOTE))
+        except votes.AlreadyVoted:
             return 'already_voted'
 
     def delete_upvote(self, user):
-        try:
-            v = self.votes.get(user=user, definition=self, vote_type=Vote.UPVOTE)
-            self.num_upvotes -= 1
-            self.save()
-            v.delete()
-        except IntegrityError:
-            return 'error'
+        from dictionary import votes
+        self._set_vote_counts(votes.retract_vote(self.pk, user.pk, Vote.UPVOTE))
 
     def downvote(self, user):
+        from dictionary import votes
         try:
-            if self.votes.filter(user=user).filter(vote_type=Vote.UPVOTE).exists():
-                self.delete_upvote(user=user)
-            self.votes.create(user=user, definition=self, vote_type=Vote.DOWNVOTE)
-            self.num_downvotes += 1
-            self.save()
-        except IntegrityError:
+            self._set_vote_counts(votes.cast_vote(self.pk, user.pk, Vote.DOWNVOTE))
+        except votes.AlreadyVoted:
             return 'already_voted'
 
     def delete_downvote(self, user):
-        try:
-            v = self.votes.get(user=user, definition=self, vote_type=Vote.DOWNVOTE)
-            self.num_downvotes -= 1
-            self.save()
-            v.delete()
-        except IntegrityError:
-            return 'error'
+        from dictionary import votes
+        self._set_vote_counts(votes.retract_vote(self.pk, user.pk, Vote.DOWNVOTE))
+
+    def _set_vote_counts(self, vote_counts):
+        self.num_upvotes, self.num_downvotes, self.net_votes = vote_counts
 # endregion
 
 
@@ -436,6 +501,10 @@ class Vote(models.Model):
             models.UniqueConstraint(fields=['user', 'definition'],
                                     name='unique_vote_by_user_for_definition'),
         ]
+        indexes = [
+            # a user's upvotes & downvotes on their profile, newest first
+            models.Index(fields=['user', 'vote_type', '-created'], name='vote_user_type_created_idx'),
+        ]
 
     # Methods
     def __str__(self):
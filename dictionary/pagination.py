@@ -0,0 +1,281 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q, QuerySet
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from dictionary import dependencies
+
+
+# region Cursor pagination
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """
+    A page of results from a CursorPaginator. Unlike a Django Page it has no number and doesn't know how many pages
+    there are, only whether there are pages before & after it and the cursors to fetch them.
+    """
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(CursorPaginator.NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(CursorPaginator.PREVIOUS, self.object_list[0])
+
+
+class CursorPaginator:
+    """
+    Keyset paginator, each page is fetched by filtering for the rows which sort after (or before) the last (or first)
+    row of the page the user came from rather than with an OFFSET, so fetching a page costs the same however deep it
+    is and no COUNT(*) is needed.
+
+    ordering has to be a total ordering (i.e. end with a unique field) of non-null model fields, a leading '-' sorts
+    the field in descending order. Cursors are opaque url safe tokens holding the values of those fields.
+    """
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, object_list, ordering, per_page):
+        self.object_list = object_list
+        self.ordering = list(ordering)
+        self.per_page = int(per_page)
+        self.fields = [self.object_list.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+    def page(self, cursor=None):
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        else:
+            direction, values = self.NEXT, None
+
+        ordering = self.ordering
+        if direction == self.PREVIOUS:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == self.PREVIOUS:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True, has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more, has_previous=values is not None)
+
+    def _after(self, ordering, values):
+        """
+        Q matching the rows which sort after values, i.e. (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        """
+        condition = Q()
+        for i, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            equal = {field.name: value for field, value in zip(self.fields[:i], values[:i])}
+            condition |= Q(**equal, **{f'{self.fields[i].name}__{lookup}': values[i]})
+        return condition
+
+    def encode_cursor(self, direction, obj):
+        values = [field.value_from_object(obj) for field in self.fields]
+        # dates & datetimes are encoded in full, DjangoJSONEncoder would round datetimes to milliseconds
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        data = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor + padding).decode())
+            if direction not in (self.NEXT, self.PREVIOUS) or len(values) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (binascii.Error, TypeError, ValueError, ValidationError) as e:
+            raise InvalidCursor('Invalid cursor') from e
+        return direction, values
+
+
+class CursorPaginationMixin:
+    """
+    Mixin for list views which switches them from the OFFSET based Django paginator to the CursorPaginator, ordered by
+    cursor_ordering, when CURSOR_PAGINATION is turned on in the settings
+    """
+    cursor_ordering = None
+    cursor_kwarg = 'cursor'
+
+    def uses_cursor_pagination(self):
+        return settings.CURSOR_PAGINATION and self.cursor_ordering is not None
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.uses_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, self.cursor_ordering, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return paginator, page, page.object_list, page.has_other_pages()
+# endregion
+
+
+# region Cached counts
+class UncountedPage(Page):
+    """
+    A page of a list whose count was capped, which knows whether there's a page after it from the rows fetched with it
+    rather than from the number of pages
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator which keeps the total count of the object list in the cache under cache_key so the COUNT(*) query is
+    only run when the count isn't cached, rather than on every page.
+
+    With a count_limit at most count_limit + 1 rows are counted, the count is then capped at count_limit and
+    count_capped is True so the total can be shown as e.g. "1000+". The pages past the capped count can still be
+    fetched, each one tells whether there's another after it.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, cache_key=None,
+                 cache_timeout=None, count_limit=None):
+        super().__init__(object_list, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page)
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+        self.count_limit = count_limit
+
+    @cached_property
+    def _counted(self):
+        if self.cache_key is not None:
+            counted = cache.get(self.cache_key)
+            if counted is not None:
+                return counted
+
+        object_list = self.object_list
+        if isinstance(object_list, QuerySet) and \
+                not any(annotation.contains_aggregate for annotation in object_list.query.annotations.values()):
+            # annotations like the definition counts don't change the number of rows, but counting a queryset with any
+            # makes Django count a subquery grouped by the primary key which SQLite answers with a full scan
+            object_list = object_list.values('pk')
+        if self.count_limit is not None:
+            object_list = object_list.order_by()[:self.count_limit + 1]
+        counted = object_list.count()
+
+        if self.cache_key is not None:
+            cache.set(self.cache_key, counted, self.cache_timeout)
+        return counted
+
+    @cached_property
+    def count(self):
+        if self.count_limit is not None:
+            return min(self._counted, self.count_limit)
+        return self._counted
+
+    @property
+    def count_capped(self):
+        return self.count_limit is not None and self._counted > self.count_limit
+
+    def validate_number(self, number):
+        if not self.count_capped:
+            return super().validate_number(number)
+        # the number of pages isn't known, a page past the last one is found to be empty when it's fetched
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        if not self.count_capped:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # one more row than fits on the page tells whether there's a page after it
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return UncountedPage(object_list[:self.per_page], number, self, has_next=len(object_list) > self.per_page)
+
+
+class CachedCountMixin:
+    """
+    Mixin for list views which paginates with the CachedCountPaginator. Views return the parts identifying the list
+    from get_count_cache_key_parts, or None to not cache the count, and the dependencies the count has to be recounted
+    after from get_cache_dependencies.
+    """
+    paginator_class = CachedCountPaginator
+    count_limit = None
+    count_cache_timeout = settings.LIST_COUNT_CACHE_TIMEOUT
+
+    def get_count_cache_key_parts(self):
+        return None
+
+    def get_cache_dependencies(self):
+        return []
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        parts = self.get_count_cache_key_parts()
+        if parts is not None:
+            cache_key = dependencies.cache_key('dictionary-count', self.get_cache_dependencies(), *parts)
+        else:
+            cache_key = None
+        return super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+            cache_key=cache_key,
+            cache_timeout=self.count_cache_timeout, count_limit=self.count_limit, **kwargs)
+# endregion
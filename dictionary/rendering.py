@@ -0,0 +1,144 @@
+import concurrent.futures
+import logging
+import threading
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.template.defaultfilters import linebreaks_filter, truncatewords_html
+from django.utils import timezone
+
+from dictionary import dependencies
+from dictionary.catalogue import sport_slug as get_sport_slug
+from dictionary.interlinks import interlink_keys, prefetch_interlinks, render_interlinks, resolve_interlinks
+from dictionary.models import Definition
+
+# stored with each rendered definition, bump it when the rendered HTML changes so renderdefinitions re-renders them all,
+# definitions with any other version are rendered when they are displayed until then
+RENDER_VERSION = 1
+# definitions are shown cut down to this many words in the profile tabs
+SUMMARY_WORDS = 20
+RENDERED_FIELDS = ['rendered_html', 'rendered_summary', 'rendered_version']
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render(text, sport_slug, resolved):
+    """
+    Returns the HTML of a definition's text shown on its term's page & the summary of it shown in the profile tabs
+    """
+    html = render_interlinks(text, sport_slug, resolved)
+    return linebreaks_filter(html), truncatewords_html(html, SUMMARY_WORDS)
+
+
+def render_definition(definition, resolved=None):
+    """
+    Renders a definition's text into its rendered fields, resolved is looked up with one query when not given
+    """
+    sport_slug = get_sport_slug(definition.term.sport_id)
+    if resolved is None:
+        resolved = resolve_interlinks(interlink_keys(definition.text, sport_slug))
+    definition.rendered_html, definition.rendered_summary = render(definition.text, sport_slug, resolved)
+    definition.rendered_version = RENDER_VERSION
+
+
+def is_rendered(definition):
+    return definition.rendered_version == RENDER_VERSION
+
+
+def prefetch_for_display(definitions):
+    """
+    Resolves the interlinks of the definitions which have to be rendered as they are displayed, in one query if there
+    are any. The definitions' terms should be select_related.
+    """
+    prefetch_interlinks([definition for definition in definitions if not is_rendered(definition)])
+
+
+def rerender_definitions(definition_ids):
+    """
+    Renders the definitions & stores their rendered fields, along with a new last_updated as the cached definition cards
+    are keyed on it, and bumps their terms so their pages are rendered again. A definition edited since it was read
+    isn't overwritten as its save has already rendered it. Returns the number of definitions rendered.
+    """
+    definitions = list(Definition.objects.filter(id__in=definition_ids).select_related('term'))
+    prefetch_interlinks(definitions)
+    for definition in definitions:
+        render_definition(definition, definition.resolved_interlinks)
+
+    num_rendered = 0
+    rendered_term_ids = set()
+    now = timezone.now()
+    with transaction.atomic():
+        for definition in definitions:
+            if Definition.objects.filter(pk=definition.pk, text=definition.text)\
+                    .update(last_updated=now, **{field: getattr(definition, field) for field in RENDERED_FIELDS}):
+                num_rendered += 1
+                rendered_term_ids.add(definition.term_id)
+        # update() sends no signals
+        dependencies.bump(*map(dependencies.term_dependency, rendered_term_ids))
+    return num_rendered
+
+
+def definitions_linking_to(keys):
+    """
+    Returns the ids of the definitions with an interlink to any of the (sport slug, term slug) keys
+    """
+    keys = set(keys)
+    if not keys:
+        return []
+
+    # narrow the definitions down in the database before parsing their interlinks
+    candidates = Definition.objects.filter(text__contains='[[')\
+        .filter(reduce(or_, (Q(text__contains=term_slug) for _, term_slug in keys)))\
+        .values_list('id', 'text', 'term__sport_id')
+    return [definition_id for definition_id, text, sport_id in candidates
+            if interlink_keys(text, get_sport_slug(sport_id)) & keys]
+
+
+def links_changed(keys):
+    """
+    Renders the definitions with an interlink to any of the (sport slug, term slug) keys again. Finding them scans the
+    definitions so it's done by a background thread once the transaction commits rather than during the request.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    if settings.DEFINITION_RENDER_IN_BACKGROUND:
+        transaction.on_commit(lambda: get_executor().submit(_in_background, rerender_definitions_linking_to, keys))
+    else:
+        rerender_definitions_linking_to(keys)
+
+
+def rerender_definitions_linking_to(keys):
+    """
+    Renders the definitions with an interlink to any of the keys again. Returns the number of definitions rendered.
+    """
+    definition_ids = definitions_linking_to(keys)
+    if not definition_ids:
+        return 0
+    return rerender_definitions(definition_ids)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='render-definitions')
+        return _executor
+
+
+def _in_background(func, *args):
+    # nothing waits on the future, so a failure would otherwise go unnoticed
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Rendering definitions in the background failed')
+    finally:
+        # the connections opened by this thread aren't closed at the end of a request
+        connections.close_all()
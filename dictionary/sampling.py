@@ -0,0 +1,88 @@
+import random
+from array import array
+
+from dictionary.indexes import InMemoryTermIndex
+
+
+class TermSampler(InMemoryTermIndex):
+    """
+    A dense array of the ids of the approved terms for picking random terms in constant time rather than with a COUNT
+    and an OFFSET scan. Terms are removed by moving the last id into their slot so the array never has gaps.
+    """
+    version_cache_key = 'dictionary-term-sampler-version'
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.term_ids = array('i')
+        self.positions = {}
+
+    def add_term(self, term_id, text, sport_slug, slug):
+        if term_id in self.positions:
+            return
+        self.positions[term_id] = len(self.term_ids)
+        self.term_ids.append(term_id)
+
+    def remove_term(self, term_id):
+        position = self.positions.pop(term_id, None)
+        if position is None:
+            return
+        last_id = self.term_ids.pop()
+        if last_id != term_id:
+            self.term_ids[position] = last_id
+            self.positions[last_id] = position
+
+    def __len__(self):
+        return len(self.term_ids)
+
+    def random_id(self, rng=random):
+        """
+        Returns the id of a random approved term or None if there are none
+        """
+        with self._lock:
+            if not self.term_ids:
+                return None
+            return self.term_ids[rng.randrange(len(self.term_ids))]
+
+    def sample_ids(self, k, exclude=(), rng=random):
+        """
+        Returns the ids of up to k distinct random approved terms which aren't in exclude, fewer than k if there
+        aren't enough terms
+        """
+        exclude = set(exclude)
+        with self._lock:
+            num_terms = len(self.term_ids)
+            num_available = num_terms - sum(1 for term_id in exclude if term_id in self.positions)
+            if k >= num_available:
+                term_ids = [term_id for term_id in self.term_ids if term_id not in exclude]
+                rng.shuffle(term_ids)
+                return term_ids
+
+            if num_available * 2 < num_terms:
+                # most of the terms are excluded so pick from the rest
+                return rng.sample([term_id for term_id in self.term_ids if term_id not in exclude], k)
+
+            # otherwise picking random slots & skipping excluded or already picked terms takes O(k) picks on average
+            picked = []
+            seen = set(exclude)
+            while len(picked) < k:
+                term_id = self.term_ids[rng.randrange(num_terms)]
+                if term_id not in seen:
+                    seen.add(term_id)
+                    picked.append(term_id)
+            return picked
+
+
+term_sampler = TermSampler()
+
+
+def random_term_id():
+    term_sampler.ensure_built()
+    return term_sampler.random_id()
+
+
+def sample_term_ids(k, exclude=()):
+    term_sampler.ensure_built()
+    return term_sampler.sample_ids(k, exclude=exclude)
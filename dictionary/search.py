@@ -0,0 +1,152 @@
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from dictionary.models import Term, Definition
+
+FTS_TABLE = 'dictionary_term_fts'
+
+FTS_TABLE_DDL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+    'text, definitions, tokenize = "unicode61 remove_diacritics 2", prefix = \'2 3\')'
+)
+
+# relative weight of a match in the term text vs a match in its definitions when ranking with bm25
+TEXT_WEIGHT = 10.0
+DEFINITIONS_WEIGHT = 1.0
+
+FTS_RANK_CONFIG = (
+    f"INSERT INTO {{table}} ({{table}}, rank) VALUES ('rank', 'bm25({TEXT_WEIGHT}, {DEFINITIONS_WEIGHT})')"
+)
+
+token_re = re.compile(r'\w+')
+
+_fts5_supported = None
+
+
+def is_available():
+    """
+    Returns True if full-text search can be used on the default database, i.e. it is SQLite compiled with FTS5
+    and full-text search hasn't been switched off in the settings.
+    """
+    global _fts5_supported
+
+    if not settings.SEARCH_FULL_TEXT_ENABLED or connection.vendor != 'sqlite':
+        return False
+
+    if _fts5_supported is None:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT sqlite_compileoption_used(%s)', ['ENABLE_FTS5'])
+            _fts5_supported = bool(cursor.fetchone()[0])
+    return _fts5_supported
+
+
+def build_match_query(search_key):
+    """
+    Converts free text entered by a user into an FTS5 query where every word has to prefix match. Each word is
+    quoted so characters with a special meaning in the FTS5 query syntax can't be injected.
+    """
+    tokens = token_re.findall((search_key or '').lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_terms(queryset, search_key):
+    """
+    Filters a Term queryset down to the terms matching search_key, ordered by bm25 relevance (best match first).
+    Falls back to the old icontains lookup when full-text search isn't available.
+    """
+    match_query = build_match_query(search_key)
+    if not match_query or not is_available():
+        return queryset.filter(text__icontains=search_key or '')
+
+    # the index is joined in, rather than referenced from subqueries, as a second reference to the virtual table in
+    # the same statement has been seen to drop rows that are pending in a transaction. Results are ordered by the rank
+    # column (configured as a weighted bm25 in ensure_index) which is kept out of the select list as it can't be read
+    # once the query is wrapped or grouped, e.g. by the paginator's count
+    term_table = Term._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {term_table}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match_query],
+        order_by=[f'{FTS_TABLE}.rank', 'text', 'id'],
+    )
+
+
+# region Index maintenance
+def ensure_index():
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(FTS_TABLE_DDL.format(table=FTS_TABLE))
+        cursor.execute(FTS_RANK_CONFIG.format(table=FTS_TABLE))
+
+
+def _definitions_text_by_term(term_ids):
+    definitions_text = {}
+    if not settings.SEARCH_INDEX_DEFINITIONS:
+        return definitions_text
+
+    definitions = Definition.approved_definitions.filter(term_id__in=term_ids)\
+        .order_by().values_list('term_id', 'text', 'example_usage')
+    for term_id, text, example_usage in definitions:
+        parts = definitions_text.setdefault(term_id, [])
+        parts.append(text)
+        if example_usage:
+            parts.append(example_usage)
+    return {term_id: '\n'.join(parts) for term_id, parts in definitions_text.items()}
+
+
+def index_term(term_id):
+    """
+    (Re)indexes a single term along with the text of its approved definitions
+    """
+    if not is_available():
+        return
+
+    term_text = Term.objects.filter(pk=term_id).values_list('text', flat=True).first()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [term_id])
+        if term_text is not None:
+            definitions_text = _definitions_text_by_term([term_id]).get(term_id, '')
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, text, definitions) VALUES (%s, %s, %s)',
+                           [term_id, term_text, definitions_text])
+
+
+def remove_term(term_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [term_id])
+
+
+def rebuild_index(batch_size=2000):
+    """
+    Repopulates the full-text index from scratch from the term & definition tables. Returns the number of terms
+    indexed.
+    """
+    if not is_available():
+        return 0
+
+    num_indexed = 0
+    ensure_index()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+        terms = Term.objects.order_by('id').values_list('id', 'text')
+        last_id = 0
+        while True:
+            batch = list(terms.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            definitions_text = _definitions_text_by_term([term_id for term_id, _ in batch])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, definitions) VALUES (%s, %s, %s)',
+                [(term_id, text, definitions_text.get(term_id, '')) for term_id, text in batch]
+            )
+            num_indexed += len(batch)
+            last_id = batch[-1][0]
+
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return num_indexed
+# endregion
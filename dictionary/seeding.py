@@ -0,0 +1,612 @@
+import datetime
+import functools
+import itertools
+import multiprocessing
+import random
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.template.defaultfilters import slugify
+from faker import Faker
+
+from accounts.models import Profile
+from dictionary import dependencies, rendering, search
+from dictionary.benchmarking import expand_corpus, load_terms_corpus
+from dictionary.catalogue import sports_catalogue
+from dictionary.interlinks import interlink_keys, resolve_interlinks
+from dictionary.models import Sport, Category, Term, Definition, Vote, TermOfTheDay
+from dictionary.sampling import term_sampler
+from dictionary.signals import in_memory_term_indexes
+
+# the worker processes are forked so they inherit the configured Django, e.g. the test database, rather than set it up
+# again, where processes can't be forked (e.g. on Windows) everything is generated in this process
+CAN_FORK = 'fork' in multiprocessing.get_all_start_methods()
+SPORT_EMOJIS = ('🤺 🏇 ⛷️ 🏂 🏌️‍♂️ 🏌️‍♀️ 🏄‍♂️ 🏄‍♀️ 🚣‍♂️ 🚣‍♀️ 🏊‍♂️ 🏊‍♀️ ⛹️‍♂️ ⛹️‍♀️ 🏋️‍♂️ '
+                '🏋️‍♀️ 🚴‍♂️ 🚴‍♀️ 🚵‍♂️ 🚵‍♀️ 🏎️ 🏍️ 🤸 🤸‍♂️ 🤸‍♀️ 🤼 🤼‍♂️ 🤼‍♀️ 🤽 🤽‍♂️ 🤽‍♀️ 🤾 '
+                '🤾‍♂️ 🤾‍♀️ 🤹 🤹‍♂️ 🤹‍♀️ 🎖️ 🏆 🏅 🥇 🥈 🥉 ⚽ ⚾ 🏀 🏐 🏈 🏉 🎾 🎳 🏏 🏑 🏒 🏓 🏸 🥊 '
+                '🥋 🥅 ⛸️ 🎣 🎿 🛷 🥌 🎯 🎱 🧗‍♂️ 🧗‍♀️').split(' ')
+# the password of every seeded user
+SEED_PASSWORD = 'wy3MW5'
+# random values are drawn this many times before a number is added to make them unique
+MAX_UNIQUE_ATTEMPTS = 10
+
+
+def make_unique(value, seen, number=lambda value, n: f'{value} {n}'):
+    """
+    Numbers value if it's already in seen, and adds it to seen
+    """
+    base, n = value, 2
+    while value in seen:
+        value = number(base, n)
+        n += 1
+    seen.add(value)
+    return value
+
+
+def unique_value(make, seen, number=lambda value, n: f'{value} {n}'):
+    """
+    Calls make until it returns a value which isn't in seen, numbering the last value drawn if none of
+    MAX_UNIQUE_ATTEMPTS are, and adds the value to seen
+    """
+    for _ in range(MAX_UNIQUE_ATTEMPTS):
+        value = make()
+        if value not in seen:
+            break
+    return make_unique(value, seen, number)
+
+
+def unique_slug(value, seen):
+    return make_unique(slugify(value), seen, number=lambda slug, n: f'{slug}-{n}')
+
+
+# region Generation
+# the functions generating the rows run in the worker processes, they only return plain values & never use the
+# database. Users & categories are referred to by their index in the lists of ids held by the writer. Each row is
+# generated from its own seed so the rows don't depend on how they're split into batches or over the workers.
+_fake = None
+
+
+def row_random(seed, index):
+    """
+    Returns a random.Random & a Faker seeded for the row at index, Faker is slow to create so each process reuses one
+    """
+    global _fake
+    if _fake is None:
+        _fake = Faker()
+    row_seed = f'{seed}-{index}'
+    _fake.seed_instance(row_seed)
+    return random.Random(row_seed), _fake
+
+
+def generate_users(seed, start, num_users):
+    """
+    Returns the (first name, last name) of num_users fake users from the start'th
+    """
+    users = []
+    for index in range(start, start + num_users):
+        rng, fake = row_random(seed, index)
+        users.append((fake.first_name(), fake.last_name()))
+    return users
+
+
+def generate_terms(seed, start, num_terms, sport_slug, num_categories, num_users, max_num_definitions,
+                   max_num_votes):
+    """
+    Returns num_terms fake terms of a sport from the start'th as (text, category indexes, definitions) with between 1
+    and max_num_definitions definitions each, as (text, rendered HTML, rendered summary, author index, votes), voted on
+    by between 0 and max_num_votes users each as (voter index, vote type). Definitions with interlinks are left for the
+    writer to render, as the terms they link to have to be looked up.
+    """
+    terms = []
+    for index in range(start, start + num_terms):
+        rng, fake = row_random(seed, index)
+        text = ' '.join(fake.words(nb=rng.randint(3, 5)))
+        definitions = []
+        for _ in range(rng.randint(1, max(max_num_definitions, 1)) if num_users else 0):
+            definition_text = ' '.join(fake.sentences(nb=rng.randint(1, 3)))
+            if interlink_keys(definition_text, sport_slug):
+                rendered_html, rendered_summary = None, None
+            else:
+                rendered_html, rendered_summary = rendering.render(definition_text, sport_slug, {})
+            author = rng.randrange(num_users)
+            definitions.append((definition_text, rendered_html, rendered_summary, author,
+                                pick_voters(rng, num_users, author, max_num_votes)))
+        terms.append((text, pick_categories(rng, num_categories), definitions))
+    return terms
+
+
+def pick_categories(rng, num_categories):
+    """
+    Returns the indexes of one or two of the categories of a sport
+    """
+    if not num_categories:
+        return []
+    return rng.sample(range(num_categories), 2 if num_categories > 1 and rng.random() < 0.5 else 1)
+
+
+def pick_voters(rng, num_users, author, max_num_votes):
+    """
+    Returns (voter index, vote type) of up to max_num_votes users other than the author
+    """
+    num_votes = rng.randint(0, max(max_num_votes, 0))
+    voters = rng.sample(range(num_users), min(num_votes + 1, num_users))
+    return [(voter, rng.choice((Vote.UPVOTE, Vote.DOWNVOTE))) for voter in voters if voter != author][:num_votes]
+# endregion
+
+
+class Stage:
+    """
+    The number of rows added by a stage of seeding & the seconds spent on it
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0
+
+    @contextmanager
+    def timed(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        if not self.rows:
+            return f'{self.name}: {self.seconds:.2f} seconds'
+        return f'{self.name}: {self.rows} rows in {self.seconds:.2f} seconds ({self.rows_per_second:.0f} rows/s)'
+
+
+class BulkSeeder:
+    """
+    Seeds the database with fake data generated in memory and inserted batch_size rows at a time with bulk_create,
+    rather than saving one row at a time. Uniqueness is checked against the values already in the database, loaded once,
+    instead of probing for each new row, and the vote counters of each definition are counted from the votes generated
+    for it.
+
+    The users & terms are generated by a pool of workers processes, which stream the batches back to this process in
+    order as it inserts them. Each row is generated from its own seed, derived from seed, so the same seed gives the
+    same rows whatever the number of workers or the batch size.
+
+    bulk_create doesn't send the model signals, so the derived data they would have kept up to date (the stored
+    definition stats, the rendered definitions, the search index, the in-memory indexes & the cache dependencies) is
+    brought up to date in bulk as well.
+    """
+
+    def __init__(self, batch_size=5000, seed=None, workers=1):
+        self.batch_size = batch_size
+        self.random_seed = random.randrange(2 ** 32) if seed is None else seed
+        self.workers = workers if CAN_FORK else 1
+        self.rng = random.Random(self.random_seed)
+        self.fake = Faker()
+        self.fake.seed_instance(self.random_seed)
+        self.stages = {}
+        self._executor = None
+
+    def stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = Stage(name)
+        return self.stages[name]
+
+    def insert(self, stage_name, objs):
+        """
+        Bulk inserts objs, all of the same model, and sets their primary keys
+        """
+        if not objs:
+            return
+        model = type(objs[0])
+        stage = self.stage(stage_name)
+        with stage.timed(), transaction.atomic():
+            last_id = model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+            # Django works out how many rows fit in each INSERT, an explicit batch_size isn't capped at the database's
+            # limits
+            model.objects.bulk_create(objs)
+            if objs[0].pk is None:
+                # SQLite doesn't return the ids of bulk inserted rows, they are the ids after the last one in the order
+                # the rows were inserted in, as nothing else can write to the database within the transaction
+                new_ids = model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)
+                for obj, pk in zip(objs, new_ids):
+                    obj.pk = pk
+        stage.rows += len(objs)
+
+    def batch_seed(self, *parts):
+        return '-'.join(map(str, (self.random_seed, *parts)))
+
+    def generate(self, func, args_list):
+        """
+        Yields func(*args) for each of args_list in order. With more than one worker they are generated in the worker
+        processes, at most two batches per worker ahead of the one being inserted so they don't pile up in memory.
+        """
+        stage = self.stage('Generating')
+        if self._executor is None:
+            for args in args_list:
+                with stage.timed():
+                    result = func(*args)
+                yield result
+            return
+
+        args_list = iter(args_list)
+        pending = deque(self._executor.submit(func, *args) for args in itertools.islice(args_list, self.workers * 2))
+        while pending:
+            # only the time spent waiting on the workers holds up the inserts
+            with stage.timed():
+                result = pending.popleft().result()
+            for args in itertools.islice(args_list, 1):
+                pending.append(self._executor.submit(func, *args))
+            yield result
+
+    def batches(self, num_entries):
+        """
+        Returns (start, size) of the batches of num_entries rows
+        """
+        return [(start, min(self.batch_size, num_entries - start)) for start in range(0, num_entries, self.batch_size)]
+
+    # region Seeding
+    @contextmanager
+    def worker_pool(self):
+        """
+        Starts the worker processes generate runs in for the duration of the block
+        """
+        if self.workers <= 1:
+            yield
+            return
+        # the workers don't use the database so they don't need connections of their own
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork')) as self._executor:
+            try:
+                yield
+            finally:
+                self._executor = None
+
+    def seed(self, num_users, num_sports, num_categories, num_terms, max_num_definitions, max_num_votes,
+             num_terms_of_the_day):
+        with self.worker_pool():
+            self.seed_users(num_users)
+            self.seed_sports(num_sports)
+            self.seed_categories(num_categories)
+            self.seed_terms(num_terms, max_num_definitions, max_num_votes)
+        self.seed_terms_of_the_day(num_terms_of_the_day)
+        self.refresh_derived_data()
+
+    def seed_users(self, num_entries):
+        """
+        Creates the test user, if it doesn't exist yet, and num_entries - 1 other users
+        """
+        seen_usernames = set(User.objects.values_list('username', flat=True))
+        seen_emails = set(User.objects.values_list('email', flat=True))
+        password = make_password(SEED_PASSWORD)
+
+        if 'testuser' not in seen_usernames:
+            seen_usernames.add('testuser')
+            test_user = User(email='testuser@sportsdictionary.com', username='testuser', password=password)
+            self.insert('Users', [test_user])
+            self.insert('Profiles', [Profile(user=test_user)])
+
+        batches = [(self.batch_seed('users'), start, size) for start, size in self.batches(num_entries - 1)]
+        for names in self.generate(generate_users, batches):
+            users = []
+            for first_name, last_name in names:
+                username = make_unique(first_name + last_name, seen_usernames, number=lambda value, n: f'{value}{n}')
+                email = make_unique(f'{first_name}.{last_name}@faker.com', seen_emails,
+                                    number=lambda value, n: value.replace('@', f'{n}@'))
+                users.append(User(first_name=first_name, last_name=last_name, email=email, username=username,
+                                  password=password))
+            self.insert('Users', users)
+            self.insert('Profiles', [Profile(user=user) for user in users])
+
+    def seed_sports(self, num_entries):
+        seen_names = set(Sport.objects.values_list('name', flat=True))
+        seen_slugs = set(Sport.objects.values_list('slug', flat=True))
+        sports = []
+        with self.stage('Generating').timed():
+            for _ in range(num_entries):
+                name = unique_value(lambda: ' '.join(self.fake.words(nb=self.rng.randint(1, 2))), seen_names)
+                sports.append(Sport(name=name, slug=unique_slug(name, seen_slugs), active=True,
+                                    emoji=self.rng.choice(SPORT_EMOJIS)))
+        self.insert('Sports', sports)
+
+    def seed_categories(self, num_entries):
+        """
+        Creates num_entries categories for each sport
+        """
+        seen = set(Category.objects.values_list('sport_id', 'name'))
+        categories = []
+        with self.stage('Generating').timed():
+            for sport_id in Sport.objects.order_by('id').values_list('id', flat=True):
+                for _ in range(num_entries):
+                    _, name = unique_value(
+                        lambda: (sport_id, ' '.join(self.fake.words(nb=self.rng.randint(1, 2)))), seen,
+                        number=lambda value, n: (value[0], f'{value[1]} {n}'))
+                    categories.append(Category(name=name, sport_id=sport_id))
+        self.insert('Categories', categories)
+
+    def seed_terms(self, num_entries, max_num_definitions, max_num_votes):
+        """
+        Creates num_entries terms for each sport, in one or two of its categories, with between 1 and
+        max_num_definitions definitions each, voted on by between 0 and max_num_votes users each
+        """
+        user_ids = list(User.objects.filter(is_staff=False).order_by('id').values_list('id', flat=True))
+        category_ids = {}
+        for sport_id, category_id in Category.objects.order_by('id').values_list('sport_id', 'id'):
+            category_ids.setdefault(sport_id, []).append(category_id)
+        seen_texts, seen_slugs = {}, {}
+        for sport_id, text, slug in Term.objects.values_list('sport_id', 'text', 'slug'):
+            seen_texts.setdefault(sport_id, set()).add(text)
+            seen_slugs.setdefault(sport_id, set()).add(slug)
+
+        sports = []
+        batches = []
+        for sport in Sport.objects.order_by('id'):
+            for start, size in self.batches(num_entries):
+                sports.append(sport)
+                batches.append((self.batch_seed('terms', sport.slug), start, size, sport.slug,
+                                len(category_ids.get(sport.id, [])), len(user_ids), max_num_definitions,
+                                max_num_votes))
+
+        for sport, generated in zip(sports, self.generate(generate_terms, batches)):
+            # terms generated from different seeds can have the same text
+            terms = [Term(text=make_unique(text, seen_texts.setdefault(sport.id, set())), approvedFl=True, sport=sport)
+                     for text, _, _ in generated]
+            for term in terms:
+                term.slug = unique_slug(term.text, seen_slugs.setdefault(sport.id, set()))
+            self.insert('Terms', terms)
+
+            self.insert('Term categories', [
+                Term.categories.through(term_id=term.pk, category_id=category_ids[sport.id][category])
+                for term, (_, categories, _) in zip(terms, generated)
+                for category in categories
+            ])
+
+            self.seed_definitions(sport, [term.pk for term in terms], [definitions for _, _, definitions in generated],
+                                  user_ids)
+
+    def seed_definitions(self, sport, term_ids, generated, user_ids):
+        """
+        Inserts the definitions generated for each of a batch of terms, with consecutive ids, & their votes
+        """
+        definitions = []
+        votes = []
+        for term_id, term_definitions in zip(term_ids, generated):
+            for text, rendered_html, rendered_summary, author, definition_votes in term_definitions:
+                definition = Definition(text=text, approvedFl=True, term_id=term_id, user_id=user_ids[author],
+                                        rendered_html=rendered_html, rendered_summary=rendered_summary,
+                                        rendered_version=rendering.RENDER_VERSION)
+                # the counters are counted from the generated votes rather than updated vote by vote
+                definition.num_upvotes = sum(1 for _, vote_type in definition_votes if vote_type == Vote.UPVOTE)
+                definition.num_downvotes = len(definition_votes) - definition.num_upvotes
+                definition.net_votes = definition.num_upvotes - definition.num_downvotes
+                definitions.append(definition)
+                votes.append(definition_votes)
+
+        unrendered = [definition for definition in definitions if definition.rendered_html is None]
+        stage = self.stage('Rendering')
+        with stage.timed():
+            keys = set()
+            for definition in unrendered:
+                keys |= interlink_keys(definition.text, sport.slug)
+            resolved = resolve_interlinks(keys)
+            for definition in unrendered:
+                definition.rendered_html, definition.rendered_summary = rendering.render(
+                    definition.text, sport.slug, resolved)
+        stage.rows += len(unrendered)
+        self.insert('Definitions', definitions)
+
+        self.insert('Votes', [Vote(definition_id=definition.pk, user_id=user_ids[voter], vote_type=vote_type)
+                              for definition, definition_votes in zip(definitions, votes)
+                              for voter, vote_type in definition_votes])
+
+        stage = self.stage('Definition stats')
+        with stage.timed():
+            Term.objects.filter(id__gte=term_ids[0], id__lte=term_ids[-1]).update(**Term.definition_stats())
+        stage.rows += len(term_ids)
+
+    def seed_terms_of_the_day(self, num_entries):
+        """
+        Makes num_entries random terms the terms of the day on the days up to today which don't have one yet
+        """
+        # the sampler doesn't know about the terms inserted without sending signals yet
+        term_sampler.invalidate()
+        term_sampler.ensure_built()
+        term_ids = term_sampler.sample_ids(num_entries, rng=self.rng)
+
+        taken_days = set(TermOfTheDay.objects.values_list('day', flat=True))
+        days = []
+        day = datetime.date.today()
+        while len(days) < len(term_ids):
+            if day not in taken_days:
+                days.append(day)
+            day -= datetime.timedelta(days=1)
+        self.insert('Terms of the day',
+                    [TermOfTheDay(day=day, term_id=term_id) for day, term_id in zip(days, term_ids)])
+
+    def refresh_derived_data(self):
+        """
+        Brings the data the model signals keep up to date in step with the rows inserted without them
+        """
+        stage = self.stage('Search index')
+        with stage.timed():
+            stage.rows += search.rebuild_index(batch_size=self.batch_size)
+
+        for index in [sports_catalogue, *in_memory_term_indexes]:
+            index.invalidate()
+        # new terms have new ids so only the lists they were added to are out of date
+        dependencies.bump(dependencies.SPORTS_LIST, dependencies.TERM_LISTS, dependencies.TOTD_LIST,
+                          *(dependencies.sport_dependency(sport.slug) for sport in Sport.objects.all()))
+    # endregion
+
+
+# region Benchmark datasets
+DatasetTier = namedtuple('DatasetTier', ['num_users', 'num_terms', 'num_categories', 'max_num_definitions',
+                                         'max_num_votes', 'num_terms_of_the_day'])
+
+# the size tiers of the benchmark dataset built by builddataset, the terms are spread over the sports in the terms
+# corpus in proportion to the number of real terms each has
+DATASET_TIERS = {
+    'small': DatasetTier(300, 3000, 3, 10, 50, 30),
+    'medium': DatasetTier(3000, 30000, 5, 20, 100, 365),
+    'large': DatasetTier(30000, 300000, 5, 30, 200, 365),
+    'xlarge': DatasetTier(100000, 1000000, 5, 30, 100, 365),
+}
+# exponents of the Zipf-like distributions the datasets are drawn from, rank k is picked 1 / k ** exponent as often as
+# rank 1: most terms have one or two definitions & a few dozens, most definitions a handful of votes & a few hundreds,
+# a few users write & vote far more than the rest & a few terms are linked to far more than the rest
+DEFINITIONS_EXPONENT = 1.8
+VOTES_EXPONENT = 1.7
+USER_ACTIVITY_EXPONENT = 1.0
+LINK_TARGET_EXPONENT = 1.0
+# the chance of a definition linking to another term of its sport, & then to one more
+LINK_PROBABILITY = 0.25
+UPVOTE_PROBABILITY = 0.7
+
+
+@functools.lru_cache(maxsize=None)
+def zipf_cum_weights(n, exponent):
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def zipf_choice(rng, n, exponent):
+    """
+    Returns an index from 0 to n - 1 drawn from a Zipf-like distribution, 0 being the most likely
+    """
+    return rng.choices(range(n), cum_weights=zipf_cum_weights(n, exponent))[0]
+
+
+def zipf_sample(rng, n, exponent, k, exclude=None):
+    """
+    Returns up to k distinct indexes other than exclude drawn with zipf_choice
+    """
+    k = min(k, n - (exclude is not None and 0 <= exclude < n))
+    chosen = {}
+    while len(chosen) < k:
+        for index in rng.choices(range(n), cum_weights=zipf_cum_weights(n, exponent), k=k - len(chosen)):
+            if index != exclude:
+                chosen[index] = None
+    return list(chosen)[:k]
+
+
+def generate_dataset_definitions(seed, start, num_terms, num_sport_terms, num_users, max_num_definitions,
+                                 max_num_votes):
+    """
+    Returns the definitions of num_terms terms of a sport from the start'th as a list per term of (text, author index,
+    indexes of the terms of the sport it links to, votes), voted on as (voter index, vote type)
+    """
+    terms = []
+    for index in range(start, start + num_terms):
+        rng, fake = row_random(seed, index)
+        definitions = []
+        for _ in range(zipf_choice(rng, max_num_definitions, DEFINITIONS_EXPONENT) + 1 if num_users else 0):
+            text = ' '.join(fake.sentences(nb=rng.randint(1, 3)))
+            links = []
+            while len(links) < 2 and rng.random() < LINK_PROBABILITY:
+                links.append(zipf_choice(rng, num_sport_terms, LINK_TARGET_EXPONENT))
+            author = zipf_choice(rng, num_users, USER_ACTIVITY_EXPONENT)
+            num_votes = zipf_choice(rng, max_num_votes + 1, VOTES_EXPONENT)
+            votes = [(voter, Vote.UPVOTE if rng.random() < UPVOTE_PROBABILITY else Vote.DOWNVOTE)
+                     for voter in zipf_sample(rng, num_users, USER_ACTIVITY_EXPONENT, num_votes, exclude=author)]
+            definitions.append((text, author, links, votes))
+        terms.append(definitions)
+    return terms
+
+
+class DatasetBuilder(BulkSeeder):
+    """
+    Builds the benchmark dataset of a DatasetTier: the sports & terms of the terms corpus, expanded with numbered
+    copies of the real terms up to the size of the tier, with definitions, votes & interlinks between the terms drawn
+    from Zipf-like distributions. The same seed always builds the same dataset.
+    """
+
+    def build(self, tier):
+        with self.worker_pool():
+            self.seed_users(tier.num_users)
+            sport_terms = self.seed_corpus_terms(tier.num_terms, tier.num_categories)
+            self.seed_dataset_definitions(sport_terms, tier.max_num_definitions, tier.max_num_votes)
+        self.seed_terms_of_the_day(tier.num_terms_of_the_day)
+        self.refresh_derived_data()
+
+    def seed_corpus_terms(self, num_entries, num_categories):
+        """
+        Creates a sport for each file of the terms corpus with num_categories categories, and num_entries terms spread
+        over them. Returns a list of (sport, [(term id, slug)]) with the real terms first.
+        """
+        corpus = load_terms_corpus()
+        seen_names = set(Sport.objects.values_list('name', flat=True))
+        seen_slugs = set(Sport.objects.values_list('slug', flat=True))
+        sports = []
+        for file_name in corpus:
+            name = make_unique(file_name.replace('_', ' ').title(), seen_names)
+            sports.append(Sport(name=name, slug=unique_slug(name, seen_slugs), active=True,
+                                emoji=self.rng.choice(SPORT_EMOJIS)))
+        self.insert('Sports', sports)
+        self.seed_categories(num_categories)
+
+        category_ids = {}
+        for sport_id, category_id in Category.objects.order_by('id').values_list('sport_id', 'id'):
+            category_ids.setdefault(sport_id, []).append(category_id)
+
+        corpus_size = sum(len(texts) for texts in corpus.values())
+        sport_terms = []
+        num_added = 0
+        for i, (sport, texts) in enumerate(zip(sports, corpus.values())):
+            if i == len(sports) - 1:
+                size = num_entries - num_added
+            else:
+                size = round(num_entries * len(texts) / corpus_size)
+            num_added += size
+
+            expanded = expand_corpus(texts, size)
+            sport_category_ids = category_ids.get(sport.id, [])
+            seen_texts, seen_term_slugs = set(), set()
+            terms = []
+            for start in range(0, size, self.batch_size):
+                with self.stage('Generating').timed():
+                    batch = []
+                    for text in expanded[start:start + self.batch_size]:
+                        text = make_unique(text, seen_texts)
+                        batch.append(Term(text=text, slug=unique_slug(text, seen_term_slugs), approvedFl=True,
+                                          sport=sport))
+                self.insert('Terms', batch)
+                self.insert('Term categories', [
+                    Term.categories.through(term_id=term.pk, category_id=sport_category_ids[category])
+                    for term in batch
+                    for category in pick_categories(self.rng, len(sport_category_ids))
+                ])
+                terms.extend((term.pk, term.slug) for term in batch)
+            sport_terms.append((sport, terms))
+        return sport_terms
+
+    def seed_dataset_definitions(self, sport_terms, max_num_definitions, max_num_votes):
+        user_ids = list(User.objects.filter(is_staff=False).order_by('id').values_list('id', flat=True))
+        batches = []
+        batch_terms = []
+        for sport, terms in sport_terms:
+            for start, size in self.batches(len(terms)):
+                batch_terms.append((sport, terms, start, size))
+                batches.append((self.batch_seed('definitions', sport.slug), start, size, len(terms), len(user_ids),
+                                max_num_definitions, max_num_votes))
+
+        for (sport, terms, start, size), generated in zip(batch_terms, self.generate(generate_dataset_definitions,
+                                                                                     batches)):
+            definitions = []
+            for i, term_definitions in enumerate(generated, start):
+                definitions.append([
+                    (self.link_text(text, [terms[link][1] for link in links if link != i]), None, None, author, votes)
+                    for text, author, links, votes in term_definitions
+                ])
+            self.seed_definitions(sport, [term_id for term_id, _ in terms[start:start + size]], definitions, user_ids)
+
+    @staticmethod
+    def link_text(text, slugs):
+        if not slugs:
+            return text
+        return f'{text} See also {" ".join(f"[[{slug}]]" for slug in slugs)}'
+# endregion
@@ -0,0 +1,156 @@
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
+from django.dispatch import receiver
+
+from dictionary import dependencies, rendering, search
+from dictionary.autocomplete import prefix_index
+from dictionary.catalogue import sport_slug, sports_catalogue
+from dictionary.sampling import term_sampler
+from dictionary.suggestions import trigram_index
+from dictionary.models import Category, Sport, Term, Definition, TermOfTheDay
+
+
+# region Definition stats
+@receiver(post_delete, sender=Definition)
+def update_definition_stats_for_deleted_definition(sender, instance, **kwargs):
+    # saves are handled in Definition.save so the stats are updated in the same transaction as the definition
+    Term.update_definition_stats([instance.term_id])
+# endregion
+
+
+# region Cache dependencies
+# registered before the definition rendering handlers as they reset the target a term was loaded with
+def term_list_dependencies(*sport_ids):
+    sport_slugs = filter(None, map(sport_slug, sport_ids))
+    return [dependencies.TERM_LISTS, dependencies.TOTD_LIST, *map(dependencies.sport_dependency, sport_slugs)]
+
+
+@receiver(post_save, sender=Sport)
+@receiver(post_delete, sender=Sport)
+def bump_sport_dependencies(sender, instance, **kwargs):
+    dependencies.bump(dependencies.sport_dependency(instance.slug), dependencies.SPORTS_LIST, dependencies.TERM_LISTS,
+                      dependencies.TOTD_LIST)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_dependencies(sender, instance, **kwargs):
+    # the categories of terms are listed with them
+    dependencies.bump(dependencies.SPORTS_LIST, *term_list_dependencies(instance.sport_id))
+
+
+@receiver(post_save, sender=Term)
+@receiver(post_delete, sender=Term)
+def bump_term_dependencies(sender, instance, **kwargs):
+    # a term moved to another sport leaves the list of the sport it was loaded with
+    loaded = getattr(instance, '_loaded_link_target', None)
+    sport_ids = {instance.sport_id, loaded and loaded[0]} - {None}
+    dependencies.bump(dependencies.term_dependency(instance.pk), *term_list_dependencies(*sport_ids))
+
+
+@receiver(m2m_changed, sender=Term.categories.through)
+def bump_term_category_dependencies(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # instance is a category when the terms of a category are changed, pk_set is None when they are cleared
+    term_ids = (pk_set or ()) if reverse else [instance.pk]
+    dependencies.bump(*map(dependencies.term_dependency, term_ids), *term_list_dependencies(instance.sport_id))
+
+
+@receiver(post_save, sender=Definition)
+@receiver(post_delete, sender=Definition)
+def bump_definition_dependencies(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # the definitions are counted in every list of terms & can change which terms a search matches
+    dependencies.bump(dependencies.term_dependency(instance.term_id), *term_list_dependencies(instance.term.sport_id))
+
+
+# votes aren't handled here, the vote rows & the counters shown on the pages are changed together by votes.py &
+# votebuffer.py, which bump the terms of the definitions themselves
+
+
+@receiver(post_save, sender=TermOfTheDay)
+@receiver(post_delete, sender=TermOfTheDay)
+def bump_term_of_the_day_dependencies(sender, **kwargs):
+    dependencies.bump(dependencies.TOTD_LIST)
+# endregion
+
+
+# region Definition rendering
+@receiver(post_save, sender=Term)
+def rerender_definitions_linking_to_saved_term(sender, instance, created, raw=False, **kwargs):
+    # interlinks to a term resolve to its sport & slug and default to its text, so only changes to those matter
+    loaded = getattr(instance, '_loaded_link_target', None)
+    target = instance.link_target()
+    instance._loaded_link_target = target
+    if raw or (not created and loaded == target):
+        return
+
+    targets = {target, loaded} - {None}
+    sport_slugs = dict(Sport.objects.filter(id__in={sport_id for sport_id, _, _ in targets}).values_list('id', 'slug'))
+    rendering.links_changed({(sport_slugs[sport_id], slug) for sport_id, slug, _ in targets if sport_id in sport_slugs})
+
+
+@receiver(post_delete, sender=Term)
+def rerender_definitions_linking_to_deleted_term(sender, instance, **kwargs):
+    sport_slug = Sport.objects.filter(id=instance.sport_id).values_list('slug', flat=True).first()
+    if sport_slug:
+        rendering.links_changed({(sport_slug, instance.slug)})
+# endregion
+
+
+# region Search index
+@receiver(post_migrate)
+def create_search_index(sender, **kwargs):
+    if sender.name == 'dictionary':
+        search.ensure_index()
+
+
+@receiver(post_save, sender=Term)
+def index_saved_term(sender, instance, raw=False, **kwargs):
+    # fixtures are loaded with raw=True so related rows may not exist yet, run rebuildsearchindex after loaddata
+    if not raw:
+        search.index_term(instance.pk)
+
+
+@receiver(post_delete, sender=Term)
+def unindex_deleted_term(sender, instance, **kwargs):
+    search.remove_term(instance.pk)
+
+
+@receiver(post_save, sender=Definition)
+@receiver(post_delete, sender=Definition)
+def reindex_definition_term(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_term(instance.term_id)
+# endregion
+
+
+# region In-memory term indexes
+in_memory_term_indexes = [trigram_index, prefix_index, term_sampler]
+
+
+@receiver(post_save, sender=Term)
+def update_in_memory_indexes_for_saved_term(sender, instance, raw=False, **kwargs):
+    for index in in_memory_term_indexes:
+        if raw:
+            index.invalidate()
+        else:
+            index.term_saved(instance)
+
+
+@receiver(post_delete, sender=Term)
+def update_in_memory_indexes_for_deleted_term(sender, instance, **kwargs):
+    for index in in_memory_term_indexes:
+        index.term_deleted(instance.pk)
+# endregion
+
+
+# region Sports catalogue
+@receiver(post_save, sender=Sport)
+@receiver(post_delete, sender=Sport)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_sports_catalogue(sender, **kwargs):
+    sports_catalogue.invalidate()
+# endregion
@@ -0,0 +1,35 @@
+function autocompleteSearch() {
+    var input = $(this);
+    var term = input.val();
+    var datalist = $('#' + input.attr('list'));
+
+    if (term.length < 2) {
+        datalist.empty();
+        return;
+    }
+
+    $.ajax({
+			type: 'GET',
+			url: input.data('autocomplete-url'),
+			dataType: 'json',
+			data : {
+				'term' : term
+			},
+			success: function(response){
+				// ignore responses for what the user has since typed over
+				if (input.val() !== term) {
+					return;
+				}
+				datalist.empty();
+				$.each(response.results, function(i, result) {
+					datalist.append($('<option>').attr('value', result.text));
+				});
+			},
+    });
+}
+
+
+// Connecting Handlers
+$(function() {
+    $('input[data-autocomplete-url]').on('input', autocompleteSearch);
+});
@@ -0,0 +1,137 @@
+import re
+from array import array
+
+from dictionary.indexes import InMemoryTermIndex
+
+# minimum similarity (shared trigrams / total distinct trigrams of both words) for a word to be suggested
+SIMILARITY_THRESHOLD = 0.3
+
+word_re = re.compile(r'[^\W_]+')
+
+
+def words(text):
+    return word_re.findall(text.lower())
+
+
+def trigrams(word):
+    """
+    Returns the set of trigrams of a word, like PostgreSQL's pg_trgm the word is padded with two spaces in front and
+    one behind so the start of a word counts for more than its middle
+    """
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex(InMemoryTermIndex):
+    """
+    An inverted index from trigram to the words used in term texts.
+
+    Misspellings are corrected a word at a time against the vocabulary of the terms rather than against whole terms,
+    the vocabulary grows far slower than the number of terms so looking up the similar words stays cheap however
+    many terms there are.
+    """
+    version_cache_key = 'dictionary-trigram-index-version'
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        # a word no longer used by any term is kept with a term count of 0 rather than being deleted so the word
+        # numbers held in the postings stay valid
+        self.words = []
+        self.word_term_counts = array('i')
+        self.word_num_trigrams = array('H')
+        self.word_numbers = {}
+        self.term_words = {}
+        self.postings = {}
+
+    def add_term(self, term_id, text, sport_slug, slug):
+        term_words = set(words(text))
+        self.term_words[term_id] = term_words
+        for word in term_words:
+            number = self.word_numbers.get(word)
+            if number is None:
+                number = len(self.words)
+                grams = trigrams(word)
+                self.words.append(word)
+                self.word_term_counts.append(0)
+                self.word_num_trigrams.append(min(len(grams), 0xFFFF))
+                self.word_numbers[word] = number
+                for gram in grams:
+                    posting = self.postings.get(gram)
+                    if posting is None:
+                        posting = self.postings[gram] = array('i')
+                    posting.append(number)
+            self.word_term_counts[number] += 1
+
+    def remove_term(self, term_id):
+        for word in self.term_words.pop(term_id, ()):
+            self.word_term_counts[self.word_numbers[word]] -= 1
+
+    def is_known_word(self, word):
+        number = self.word_numbers.get(word)
+        return number is not None and self.word_term_counts[number] > 0
+
+    def similar_words(self, word, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """
+        Returns up to limit (similarity, word) tuples for the words in the terms most similar to word, ordered by
+        similarity and then by how many terms use the word
+        """
+        query_grams = trigrams(word)
+        num_query_grams = len(query_grams)
+
+        with self._lock:
+            shared_counts = {}
+            for gram in query_grams:
+                for number in self.postings.get(gram, ()):
+                    shared_counts[number] = shared_counts.get(number, 0) + 1
+
+            scored = []
+            for number, shared in shared_counts.items():
+                term_count = self.word_term_counts[number]
+                if not term_count:
+                    continue
+                similarity = shared / (num_query_grams + self.word_num_trigrams[number] - shared)
+                if similarity >= threshold:
+                    scored.append((similarity, term_count, self.words[number]))
+
+        scored.sort(key=lambda match: (-match[0], -match[1], match[2]))
+        return [(similarity, similar_word) for similarity, _, similar_word in scored[:limit]]
+
+    def suggest(self, text, limit=3):
+        """
+        Returns up to limit corrected versions of text, most likely first, where every word not used in any term is
+        replaced by a similar word which is. Returns an empty list if there is nothing to correct.
+        """
+        query_words = words(text)
+        corrections = {}
+        for word in query_words:
+            if not self.is_known_word(word):
+                candidates = [similar_word for _, similar_word in self.similar_words(word, limit=limit)]
+                if not candidates:
+                    return []
+                corrections[word] = candidates
+        if not corrections:
+            return []
+
+        best = [corrections[word][0] if word in corrections else word for word in query_words]
+        suggestions = [' '.join(best)]
+
+        # the alternatives vary the first corrected word, keeping the best correction for the rest
+        first_corrected = next(i for i, word in enumerate(query_words) if word in corrections)
+        for alternative in corrections[query_words[first_corrected]][1:]:
+            suggestion = best[:first_corrected] + [alternative] + best[first_corrected + 1:]
+            suggestions.append(' '.join(suggestion))
+        return suggestions[:limit]
+
+
+trigram_index = TrigramIndex()
+
+
+def did_you_mean(search_key, limit=3):
+    """
+    Returns corrected versions of a search which had no results
+    """
+    trigram_index.ensure_built()
+    return trigram_index.suggest(search_key or '', limit=limit)
@@ -0,0 +1,14 @@
+from django import template
+
+from dictionary import dependencies
+
+register = template.Library()
+
+
+@register.simple_tag
+def dependency_generation(dependency):
+    """
+    The current generation of a dependency, to vary a {% cache %} fragment on so it's rendered again once the
+    dependency is bumped, e.g. {% dependency_generation "sports:list" as sports_generation %}
+    """
+    return dependencies.generations([dependency])[0]
@@ -10,6 +10,14 @@ def vote_status(definition, user):
     if not user.is_authenticated:
         return 'Not voted on'
 
+    # views listing definitions load the user's votes on the whole page with votes.prefetch_user_votes
+    user_votes = getattr(definition, 'user_votes', None)
+    if user_votes is not None:
+        vote_type = user_votes.get(definition.pk)
+        if vote_type is None:
+            return 'Not voted on'
+        return f'{dict(Vote.VOTE_TYPES)[vote_type]}d'
+
     vote = definition.votes.filter(user=user)
     if not vote.exists():
         return 'Not voted on'
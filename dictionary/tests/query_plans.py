@@ -0,0 +1,46 @@
+import re
+
+from django.db import connection
+
+FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def capture_queries(func):
+    """
+    Calls func and returns the (sql, params) of every query it ran on the default database
+    """
+    queries = []
+
+    def capture(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        func()
+    return queries
+
+
+def explain_query_plan(sql, params):
+    """
+    Returns the detail column of each step of SQLite's EXPLAIN QUERY PLAN of a query
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(queries):
+    """
+    Returns (table, sql) for each table read by one of the SELECT queries from capture_queries by scanning every row
+    rather than through an index. Scans of subqueries which have already been narrowed down aren't counted.
+    """
+    tables = set(connection.introspection.table_names())
+    scans = []
+    for sql, params in queries:
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        for detail in explain_query_plan(sql, params):
+            match = FULL_SCAN_RE.match(detail)
+            if match and match.group(1) in tables:
+                scans.append((match.group(1), sql))
+    return scans
@@ -0,0 +1,82 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dictionary.autocomplete import PrefixIndex, prefix_index
+from dictionary.factories import SportFactory, TermFactory
+from dictionary.models import Term
+
+
+class PrefixIndexTest(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.load([
+            (1, 'Offside', 'football', 'offside'),
+            (2, 'Offside trap', 'football', 'offside-trap'),
+            (3, 'Off break', 'cricket', 'off-break'),
+            (4, 'Nutmeg', 'football', 'nutmeg'),
+        ])
+
+    def texts(self, *args, **kwargs):
+        return [result['text'] for result in self.index.complete(*args, **kwargs)]
+
+    def test_complete_in_alphabetical_order(self):
+        self.assertEqual(self.texts('off'), ['Off break', 'Offside', 'Offside trap'])
+
+    def test_complete_is_case_insensitive(self):
+        self.assertEqual(self.texts('OFFSIDE '), ['Offside', 'Offside trap'])
+
+    def test_complete_limit(self):
+        self.assertEqual(self.texts('off', limit=1), ['Off break'])
+
+    def test_complete_scoped_to_sport(self):
+        self.assertEqual(self.texts('off', sport_slug='cricket'), ['Off break'])
+        self.assertEqual(self.texts('off', sport_slug='golf'), [])
+
+    def test_complete_includes_url(self):
+        self.assertEqual(self.index.complete('nut')[0]['url'], '/term/football/nutmeg')
+
+    def test_empty_prefix(self):
+        self.assertEqual(self.texts(' '), [])
+
+    def test_incremental_updates(self):
+        self.index.remove_term(2)
+        self.assertEqual(self.texts('offside'), ['Offside'])
+
+        self.index.add_term(5, 'Offside rule', 'football', 'offside-rule')
+        self.assertEqual(self.texts('offside'), ['Offside', 'Offside rule'])
+
+
+class AutocompleteView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create(name='Football')
+        cls.offside = TermFactory.create(sport=cls.sport, text='Offside')
+        TermFactory.create(sport=cls.sport, text='Offside trap')
+        TermFactory.create(sport=SportFactory.create(name='Cricket'), text='Off break')
+
+    def get_texts(self, query_string):
+        response = self.client.get(reverse('autocomplete') + query_string)
+        self.assertEqual(response.status_code, 200)
+        return [result['text'] for result in json.loads(response.content)['results']]
+
+    def test_view(self):
+        self.assertEqual(self.get_texts('?term=off'), ['Off break', 'Offside', 'Offside trap'])
+        self.assertEqual(self.get_texts('?term=off&sport=football&limit=1'), ['Offside'])
+        self.assertEqual(self.get_texts('?term=off&limit=x'), ['Off break', 'Offside', 'Offside trap'])
+
+    def test_index_follows_term_changes(self):
+        offside = Term.objects.get(pk=self.offside.pk)
+        offside.approvedFl = False
+        offside.save()
+        self.assertEqual(self.get_texts('?term=offside'), ['Offside trap'])
+
+        TermFactory.create(sport=self.sport, text='Offside rule')
+        self.assertEqual(self.get_texts('?term=offside'), ['Offside rule', 'Offside trap'])
+
+    @override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60)
+    def test_no_queries_once_built(self):
+        prefix_index.ensure_built()
+        with self.assertNumQueries(0):
+            self.get_texts('?term=off')
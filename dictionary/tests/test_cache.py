@@ -0,0 +1,193 @@
+import json
+import tempfile
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dictionary.cache import INVALIDATION_SEQUENCE_KEY, LockingFileBasedCache, TieredCache
+from dictionary.factories import UserFactory
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-cache-test',
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+
+    def tiered_cache(self, **options):
+        # each TieredCache stands in for the local tier of a different process sharing the same shared cache
+        return TieredCache('shared', {'OPTIONS': dict({'INVALIDATION_CHECK_INTERVAL': 0}, **options)})
+
+    def test_reads_are_served_locally(self):
+        cache = self.tiered_cache()
+        cache.set('key', {'a': 1})
+        self.assertEqual(cache.get('key'), {'a': 1})
+        # the shared cache holds the value along with the time it expires at
+        self.assertEqual(caches['shared'].get('key')[0], {'a': 1})
+        self.assertEqual(cache.get('missing', 'default'), 'default')
+        stats = cache.stats()
+        self.assertEqual((stats['local_hits'], stats['shared_hits'], stats['misses']), (1, 0, 1))
+
+    def test_values_are_copied(self):
+        cache = self.tiered_cache()
+        value = [1]
+        cache.set('key', value)
+        value.append(2)
+        cache.get('key').append(3)
+        self.assertEqual(cache.get('key'), [1])
+
+    def test_reads_fill_the_local_tier(self):
+        first, second = self.tiered_cache(), self.tiered_cache()
+        first.set('key', 'value')
+        self.assertEqual(second.get('key'), 'value')
+        self.assertEqual(second.get('key'), 'value')
+        self.assertEqual((second.stats()['shared_hits'], second.stats()['local_hits']), (1, 1))
+
+    def test_writes_by_other_processes_invalidate_the_local_tier(self):
+        first, second = self.tiered_cache(), self.tiered_cache()
+        first.set('key', 'old')
+        self.assertEqual(second.get('key'), 'old')
+
+        first.set('key', 'new')
+        self.assertEqual(second.get('key'), 'new')
+        first.delete('key')
+        self.assertIsNone(second.get('key'))
+        self.assertEqual(second.stats()['invalidations'], 2)
+
+    def test_writes_by_other_processes_only_invalidate_their_keys(self):
+        first, second = self.tiered_cache(), self.tiered_cache()
+        first.set_many({'written': 'old', 'kept': 'value'})
+        second.get('written')
+        second.get('kept')
+
+        first.set('written', 'new')
+        self.assertEqual(second.get('written'), 'new')
+        self.assertEqual(second.get('kept'), 'value')
+        self.assertEqual((second.stats()['invalidations'], second.stats()['local_hits']), (1, 1))
+
+    def test_unreadable_invalidations_drop_the_local_tier(self):
+        first, second = self.tiered_cache(), self.tiered_cache()
+        first.set_many({'a': 1, 'b': 2})
+        second.get('a')
+        second.get('b')
+
+        first.set('c', 3)
+        # e.g. the log entry expired before this process read it
+        caches['shared'].delete(f"{INVALIDATION_SEQUENCE_KEY}:{caches['shared'].get(INVALIDATION_SEQUENCE_KEY)}")
+        second.get('a')
+        self.assertEqual((second.stats()['invalidations'], second.stats()['local_entries']), (2, 1))
+
+    def test_local_entries_expire_with_the_shared_entry(self):
+        first, second = self.tiered_cache(), self.tiered_cache()
+        first.set('key', 'value', timeout=0.01)
+        self.assertEqual(second.get('key'), 'value')
+        time.sleep(0.02)
+        self.assertIsNone(first.get('key'))
+        self.assertIsNone(second.get('key'))
+
+    def test_invalidations_are_only_checked_once_per_interval(self):
+        first, second = self.tiered_cache(), self.tiered_cache(INVALIDATION_CHECK_INTERVAL=60)
+        first.set('key', 'old')
+        self.assertEqual(second.get('key'), 'old')
+        first.set('key', 'new')
+        self.assertEqual(second.get('key'), 'old')
+
+    def test_own_writes_after_another_process_writes_invalidate_the_local_tier(self):
+        first, second = self.tiered_cache(), self.tiered_cache(INVALIDATION_CHECK_INTERVAL=60)
+        first.set('key', 'old')
+        self.assertEqual(second.get('key'), 'old')
+        first.set('key', 'new')
+        second.set('other', 'value')
+        self.assertEqual(second.get('key'), 'new')
+
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        cache = self.tiered_cache(MAX_SIZE=3100)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, 'x' * 1000)
+        cache.get('a')
+        cache.set('d', 'x' * 1000)
+
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['local_size'], 3100)
+        self.assertEqual(list(cache._local), [cache.make_key(key) for key in ('c', 'a', 'd')])
+        # evicted entries are still in the shared cache
+        self.assertEqual(cache.get('b'), 'x' * 1000)
+
+    def test_local_entries_expire(self):
+        cache = self.tiered_cache(LOCAL_TIMEOUT=0.01)
+        cache.set('key', 'value')
+        time.sleep(0.02)
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual((cache.stats()['expirations'], cache.stats()['shared_hits']), (1, 1))
+
+    def test_add_and_incr(self):
+        first, second = self.tiered_cache(), self.tiered_cache()
+        self.assertTrue(first.add('counter', 1))
+        self.assertFalse(second.add('counter', 5))
+        self.assertEqual(second.get('counter'), 1)
+        self.assertEqual(first.incr('counter'), 2)
+        self.assertEqual(second.get('counter'), 2)
+        self.assertTrue(second.has_key('counter'))
+
+
+class LockingFileBasedCacheTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = LockingFileBasedCache(directory.name, {})
+
+    def test_concurrent_incrs_are_all_counted(self):
+        self.cache.set('counter', 0, None)
+
+        def incr():
+            for _ in range(50):
+                self.cache.incr('counter')
+
+        threads = [threading.Thread(target=incr) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_incr_keeps_the_expiry(self):
+        self.cache.set('counter', 1, 0.05)
+        self.assertEqual(self.cache.incr('counter'), 2)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('counter'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter')
+
+    def test_add(self):
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+
+
+class CacheStatsViewTest(TestCase):
+    def test_staff_only(self):
+        self.client.force_login(UserFactory.create())
+        response = self.client.get(reverse('cache_stats'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'dictionary.cache.TieredCache', 'LOCATION': 'shared'},
+                               'shared': SHARED_CACHES['shared']})
+    def test_stats(self):
+        self.client.force_login(UserFactory.create(is_staff=True))
+        response = self.client.get(reverse('cache_stats'))
+        stats = json.loads(response.content)
+        self.assertEqual(stats['backend'], 'dictionary.cache.TieredCache')
+        self.assertIn('local_hits', stats['stats'])
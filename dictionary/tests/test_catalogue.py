@@ -0,0 +1,83 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from dictionary.catalogue import active_sports, get_sport, sport_slug, sport_slugs_to_ids, sports_catalogue
+from dictionary.factories import SportFactory, TermFactory, CategoryFactory
+from dictionary.models import Sport, Term, Category
+
+
+class SportsCatalogueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sports = [SportFactory.create(name=name) for name in ('Tennis', 'Cricket', 'Football')]
+        cls.inactive_sport = SportFactory.create(name='Bowls', active=False)
+
+    def test_active_sports_are_ordered_by_name(self):
+        self.assertEqual([sport.name for sport in active_sports()], ['Cricket', 'Football', 'Tennis'])
+
+    def test_get_sport(self):
+        sport = get_sport(self.inactive_sport.id)
+        self.assertEqual((sport.name, sport.slug, sport.active), ('Bowls', self.inactive_sport.slug, False))
+        self.assertEqual(sport.get_absolute_url(), self.inactive_sport.get_absolute_url())
+        self.assertIsNone(get_sport(0))
+
+    def test_unknown_sports_rebuild_the_catalogue_once_per_interval(self):
+        sports_catalogue.ensure_built()
+        with override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60):
+            sports_catalogue.rebuild_for_miss()
+            with self.assertNumQueries(0):
+                for _ in range(5):
+                    self.assertIsNone(get_sport(0))
+                    self.assertIsNone(sport_slug(None))
+                    self.assertEqual(sport_slugs_to_ids(['nosuchsport']), {})
+
+    def test_saving_or_deleting_a_sport_invalidates_the_catalogue(self):
+        sport = Sport.objects.get(pk=self.sports[0].pk)
+        sport.emoji = '🎾'
+        sport.save()
+        self.assertEqual(get_sport(sport.id).emoji, '🎾')
+
+        sport.delete()
+        self.assertNotIn('Tennis', [sport.name for sport in active_sports()])
+
+    def test_urls_are_built_without_queries(self):
+        term = Term.objects.get(pk=TermFactory.create(sport=self.sports[1]).pk)
+        category = Category.objects.get(pk=CategoryFactory.create(sport=self.sports[1]).pk)
+        sports_catalogue.ensure_built()
+        with override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60), self.assertNumQueries(0):
+            self.assertEqual(term.get_absolute_url(), f'/term/{self.sports[1].slug}/{term.slug}')
+            self.assertEqual(category.get_absolute_url(),
+                             f'{self.sports[1].get_absolute_url()}?category={category.name.replace(" ", "+")}')
+            active_sports()
+
+    def test_category_urls_are_encoded(self):
+        first = CategoryFactory.create(sport=self.sports[0], name='Rules & regs')
+        second = CategoryFactory.create(sport=self.sports[0], name='Rules_&_regs')
+        self.assertEqual(first.get_absolute_url(), f'{self.sports[0].get_absolute_url()}?category=Rules+%26+regs')
+        self.assertEqual(second.get_absolute_url(), f'{self.sports[0].get_absolute_url()}?category=Rules_%26_regs')
+
+        response = self.client.get(first.get_absolute_url())
+        self.assertEqual(response.context['categories_filtered_by'], [first])
+
+    def test_renaming_a_category_updates_its_url(self):
+        category = Category.objects.get(pk=CategoryFactory.create(sport=self.sports[0]).pk)
+        category.get_absolute_url()
+        category.name = 'Renamed'
+        category.save()
+        self.assertEqual(category.get_absolute_url(), f'{self.sports[0].get_absolute_url()}?category=Renamed')
+
+    def test_term_rows_link_categories_without_a_query_per_row(self):
+        categories = CategoryFactory.create_batch(2, sport=self.sports[0])
+        for term in TermFactory.create_batch(10, sport=self.sports[0]):
+            term.categories.set(categories)
+        self.client.get(self.sports[0].get_absolute_url())
+        # render the rows rather than reading them from the fragment cache, the rows are cached under the generation
+        # of the sports list which is read with one more query, as are the generations the validators are built from
+        caches['template_fragments'].clear()
+        with override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60), self.assertNumQueries(8):
+            response = self.client.get(self.sports[0].get_absolute_url())
+        self.assertContains(response, categories[0].get_absolute_url(), count=11)
+
+    def test_sports_widget(self):
+        response = self.client.get('/')
+        self.assertContains(response, 'Sports <small>(3)</small>', html=True)
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dictionary import dependencies
+from dictionary.factories import SportFactory, UserFactory, TermFactory, DefinitionFactory, TermOfTheDayFactory
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        cls.term = TermFactory.create(sport=cls.sport)
+        cls.other_term = TermFactory.create(sport=cls.sport)
+        DefinitionFactory.create(term=cls.term)
+        TermOfTheDayFactory.create(term=cls.term)
+
+    def test_views_send_validators(self):
+        for url in (reverse('index'), self.sport.get_absolute_url(), self.term.get_absolute_url()):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+                                 304)
+
+    def test_not_modified_before_querying_the_definitions(self):
+        etag = self.client.get(self.term.get_absolute_url())['ETag']
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = self.client.get(self.term.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertFalse([sql for sql in queries if 'dictionary_definition' in sql])
+        self.assertEqual(len([sql for sql in queries if 'dictionary_term' in sql]), 1)
+
+    def test_modified_when_the_term_changes(self):
+        url = self.term.get_absolute_url()
+        response = self.client.get(url)
+        DefinitionFactory.create(term=self.term)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_kept_when_another_term_changes(self):
+        url = self.term.get_absolute_url()
+        response = self.client.get(url)
+        DefinitionFactory.create(term=self.other_term)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_users_get_their_own_etag(self):
+        url = self.term.get_absolute_url()
+        anonymous_etag = self.client.get(url)['ETag']
+        self.client.force_login(UserFactory.create())
+        self.assertNotEqual(self.client.get(url)['ETag'], anonymous_etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=anonymous_etag).status_code, 200)
+
+    def test_unknown_term_has_no_validators(self):
+        response = self.client.get(reverse('term_detail', args=(self.sport.slug, 'made-up-slug')))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_unknown_sport_leaves_no_generation_behind(self):
+        response = self.client.get(reverse('sport_index', args=('made-up-sport',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+        key = dependencies.GENERATION_CACHE_KEY_PREFIX + dependencies.sport_dependency('made-up-sport')
+        self.assertIsNone(cache.get(key))
+
+    @override_settings(PAGE_CACHE=True)
+    def test_not_modified_from_the_page_cache(self):
+        url = self.term.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
@@ -1,6 +1,12 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 
-from dictionary.templatetags.custom_urlize import custom_urlize
+from dictionary.catalogue import sports_catalogue
+from dictionary.interlinks import prefetch_interlinks
+from dictionary.models import Definition, Vote
+from dictionary.templatetags.custom_urlize import custom_urlize, interlinked
+from dictionary.templatetags.vote_status import vote_status
+from dictionary.votes import prefetch_user_votes
 from dictionary.factories import SportFactory, UserFactory, TermFactory, SuggestedTermFactory, DefinitionFactory, VoteFactory
 
 
@@ -50,3 +56,77 @@ class CustomUrlizeTest(BaseTagsTest):
         label = 'a label'
         result = custom_urlize(f'[[{term_slug}|{label}]]', self.term.sport)
         self.assertEqual(result, f'<a href="#" class="bad-link">{label.strip()}</a>')
+
+    def test_valid_internal_link_to_other_sport(self):
+        other_term = TermFactory.create(sport=SportFactory.create(name='Other sport'))
+        result = custom_urlize(f'see [[{other_term.sport.slug}:{other_term.slug}]]', self.term.sport)
+        self.assertEqual(result, f'see <a href="{other_term.get_absolute_url()}" class="term-link-in-definition">'
+                                 f'{other_term.slug}</a>')
+
+    def test_text_is_escaped(self):
+        result = custom_urlize(f'<b>[[{self.term.slug}|label]]</b>', self.term.sport)
+        self.assertEqual(result, f'&lt;b&gt;[[{self.term.slug}|label]]&lt;/b&gt;')
+
+
+class InterlinkedTest(BaseTagsTest):
+    def create_definitions(self, num_links):
+        linked_terms = TermFactory.create_batch(num_links, sport=self.term.sport)
+        links = ' '.join(f'[[{term.slug}]]' for term in linked_terms)
+        DefinitionFactory.create_batch(3, term=self.term, text=f'{links} [[made-up-slug]]')
+        return Definition.objects.filter(term=self.term).select_related('term')
+
+    def test_prefetched_links_render_like_custom_urlize(self):
+        definitions = list(self.create_definitions(3))
+        prefetch_interlinks(definitions)
+        for definition in definitions:
+            self.assertEqual(interlinked(definition), custom_urlize(definition.text, self.term.sport))
+
+    def test_prefetched_links_resolve_in_one_query(self):
+        for num_links in (1, 10):
+            with self.subTest(num_links=num_links):
+                definitions = list(self.create_definitions(num_links))
+                sports_catalogue.ensure_built()
+                with override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60), self.assertNumQueries(1):
+                    prefetch_interlinks(definitions)
+                    for definition in definitions:
+                        interlinked(definition)
+                Definition.objects.filter(term=self.term).delete()
+
+    def test_term_detail_query_count_does_not_depend_on_links(self):
+        query_counts = []
+        for num_links in (1, 12):
+            self.create_definitions(num_links)
+            # render the links as the page is displayed rather than reading the HTML stored when they were saved
+            Definition.objects.update(rendered_version=0)
+            # render once so the counts & in-memory indexes are cached
+            self.client.get(self.term.get_absolute_url())
+            queries = []
+            with override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60), \
+                    connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                response = self.client.get(self.term.get_absolute_url())
+            self.assertContains(response, 'term-link-in-definition')
+            query_counts.append(len(queries))
+            Definition.objects.filter(term=self.term).delete()
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(sum(sql.startswith('SELECT "dictionary_term"."sport_id", "dictionary_term"."slug"')
+                             for sql in queries), 1)
+
+
+class VoteStatusTest(BaseTagsTest):
+    def setUp(self):
+        self.definitions = DefinitionFactory.create_batch(3)
+        self.definitions[0].upvote(self.user)
+        self.definitions[1].downvote(self.user)
+        self.expected = ['Upvoted', 'Downvoted', 'Not voted on']
+
+    def test_vote_status(self):
+        for definition, expected in zip(self.definitions, self.expected):
+            self.assertEqual(vote_status(definition, self.user), expected)
+
+    def test_prefetched_vote_status(self):
+        definitions = list(Definition.objects.filter(pk__in=[d.pk for d in self.definitions]).order_by('pk'))
+        with self.assertNumQueries(1):
+            prefetch_user_votes(definitions, self.user)
+            for definition, expected in zip(definitions, self.expected):
+                self.assertEqual(vote_status(definition, self.user), expected)
+        self.assertEqual(definitions[0].user_votes, {definitions[0].pk: Vote.UPVOTE, definitions[1].pk: Vote.DOWNVOTE})
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from dictionary import dependencies
+from dictionary.dependencies import TERM_LISTS, TOTD_LIST, sport_dependency, term_dependency
+from dictionary.factories import SportFactory, CategoryFactory, UserFactory, TermFactory, DefinitionFactory, \
+    TermOfTheDayFactory
+from dictionary.models import Term, Vote
+from dictionary.votes import toggle_vote
+
+
+class DependenciesTest(TestCase):
+    def test_cache_key_changes_when_a_dependency_is_bumped(self):
+        key = dependencies.cache_key('test', ['a', 'b'], 'part')
+        self.assertEqual(dependencies.cache_key('test', ['b', 'a'], 'part'), key)
+
+        dependencies.bump('b')
+        bumped_key = dependencies.cache_key('test', ['a', 'b'], 'part')
+        self.assertNotEqual(bumped_key, key)
+        self.assertEqual(dependencies.cache_key('test', ['a', 'b'], 'part'), bumped_key)
+
+    def test_bump_leaves_other_dependencies_alone(self):
+        key = dependencies.cache_key('test', ['a'], 'part')
+        dependencies.bump('b')
+        self.assertEqual(dependencies.cache_key('test', ['a'], 'part'), key)
+
+    def test_generation_the_cache_failed_to_store(self):
+        with mock.patch.object(dependencies, 'cache') as failing_cache:
+            failing_cache.get_many.return_value = {}
+            failing_cache.add.return_value = False
+            failing_cache.get.side_effect = lambda key, default=None: default
+            generation, = dependencies.generations(['a'])
+        self.assertIsNotNone(generation)
+        self.assertGreater(dependencies.last_changed([generation]), 0)
+
+
+class DependenciesTransactionTest(TransactionTestCase):
+    def test_entry_cached_before_commit_is_not_kept(self):
+        with transaction.atomic():
+            dependencies.bump('bumped-in-transaction')
+            # another request reads the rows from before the commit & caches them under the new generation
+            stale_key = dependencies.cache_key('test', ['bumped-in-transaction'], 'part')
+            cache.set(stale_key, 'stale')
+            self.addCleanup(cache.delete, stale_key)
+
+        self.assertIsNone(cache.get(dependencies.cache_key('test', ['bumped-in-transaction'], 'part')))
+
+    def test_bump_outside_a_transaction(self):
+        key = dependencies.cache_key('test', ['bumped'], 'part')
+        dependencies.bump('bumped')
+        self.assertNotEqual(dependencies.cache_key('test', ['bumped'], 'part'), key)
+
+
+class DependencySignalsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create(name='Sport')
+        cls.other_sport = SportFactory.create(name='Other sport')
+        cls.term = TermFactory.create(sport=cls.sport)
+        cls.other_term = TermFactory.create(sport=cls.other_sport)
+        cls.definition = DefinitionFactory.create(term=cls.term)
+        cls.user = UserFactory.create()
+
+    def assertBumped(self, bumped, change):
+        """
+        Asserts change bumps exactly the dependencies in bumped out of those of the test data
+        """
+        watched = [TERM_LISTS, TOTD_LIST, sport_dependency(self.sport.slug), sport_dependency(self.other_sport.slug),
+                   term_dependency(self.term.id), term_dependency(self.other_term.id)]
+        before = dict(zip(watched, dependencies.generations(watched)))
+        change()
+        after = dict(zip(watched, dependencies.generations(watched)))
+        self.assertEqual({dependency for dependency in watched if before[dependency] != after[dependency]}, set(bumped))
+
+    def test_term_saved(self):
+        term = Term.objects.get(pk=self.term.pk)
+        term.text = 'Renamed'
+        self.assertBumped([TERM_LISTS, TOTD_LIST, sport_dependency(self.sport.slug), term_dependency(term.id)],
+                          term.save)
+
+    def test_term_moved_to_another_sport(self):
+        term = Term.objects.get(pk=self.term.pk)
+        term.sport = self.other_sport
+        self.assertBumped([TERM_LISTS, TOTD_LIST, sport_dependency(self.sport.slug),
+                           sport_dependency(self.other_sport.slug), term_dependency(term.id)], term.save)
+
+    def test_term_categories_changed(self):
+        category = CategoryFactory.create(sport=self.sport)
+        self.assertBumped([TERM_LISTS, TOTD_LIST, sport_dependency(self.sport.slug), term_dependency(self.term.id)],
+                          lambda: category.terms.add(self.term))
+
+    def test_definition_created(self):
+        self.assertBumped([TERM_LISTS, TOTD_LIST, sport_dependency(self.sport.slug), term_dependency(self.term.id)],
+                          lambda: DefinitionFactory.create(term=self.term))
+
+    def test_vote_cast_and_flipped(self):
+        self.assertBumped([term_dependency(self.term.id)],
+                          lambda: toggle_vote(self.definition.id, self.user.id, Vote.UPVOTE))
+        self.assertBumped([term_dependency(self.term.id)],
+                          lambda: toggle_vote(self.definition.id, self.user.id, Vote.DOWNVOTE))
+
+    def test_vote_bumps_its_term_once(self):
+        for vote_type in (Vote.UPVOTE, Vote.UPVOTE):
+            with mock.patch.object(dependencies, 'bump', wraps=dependencies.bump) as bump:
+                toggle_vote(self.definition.id, self.user.id, vote_type)
+            bump.assert_called_once_with(term_dependency(self.term.id))
+
+    def test_term_of_the_day_created(self):
+        self.assertBumped([TOTD_LIST], lambda: TermOfTheDayFactory.create(term=self.other_term))
+
+    def test_other_sports_counts_are_kept(self):
+        url = self.other_sport.get_absolute_url()
+        self.assertEqual(self.client.get(url).context['paginator'].count, 1)
+        key = dependencies.cache_key('dictionary-count', [sport_dependency(self.other_sport.slug)],
+                                     'sport', self.other_sport.id, [])
+
+        TermFactory.create(sport=self.sport)
+        self.assertEqual(dependencies.cache_key('dictionary-count', [sport_dependency(self.other_sport.slug)],
+                                                'sport', self.other_sport.id, []), key)
+
+        TermFactory.create(sport=self.other_sport)
+        self.assertEqual(self.client.get(url).context['paginator'].count, 2)
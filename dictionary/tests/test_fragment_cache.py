@@ -0,0 +1,80 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from dictionary.factories import SportFactory, CategoryFactory, UserFactory, TermFactory, DefinitionFactory
+from dictionary.models import Definition, Term
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        cls.term = TermFactory.create(sport=cls.sport, text='Cached term')
+        cls.author = UserFactory.create()
+        cls.definition = DefinitionFactory.create(term=cls.term, user=cls.author, text='A cached definition')
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+
+    def test_term_row_is_cached_until_the_term_changes(self):
+        url = self.sport.get_absolute_url()
+        self.assertContains(self.client.get(url), 'Cached term')
+
+        # an update() leaves last_updated alone so the cached row is still shown
+        Term.objects.filter(pk=self.term.pk).update(text='Updated term')
+        self.assertContains(self.client.get(url), 'Cached term')
+
+        term = Term.objects.get(pk=self.term.pk)
+        term.text = 'Saved term'
+        term.save()
+        self.assertContains(self.client.get(url), 'Saved term')
+
+    def test_term_row_shows_new_categories(self):
+        url = self.sport.get_absolute_url()
+        self.client.get(url)
+        category = CategoryFactory.create(sport=self.sport, name='New category')
+        self.term.categories.add(category)
+        self.assertContains(self.client.get(url), 'New category')
+
+    def test_definition_text_is_cached_until_the_definition_changes(self):
+        url = self.term.get_absolute_url()
+        self.assertContains(self.client.get(url), 'A cached definition')
+
+        # an update() leaves last_updated alone so the cached text is still shown
+        Definition.objects.filter(pk=self.definition.pk).update(rendered_html='<p>Updated definition</p>')
+        self.assertContains(self.client.get(url), 'A cached definition')
+
+        definition = Definition.objects.get(pk=self.definition.pk)
+        definition.text = 'A saved definition'
+        definition.save()
+        self.assertContains(self.client.get(url), 'A saved definition')
+
+    def test_definition_card_shows_each_users_vote(self):
+        url = self.term.get_absolute_url()
+        voter = UserFactory.create()
+        self.definition.upvote(voter)
+
+        self.client.force_login(voter)
+        self.assertContains(self.client.get(url), 'voteButton upvoted')
+        self.assertNotContains(self.client.get(url), 'data-action="delete-definition"')
+
+        self.client.force_login(self.author)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'voteButton upvoted')
+        self.assertContains(response, 'data-action="delete-definition"')
+
+    def test_definition_card_shows_new_net_votes(self):
+        url = self.term.get_absolute_url()
+        self.assertContains(self.client.get(url), '<div class="definition-netvote-count text-muted">0</div>', html=True)
+        self.definition.upvote(UserFactory.create())
+        self.assertContains(self.client.get(url), '<div class="definition-netvote-count text-muted">1</div>', html=True)
+
+    def test_definition_card_shows_renamed_links(self):
+        linked_term = TermFactory.create(sport=self.sport, text='Linked term')
+        DefinitionFactory.create(term=self.term, text=f'See [[{linked_term.slug}]]')
+        url = self.term.get_absolute_url()
+        self.assertContains(self.client.get(url), 'linked term')
+
+        linked_term.text = 'Renamed term'
+        linked_term.save()
+        self.assertContains(self.client.get(url), 'renamed term')
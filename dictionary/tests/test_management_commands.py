@@ -1,12 +1,27 @@
+import json
+import os
+import sqlite3
 import sys
+import tempfile
+from datetime import date, timedelta
 from io import StringIO
+from unittest import mock
 
 from django.contrib.auth.models import User
-from django.core.management import call_command
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
 
+from accounts.models import Profile
+from dictionary import dependencies, search, seeding
+from dictionary.benchmarking import VIEW_BENCHMARKS, vote_counter_drift
+from dictionary.datasets import isolated_caches, use_database
 from dictionary.factories import SportFactory, CategoryFactory, UserFactory, TermFactory, SuggestedTermFactory, DefinitionFactory, VoteFactory
+from dictionary.loadtesting import TRAFFIC_MIX
 from dictionary.models import Sport, Category, Term, Definition, Vote, SuggestedTerm, TermOfTheDay
+from dictionary.rendering import RENDER_VERSION
+from dictionary.seeding import DATASET_TIERS, DatasetTier
 
 
 class NukeDbTest(TestCase):
@@ -117,3 +132,351 @@ class AddFutureTermsOfTheDay(TestCase):
         self.assertEqual(terms_of_the_day, 7)
 
         self.assertIn(f'Added 2 new terms of the day', out.getvalue())
+
+    def test_falls_back_to_used_terms_without_repeating(self):
+        # only 5 of the 15 terms haven't been a term of the day, so 2 of the 7 days get a used term
+        used_terms = Term.objects.order_by('pk')[:10]
+        for i, term in enumerate(used_terms):
+            TermOfTheDay.objects.create(day=date.today() - timedelta(days=i + 1), term=term)
+
+        call_command('addfuturetermsoftheday', days=7, stdout=StringIO())
+
+        term_ids = list(TermOfTheDay.objects.filter(day__gte=date.today()).values_list('term_id', flat=True))
+        self.assertEqual(len(term_ids), 7)
+        self.assertEqual(len(set(term_ids)), 7)
+        unused_term_ids = set(Term.objects.exclude(pk__in=[t.pk for t in used_terms]).values_list('pk', flat=True))
+        self.assertLessEqual(unused_term_ids, set(term_ids))
+
+    def test_repeats_terms_when_there_are_more_days_than_terms(self):
+        call_command('addfuturetermsoftheday', days=20, stdout=StringIO())
+
+        term_ids = list(TermOfTheDay.objects.values_list('term_id', flat=True))
+        self.assertEqual(len(term_ids), 20)
+        self.assertEqual(len(set(term_ids)), 15)
+
+
+class RebuildSearchIndex(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TermFactory.create_batch(5)
+
+    def test_command_output(self):
+        out = StringIO()
+        sys.stdout = out
+        call_command('rebuildsearchindex', batch_size=2, stdout=out)
+
+        self.assertIn('Indexed 5 terms', out.getvalue())
+
+
+class ReconcileDefinitionCounts(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.term = TermFactory.create()
+        cls.definition = DefinitionFactory.create(term=cls.term)
+        cls.other_term, _ = TermFactory.create_batch(2)
+
+    def test_command(self):
+        Term.objects.update(num_definitions=0, top_definition=None)
+
+        out = StringIO()
+        sys.stdout = out
+        call_command('reconciledefinitioncounts', batch_size=2, stdout=out)
+
+        self.assertIn('Reconciled the definition counts of 3 terms (1 were out of date)', out.getvalue())
+        term = Term.objects.get(pk=self.term.pk)
+        self.assertEqual(term.num_definitions, 1)
+        self.assertEqual(term.top_definition, self.definition)
+
+    def test_bumps_the_changed_terms(self):
+        Term.objects.filter(pk=self.term.pk).update(num_definitions=0, top_definition=None)
+
+        with mock.patch.object(dependencies, 'bump', wraps=dependencies.bump) as bump:
+            call_command('reconciledefinitioncounts', batch_size=2, stdout=StringIO())
+        bumped = {dependency for call in bump.call_args_list for dependency in call[0]}
+        self.assertIn(dependencies.term_dependency(self.term.pk), bumped)
+        self.assertIn(dependencies.sport_dependency(self.term.sport.slug), bumped)
+        self.assertNotIn(dependencies.term_dependency(self.other_term.pk), bumped)
+
+
+class StressVotes(TestCase):
+    def test_command_output(self):
+        out = StringIO()
+        sys.stdout = out
+        call_command('stressvotes', processes=1, votes=50, definitions=2, users=3, stdout=out)
+
+        self.assertIn('1 processes made 50 votes', out.getvalue())
+        self.assertIn('No drift', out.getvalue())
+        # everything created for the run is deleted afterwards
+        self.assertEqual(Definition.objects.count(), 0)
+        self.assertEqual(User.objects.count(), 0)
+
+    def test_multiple_processes_need_on_disk_database(self):
+        with self.assertRaises(CommandError):
+            call_command('stressvotes', processes=2)
+
+
+class BenchmarkVotes(TestCase):
+    def test_command_output(self):
+        out = StringIO()
+        sys.stdout = out
+        call_command('benchmarkvotes', processes=1, votes=20, definitions=2, users=3, no_fsync=True, stdout=out)
+
+        for mode in ('synchronous', 'buffered (accept)', 'buffered (flush)'):
+            self.assertIn(mode, out.getvalue())
+        self.assertIn('No drift', out.getvalue())
+        self.assertEqual(Definition.objects.count(), 0)
+
+
+class BenchmarkSearch(TestCase):
+    def test_command_output(self):
+        out = StringIO()
+        sys.stdout = out
+        call_command('benchmarksearch', sizes='100,500', queries=5, stdout=out)
+
+        self.assertIn('icontains', out.getvalue())
+        self.assertIn('fts5', out.getvalue())
+        self.assertIn('Built database with 500 terms', out.getvalue())
+
+
+class BenchmarkSuggestions(TestCase):
+    def test_command_output(self):
+        out = StringIO()
+        sys.stdout = out
+        call_command('benchmarksuggestions', sizes='1000', queries=20, stdout=out)
+
+        self.assertIn('fixed %', out.getvalue())
+
+
+class BulkSeedDb(TestCase):
+    def seed(self, **options):
+        out = StringIO()
+        sys.stdout = out
+        options = {'workers': 1, **options}
+        call_command('seeddb', bulk=True, num_users=5, num_sports=2, num_categories=2, num_terms=6,
+                     max_num_definitions=3, max_num_votes=3, num_terms_of_the_day=4, batch_size=4, stdout=out,
+                     **options)
+        return out.getvalue()
+
+    def seeded_rows(self):
+        return (
+            sorted(User.objects.values_list('username', 'email')),
+            sorted(Term.objects.values_list('sport__name', 'text', 'slug')),
+            sorted(Term.categories.through.objects.values_list('term__text', 'category__name')),
+            sorted(Definition.objects.values_list('term__text', 'user__username', 'text', 'net_votes')),
+            sorted(Vote.objects.values_list('definition__text', 'user__username', 'vote_type')),
+        )
+
+    def test_command(self):
+        output = self.seed()
+
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Profile.objects.count(), 5)
+        self.assertEqual(Sport.objects.count(), 2)
+        self.assertEqual(Category.objects.count(), 4)
+        self.assertEqual(Term.objects.count(), 12)
+        self.assertEqual(TermOfTheDay.objects.count(), 4)
+        self.assertTrue(User.objects.filter(username='testuser').exists())
+        for stage in ('Users', 'Terms', 'Definitions', 'Votes', 'Search index'):
+            self.assertIn(f'{stage}: ', output)
+        self.assertIn('rows/s', output)
+
+    def test_derived_data_is_up_to_date(self):
+        self.seed()
+
+        definitions = Definition.objects.all()
+        self.assertTrue(definitions)
+        self.assertEqual(vote_counter_drift([definition.id for definition in definitions]), [])
+        self.assertFalse(definitions.exclude(rendered_version=RENDER_VERSION).exists())
+        self.assertFalse(Vote.objects.filter(user=F('definition__user')).exists())
+        for term in Term.objects.annotate(num_approved=Count('definitions')):
+            self.assertEqual(term.num_definitions, term.num_approved)
+            self.assertIsNotNone(term.top_definition_id)
+
+        term = Term.objects.first()
+        self.assertIn(term, search.search_terms(Term.objects.all(), term.text))
+
+    def test_seeding_again_adds_unique_rows(self):
+        self.seed()
+        self.seed()
+
+        self.assertEqual(User.objects.count(), 9)
+        self.assertEqual(Sport.objects.count(), 4)
+        self.assertEqual(Term.objects.count(), 36)
+        self.assertEqual(TermOfTheDay.objects.count(), 8)
+
+    def test_same_seed_adds_the_same_rows_with_any_number_of_workers(self):
+        self.seed(seed=7)
+        rows = self.seeded_rows()
+        self.seed(seed=7, workers=2, overwrite=True, overwrite_superusers=True)
+        self.assertEqual(self.seeded_rows(), rows)
+
+    def test_workers_output(self):
+        self.assertIn('Seeding DB with 2 workers and --seed 7', self.seed(seed=7, workers=2))
+
+    def test_workers_fall_back_to_this_process_without_fork(self):
+        with mock.patch.object(seeding, 'CAN_FORK', False):
+            self.assertIn('Seeding DB with 1 workers and --seed 7', self.seed(seed=7, workers=2))
+
+    def test_overwrite(self):
+        self.seed()
+        self.seed(overwrite=True)
+
+        self.assertEqual(Sport.objects.count(), 2)
+        self.assertEqual(Term.objects.count(), 12)
+
+
+@mock.patch.dict(DATASET_TIERS, {'small': DatasetTier(5, 40, 2, 4, 3, 3)})
+class BuildDataset(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def build(self, name, **options):
+        out = StringIO()
+        sys.stdout = out
+        path = os.path.join(self.directory.name, name)
+        call_command('builddataset', 'small', output=path, stdout=out, **options)
+        return path, out.getvalue()
+
+    def dump(self, path):
+        with sqlite3.connect(path) as db:
+            return db.execute(
+                'SELECT t.text, d.text, d.net_votes, u.username FROM dictionary_definition d '
+                'JOIN dictionary_term t ON t.id = d.term_id JOIN auth_user u ON u.id = d.user_id ORDER BY d.id'
+            ).fetchall()
+
+    def test_command(self):
+        path, output = self.build('small.sqlite3', workers=1)
+        self.assertIn('Built the small dataset (5 users, 40 terms', output)
+        # the dataset is built in its own database
+        self.assertEqual(Term.objects.count(), 0)
+
+        with use_database(path):
+            self.assertEqual(User.objects.count(), 5)
+            self.assertEqual(Sport.objects.count(), 12)
+            self.assertEqual(Term.objects.count(), 40)
+            self.assertEqual(TermOfTheDay.objects.count(), 3)
+            definitions = Definition.objects.all()
+            self.assertEqual(vote_counter_drift([definition.id for definition in definitions]), [])
+            self.assertFalse(definitions.exclude(rendered_version=RENDER_VERSION).exists())
+            for definition in definitions.filter(text__contains='[['):
+                self.assertIn('term-link-in-definition', definition.rendered_html)
+
+        # the same seed builds the same dataset whatever the number of workers & batch size
+        other_path, _ = self.build('other.sqlite3', workers=2, batch_size=3)
+        self.assertEqual(self.dump(other_path), self.dump(path))
+
+        _, output = self.build('small.sqlite3')
+        self.assertIn('The small dataset is already built', output)
+
+
+class UseDatabase(TestCase):
+    def test_caches_are_isolated(self):
+        cache.set('where', 'configured')
+        with tempfile.TemporaryDirectory() as directory:
+            with use_database(os.path.join(directory, 'other.sqlite3')):
+                self.assertIsNone(cache.get('where'))
+                cache.set('where', 'other')
+            self.assertEqual(cache.get('where'), 'configured')
+            with use_database(os.path.join(directory, 'other.sqlite3')):
+                # each block starts from an empty cache
+                self.assertIsNone(cache.get('where'))
+
+
+class BenchmarkDatasetTestCase(TestCase):
+    """
+    Builds a tiny small tier dataset in a temporary BENCHMARK_DATASET_DIR for the benchmarks to run against
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.settings = override_settings(BENCHMARK_DATASET_DIR=cls.directory.name)
+        cls.settings.enable()
+        sys.stdout = StringIO()
+        with mock.patch.dict(DATASET_TIERS, {'small': DatasetTier(5, 40, 2, 4, 3, 3)}):
+            call_command('builddataset', 'small', workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def assertCachesNothing(self, command, **options):
+        """
+        Runs the command with the tiered cache in a temporary directory and checks it cached nothing in it
+        """
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES=isolated_caches(directory)):
+            call_command(command, 'small', stdout=StringIO(), **options)
+            self.assertEqual([name for name in os.listdir(directory) if name.endswith('.djcache')], [])
+
+
+class BenchmarkViews(BenchmarkDatasetTestCase):
+    def benchmark(self, name, **options):
+        out = StringIO()
+        sys.stdout = out
+        path = os.path.join(self.directory.name, name)
+        call_command('benchmarkviews', 'small', requests=3, warmup=1, host='testserver', output=path, stdout=out,
+                     **options)
+        with open(path, encoding='utf-8') as f:
+            return json.load(f), out.getvalue()
+
+    def test_command(self):
+        results, output = self.benchmark('first.json')
+        self.assertEqual(list(results['views']), list(VIEW_BENCHMARKS))
+        for view, stats in results['views'].items():
+            with self.subTest(view=view):
+                self.assertEqual(stats['count'], 3)
+                self.assertGreater(stats['queries_mean'], 0)
+                self.assertIn(view, output)
+        self.assertGreater(results['views']['term_detail']['bytes_mean'], 0)
+        # the votes & deletions are made on a copy of the dataset
+        self.assertEqual(Definition.objects.count(), 0)
+
+        first_path = os.path.join(self.directory.name, 'first.json')
+        results, output = self.benchmark('second.json', views='index,upvote', compare=first_path)
+        self.assertEqual(list(results['views']), ['index', 'upvote'])
+        self.assertIn('was p50 ms', output)
+
+    def test_leaves_the_configured_cache_alone(self):
+        sys.stdout = StringIO()
+        self.assertCachesNothing('benchmarkviews', requests=1, warmup=0, host='testserver',
+                                 output=os.path.join(self.directory.name, 'views.json'))
+
+    def test_unknown_view(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmarkviews', 'small', views='index,nope')
+
+
+class LoadTest(BenchmarkDatasetTestCase):
+    def test_command(self):
+        out = StringIO()
+        sys.stdout = out
+        path = os.path.join(self.directory.name, 'loadtest.json')
+        call_command('loadtest', 'small', workers=2, concurrency='1,2', duration=1, warmup=0, output=path, stdout=out)
+        with open(path, encoding='utf-8') as f:
+            results = json.load(f)
+
+        self.assertEqual(list(results['levels']), ['1', '2'])
+        for level in results['levels'].values():
+            self.assertGreater(level['count'], 0)
+            self.assertGreater(level['requests_per_second'], 0)
+            self.assertEqual(sum(count for _, count in level['histogram']), level['count'])
+            self.assertLessEqual(set(level['scenarios']), set(TRAFFIC_MIX))
+        # a single visitor never has to wait for the database
+        self.assertEqual(results['levels']['1']['error_rate'], 0)
+        self.assertIn('Latency at concurrency 2', out.getvalue())
+        # the votes are made on a copy of the dataset
+        self.assertEqual(Vote.objects.count(), 0)
+
+    def test_leaves_the_configured_cache_alone(self):
+        sys.stdout = StringIO()
+        self.assertCachesNothing('loadtest', workers=2, concurrency='2', duration=1, warmup=0,
+                                 output=os.path.join(self.directory.name, 'loadtest.json'))
+
+    def test_invalid_mix(self):
+        for mix in ('browse', 'browse=60,dance=10'):
+            with self.subTest(mix=mix), self.assertRaises(CommandError):
+                call_command('loadtest', 'small', mix=mix, warmup=0)
@@ -5,7 +5,7 @@ from django.core.exceptions import ObjectDoesNotExist
 
 from dictionary.factories import SportFactory, CategoryFactory, UserFactory, TermFactory, SuggestedTermFactory, \
     DefinitionFactory, VoteFactory, TermOfTheDayFactory
-from dictionary.models import SuggestedTerm, Vote
+from dictionary.models import SuggestedTerm, Definition, Vote
 
 
 class BaseModelTest(TestCase):
@@ -89,6 +89,50 @@ class TermModelTest(BaseModelTest):
         DefinitionFactory.create(term=term, user=self.user, approvedFl=False)
 
         self.assertEqual(term.num_approved_definitions(), 2)
+
+    def test_stored_definition_stats(self):
+        term = TermFactory.create(text='term to test stored definition stats', sport=self.sport, user=self.user)
+        term.refresh_from_db()
+        self.assertEqual(term.num_definitions, 0)
+        self.assertIsNone(term.top_definition)
+
+        first = DefinitionFactory.create(term=term, user=self.user)
+        second = DefinitionFactory.create(term=term, user=self.user, num_upvotes=2)
+        DefinitionFactory.create(term=term, user=self.user, approvedFl=False, num_upvotes=5)
+        term.refresh_from_db()
+        self.assertEqual(term.num_definitions, 2)
+        self.assertEqual(term.top_definition, second)
+
+        # soft deleting the top definition
+        second.deleteFl = True
+        second.save()
+        term.refresh_from_db()
+        self.assertEqual(term.num_definitions, 1)
+        self.assertEqual(term.top_definition, first)
+
+        # disapproving & deleting
+        first.approvedFl = False
+        first.save()
+        term.refresh_from_db()
+        self.assertEqual((term.num_definitions, term.top_definition), (0, None))
+
+        first.approvedFl = True
+        first.save()
+        Definition.objects.get(pk=first.pk).delete()
+        term.refresh_from_db()
+        self.assertEqual((term.num_definitions, term.top_definition), (0, None))
+
+    def test_stored_definition_stats_when_definition_moved_to_another_term(self):
+        term = TermFactory.create(text='term losing a definition', sport=self.sport, user=self.user)
+        other_term = TermFactory.create(text='term gaining a definition', sport=self.sport, user=self.user)
+        definition = Definition.objects.get(pk=DefinitionFactory.create(term=term, user=self.user).pk)
+
+        definition.term = other_term
+        definition.save()
+        term.refresh_from_db()
+        other_term.refresh_from_db()
+        self.assertEqual((term.num_definitions, term.top_definition), (0, None))
+        self.assertEqual((other_term.num_definitions, other_term.top_definition), (1, definition))
 # endregion
 
 
@@ -187,6 +231,18 @@ class DefinitionModelTest(BaseModelTest):
         self.assertEqual(definition.net_votes, 1)
         self.assertEqual(definition.num_upvotes - definition.num_downvotes,
                          definition.net_votes)
+
+    def test_saving_a_stale_instance_keeps_the_votes(self):
+        definition = DefinitionFactory.create(term=self.term, user=self.user)
+        stale = Definition.objects.get(pk=definition.pk)
+        definition.upvote(user=UserFactory.create())
+
+        stale.text = 'Edited after the vote'
+        stale.save()
+
+        definition = Definition.objects.get(pk=definition.pk)
+        self.assertEqual(definition.text, 'Edited after the vote')
+        self.assertEqual((definition.num_upvotes, definition.num_downvotes, definition.net_votes), (1, 0, 1))
 # endregion
 
 
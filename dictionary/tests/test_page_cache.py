@@ -0,0 +1,105 @@
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dictionary import dependencies
+from dictionary.factories import SportFactory, CategoryFactory, UserFactory, TermFactory, DefinitionFactory
+from dictionary.middleware import reset_page_cache_stats
+from dictionary.views import TermDetailView
+
+
+@override_settings(PAGE_CACHE=True)
+class PageCacheMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        cls.term = TermFactory.create(sport=cls.sport)
+        cls.other_term = TermFactory.create(sport=cls.sport)
+        cls.definition = DefinitionFactory.create(term=cls.term, text='The first definition')
+
+    def assertPageCache(self, url, expected, **kwargs):
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get('X-Page-Cache'), expected)
+        return response
+
+    def test_pages_are_cached_for_anonymous_users(self):
+        for url in (reverse('index'), self.sport.get_absolute_url(), self.term.get_absolute_url()):
+            with self.subTest(url=url):
+                rendered = self.assertPageCache(url, 'miss')
+                cached = self.assertPageCache(url, 'hit')
+                self.assertEqual(cached.content, rendered.content)
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.assertPageCache(self.term.get_absolute_url(), 'miss')
+        self.client.force_login(UserFactory.create())
+        response = self.assertPageCache(self.term.get_absolute_url(), None)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_anonymous_pages_have_no_csrf_token(self):
+        response = self.assertPageCache(self.term.get_absolute_url(), 'miss')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertNotIn('csrftoken', response.cookies)
+
+    def test_query_string_is_normalised(self):
+        categories = CategoryFactory.create_batch(2, sport=self.sport)
+        url = self.sport.get_absolute_url()
+        self.assertPageCache(url, 'miss', data={'category': [categories[0].name, categories[1].name]})
+        self.assertPageCache(url, 'hit', data={'category': [categories[1].name, categories[0].name], 'ref': 'x'})
+        self.assertPageCache(url, 'miss', data={'category': [categories[0].name]})
+
+    def test_page_is_rendered_again_when_its_term_changes(self):
+        url = self.term.get_absolute_url()
+        self.assertPageCache(url, 'miss')
+        DefinitionFactory.create(term=self.term, text='The second definition')
+        response = self.assertPageCache(url, 'miss')
+        self.assertContains(response, 'The second definition')
+
+    def test_page_changed_while_rendered_is_rendered_again(self):
+        url = self.term.get_absolute_url()
+        get_context_data = TermDetailView.get_context_data
+
+        def change_while_rendering(view, **kwargs):
+            context = get_context_data(view, **kwargs)
+            dependencies.bump(dependencies.term_dependency(self.term.id))
+            return context
+
+        with mock.patch.object(TermDetailView, 'get_context_data', change_while_rendering):
+            self.assertPageCache(url, 'miss')
+        self.assertPageCache(url, 'miss')
+        self.assertPageCache(url, 'hit')
+
+    def test_page_is_kept_when_another_term_changes(self):
+        url = self.term.get_absolute_url()
+        self.assertPageCache(url, 'miss')
+        DefinitionFactory.create(term=self.other_term)
+        self.assertPageCache(url, 'hit')
+
+    def test_every_page_is_rendered_again_when_a_sport_changes(self):
+        url = self.term.get_absolute_url()
+        self.assertPageCache(url, 'miss')
+        SportFactory.create(name='A new sport')
+        self.assertContains(self.assertPageCache(url, 'miss'), 'A new sport')
+
+    def test_not_found_pages_are_not_cached(self):
+        url = reverse('term_detail', args=(self.sport.slug, 'made-up-slug'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class PageCacheStatsViewTest(TestCase):
+    def test_staff_only(self):
+        self.client.force_login(UserFactory.create())
+        response = self.client.get(reverse('page_cache_stats'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(PAGE_CACHE=True)
+    def test_hit_rate(self):
+        reset_page_cache_stats()
+        for _ in range(4):
+            self.client.get(reverse('index'))
+        self.client.force_login(UserFactory.create(is_staff=True))
+        stats = json.loads(self.client.get(reverse('page_cache_stats')).content)
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (3, 1, 0.75))
@@ -0,0 +1,212 @@
+from unittest import mock
+
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dictionary import dependencies
+from dictionary.factories import SportFactory, CategoryFactory, TermFactory, DefinitionFactory, TermOfTheDayFactory
+from dictionary.models import Term, Definition, TermOfTheDay
+from dictionary.pagination import CursorPaginator, InvalidCursor, CachedCountPaginator
+from dictionary.views import SearchResultsView
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        # pairs of terms with the same text in different sports so the id tiebreak is needed
+        for i in range(5):
+            TermFactory.create(sport=cls.sport, text=f'Term {i}')
+            TermFactory.create(text=f'Term {i}')
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Term.objects.all(), ('text', 'id'), per_page=3)
+        self.expected = list(Term.objects.order_by('text', 'id'))
+
+    def test_walk_forward_and_back(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+
+        self.assertEqual([term for page in pages for term in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+        self.assertIsNone(pages[0].previous_cursor)
+        self.assertIsNone(pages[-1].next_cursor)
+
+        # walking back from the last page gives the same pages
+        page = pages[-1]
+        for expected_page in reversed(pages[:-1]):
+            page = self.paginator.page(page.previous_cursor)
+            self.assertEqual(list(page), list(expected_page))
+            self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_descending_ordering(self):
+        paginator = CursorPaginator(Term.objects.all(), ('-text', '-id'), per_page=4)
+        page = paginator.page(paginator.page().next_cursor)
+        self.assertEqual(list(page), list(reversed(self.expected))[4:8])
+
+    def test_datetime_cursor(self):
+        definitions = [DefinitionFactory.create() for _ in range(3)]
+        paginator = CursorPaginator(Definition.objects.all(), ('-created', 'id'), per_page=1)
+        page = paginator.page(paginator.page().next_cursor)
+        self.assertEqual(list(page), [sorted(definitions, key=lambda d: (-d.created.timestamp(), d.id))[1]])
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.paginator.page(self.paginator.page().next_cursor)
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_invalid_cursor(self):
+        for cursor in ('not a cursor', 'WyJ4IiwgW11d', self.paginator.encode_cursor('n', self.expected[0])[:-2]):
+            with self.assertRaises(InvalidCursor):
+                self.paginator.page(cursor)
+
+
+@override_settings(CURSOR_PAGINATION=True)
+class CursorPaginatedViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        for i in range(30):
+            TermOfTheDayFactory.create(term=TermFactory.create(sport=cls.sport, text=f'Term {i:02}'))
+        cls.term = Term.objects.first()
+        for i in range(20):
+            DefinitionFactory.create(term=cls.term, net_votes=i % 4)
+
+    def test_sport_index(self):
+        url = reverse('sport_index', args=(self.sport.slug,))
+        response = self.client.get(url)
+        self.assertEqual([term.text for term in response.context['terms']], [f'Term {i:02}' for i in range(20)])
+        self.assertContains(response, 'Next &rsaquo;')
+        self.assertEqual(list(response.context['page_range_to_display']), [])
+
+        response = self.client.get(url, {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual([term.text for term in response.context['terms']], [f'Term {i:02}' for i in range(20, 30)])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_index(self):
+        response = self.client.get(reverse('index'))
+        page_obj = response.context['page_obj']
+        response = self.client.get(reverse('index'), {'cursor': page_obj.next_cursor})
+        days = [term_of_the_day.day for term_of_the_day in response.context['terms_of_the_day']]
+        self.assertEqual(days, list(TermOfTheDay.objects.order_by('-day').values_list('day', flat=True)[20:]))
+
+    def test_search(self):
+        response = self.client.get(reverse('search'), {'term': 'term'})
+        self.assertEqual(len(response.context['terms']), 20)
+        self.assertNotIn('results_count', response.context)
+
+    def test_term_detail_infinite_scroll_link(self):
+        url = reverse('term_detail', args=(self.sport.slug, self.term.slug))
+        response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertContains(response, f'href="?cursor={page_obj.next_cursor}"')
+
+        response = self.client.get(url, {'cursor': page_obj.next_cursor})
+        definitions = list(response.context['object_list']) + list(page_obj)
+        expected = Definition.objects.filter(term=self.term).order_by('-net_votes', '-created', 'id')
+        self.assertCountEqual(definitions, expected)
+        self.assertEqual(list(response.context['object_list']), list(expected[15:]))
+
+    def test_invalid_cursor_404s(self):
+        response = self.client.get(reverse('sport_index', args=(self.sport.slug,)), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        for i in range(10):
+            TermFactory.create(sport=cls.sport, text=f'Term {i}')
+
+    def test_count_is_cached(self):
+        cache_key = dependencies.cache_key('dictionary-count', [dependencies.TERM_LISTS], 'test')
+        paginator = CachedCountPaginator(Term.objects.all(), 3, cache_key=cache_key)
+        self.assertEqual(paginator.count, 10)
+
+        paginator = CachedCountPaginator(Term.objects.all(), 3, cache_key=cache_key)
+        with self.assertNumQueries(1):  # the cache lookup
+            self.assertEqual(paginator.count, 10)
+            self.assertEqual(paginator.num_pages, 4)
+
+    def test_sport_index_count_is_cached_until_its_sport_is_bumped(self):
+        url = reverse('sport_index', args=(self.sport.slug,))
+        self.assertEqual(self.client.get(url).context['paginator'].count, 10)
+
+        # update() sends no signals, so the count cached by the view is kept until the sport is bumped
+        Term.objects.filter(pk=Term.objects.first().pk).update(sport=SportFactory.create())
+        self.assertEqual(self.client.get(url).context['paginator'].count, 10)
+        dependencies.bump(dependencies.sport_dependency(self.sport.slug))
+        self.assertEqual(self.client.get(url).context['paginator'].count, 9)
+
+    def test_count_limit(self):
+        paginator = CachedCountPaginator(Term.objects.all(), 3, count_limit=4)
+        self.assertEqual(paginator.count, 4)
+        self.assertTrue(paginator.count_capped)
+
+        paginator = CachedCountPaginator(Term.objects.all(), 3, count_limit=10)
+        self.assertEqual(paginator.count, 10)
+        self.assertFalse(paginator.count_capped)
+
+    def test_pages_past_the_capped_count(self):
+        paginator = CachedCountPaginator(Term.objects.order_by('text'), 3, count_limit=4)
+        self.assertEqual(paginator.num_pages, 2)
+
+        page = paginator.page(3)
+        self.assertEqual([term.text for term in page], ['Term 6', 'Term 7', 'Term 8'])
+        self.assertTrue(page.has_next())
+        self.assertEqual(page.next_page_number(), 4)
+
+        page = paginator.page(4)
+        self.assertEqual([term.text for term in page], ['Term 9'])
+        self.assertFalse(page.has_next())
+        self.assertEqual((page.start_index(), page.end_index()), (10, 10))
+        with self.assertRaises(EmptyPage):
+            paginator.page(5)
+
+    def test_sport_index_count_invalidated_by_new_term(self):
+        url = reverse('sport_index', args=(self.sport.slug,))
+        self.assertEqual(self.client.get(url).context['paginator'].count, 10)
+
+        TermFactory.create(sport=self.sport)
+        self.assertEqual(self.client.get(url).context['paginator'].count, 11)
+
+    def test_sport_index_count_invalidated_by_categories_change(self):
+        category = CategoryFactory.create(sport=self.sport)
+        url = reverse('sport_index', args=(self.sport.slug,))
+        self.assertEqual(self.client.get(url, {'category': category.name}).context['paginator'].count, 0)
+
+        Term.objects.first().categories.add(category)
+        self.assertEqual(self.client.get(url, {'category': category.name}).context['paginator'].count, 1)
+
+    def test_term_detail_count_invalidated_by_new_definition(self):
+        term = Term.objects.first()
+        url = reverse('term_detail', args=(self.sport.slug, term.slug))
+        self.assertEqual(self.client.get(url).context['paginator'].count, 0)
+
+        DefinitionFactory.create(term=term)
+        self.assertEqual(self.client.get(url).context['paginator'].count, 1)
+
+    @mock.patch.object(SearchResultsView, 'count_limit', 4)
+    def test_search_count_capped(self):
+        response = self.client.get(reverse('search'), {'term': 'term'})
+        self.assertEqual(response.context['results_count'], 4)
+        self.assertContains(response, '4+ results for')
+
+    @mock.patch.object(SearchResultsView, 'count_limit', 4)
+    @mock.patch.object(SearchResultsView, 'paginate_by', 3)
+    def test_search_pages_past_the_capped_count(self):
+        response = self.client.get(reverse('search'), {'term': 'term', 'page': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['terms']), 3)
+        self.assertEqual(list(response.context['page_range_to_display']), [1, 2, 3, 4])
+        self.assertContains(response, 'page=4')
+
+        self.assertEqual(self.client.get(reverse('search'), {'term': 'term', 'page': 5}).status_code, 404)
@@ -0,0 +1,85 @@
+import factory
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dictionary.catalogue import sports_catalogue
+from dictionary.factories import SportFactory, CategoryFactory, UserFactory, TermFactory, DefinitionFactory, \
+    TermOfTheDayFactory, VoteFactory
+from dictionary.models import Vote
+from dictionary.signals import in_memory_term_indexes
+from dictionary.tests.query_plans import capture_queries, explain_query_plan, full_scans
+
+
+class QueryPlanTest(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every query the views run and fails if any of them reads a whole table
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory.create()
+        cls.sport = SportFactory.create()
+        cls.category = CategoryFactory.create(sport=cls.sport)
+        cls.terms = TermFactory.create_batch(30, sport=cls.sport, text=factory.Sequence(lambda n: f'Plan term {n}'))
+        for term in cls.terms[:10]:
+            term.categories.add(cls.category)
+        for term in cls.terms:
+            TermOfTheDayFactory.create(term=term)
+        for term in cls.terms[:5]:
+            for definition in DefinitionFactory.create_batch(3, term=term, user=cls.user):
+                VoteFactory.create(definition=definition, user=cls.user, vote_type=Vote.DOWNVOTE)
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+        # the in-memory indexes load every term once per process rather than on each request
+        for index in [sports_catalogue, *in_memory_term_indexes]:
+            index.ensure_built()
+
+    def assertNoFullScans(self, url, **data):
+        queries = capture_queries(lambda: self.assertEqual(self.client.get(url, data).status_code, 200))
+        self.assertTrue(queries)
+        self.assertEqual(full_scans(queries), [])
+
+    def assertViewsDontScan(self):
+        term = self.terms[0]
+        urls = [
+            (reverse('index'), {}),
+            (reverse('index'), {'page': 2}),
+            (self.sport.get_absolute_url(), {}),
+            (self.sport.get_absolute_url(), {'category': self.category.name}),
+            (term.get_absolute_url(), {}),
+            (reverse('search'), {'term': 'plan'}),
+            (reverse('autocomplete'), {'term': 'pla'}),
+        ]
+        for url, data in urls:
+            with self.subTest(url=url, data=data):
+                self.assertNoFullScans(url, **data)
+
+    def test_anonymous(self):
+        self.assertViewsDontScan()
+
+    def test_logged_in(self):
+        self.client.force_login(self.user)
+        self.assertViewsDontScan()
+        with self.subTest(url='profile'):
+            self.assertNoFullScans(reverse('profile'))
+
+    @override_settings(CURSOR_PAGINATION=True)
+    def test_cursor_pagination(self):
+        self.assertViewsDontScan()
+
+    def test_lists_are_read_in_order_from_their_indexes(self):
+        pages = [
+            (self.sport.get_absolute_url(), 'term_approved_in_sport_idx'),
+            (self.terms[0].get_absolute_url(), 'definition_ranking_idx'),
+        ]
+        for url, index in pages:
+            with self.subTest(url=url):
+                queries = capture_queries(lambda: self.client.get(url))
+                plans = [explain_query_plan(sql, params) for sql, params in queries]
+                plans = [plan for plan in plans if any(f'USING INDEX {index}' in detail for detail in plan)]
+                self.assertTrue(plans)
+                # the index already has the rows in the order they're listed in so they don't have to be sorted
+                for plan in plans:
+                    self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
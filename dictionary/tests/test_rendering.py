@@ -0,0 +1,135 @@
+import sys
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.template.defaultfilters import linebreaks_filter
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from dictionary import dependencies, rendering
+from dictionary.catalogue import sports_catalogue
+from dictionary.factories import SportFactory, TermFactory, DefinitionFactory
+from dictionary.models import Definition, Term
+from dictionary.rendering import RENDER_VERSION
+from dictionary.signals import in_memory_term_indexes
+from dictionary.templatetags.custom_urlize import custom_urlize, rendered_html
+
+
+class DefinitionRenderingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create()
+        cls.term = TermFactory.create(sport=cls.sport, text='Offside')
+
+    def create_linking_definition(self, term_slug=None):
+        return DefinitionFactory.create(term=TermFactory.create(sport=self.sport),
+                                        text=f'Not [[{term_slug or self.term.slug}]]\nsecond line')
+
+    def test_rendered_when_saved(self):
+        definition = self.create_linking_definition()
+        definition = Definition.objects.get(pk=definition.pk)
+        self.assertEqual(definition.rendered_version, RENDER_VERSION)
+        self.assertEqual(definition.rendered_html, linebreaks_filter(custom_urlize(definition.text, self.sport)))
+        self.assertIn(f'href="{self.term.get_absolute_url()}"', definition.rendered_summary)
+
+    def test_rendered_again_when_text_changes(self):
+        definition = DefinitionFactory.create(term=self.term, text='No links')
+        definition.text = f'[[{self.term.slug}|a link]]'
+        definition.save(update_fields=['text'])
+        self.assertIn('a link</a>', Definition.objects.get(pk=definition.pk).rendered_html)
+
+    def test_renamed_term_rerenders_linking_definitions(self):
+        definition = self.create_linking_definition()
+        term = Term.objects.get(pk=self.term.pk)
+        term.slug = 'renamed'
+        term.save()
+
+        definition = Definition.objects.get(pk=definition.pk)
+        self.assertEqual(definition.rendered_version, RENDER_VERSION)
+        self.assertIn(f'class="bad-link">{self.term.slug}</a>', definition.rendered_html)
+
+    def test_created_term_rerenders_linking_definitions(self):
+        definition = self.create_linking_definition('not-yet-a-term')
+        self.assertIn('bad-link', definition.rendered_html)
+
+        term = TermFactory.create(sport=self.sport, text='Not yet a term')
+        self.assertIn(f'href="{term.get_absolute_url()}"', Definition.objects.get(pk=definition.pk).rendered_html)
+
+    def test_deleted_term_rerenders_linking_definitions(self):
+        definition = self.create_linking_definition()
+        Term.objects.get(pk=self.term.pk).delete()
+        self.assertIn('bad-link', Definition.objects.get(pk=definition.pk).rendered_html)
+
+    def test_stale_definition_is_rendered_when_displayed(self):
+        definition = self.create_linking_definition()
+        Definition.objects.filter(pk=definition.pk).update(rendered_html='', rendered_version=0)
+        definition = Definition.objects.get(pk=definition.pk)
+        self.assertIn(f'href="{self.term.get_absolute_url()}"', rendered_html(definition))
+
+    def test_rendered_definitions_are_displayed_without_resolving_links(self):
+        definition = self.create_linking_definition()
+        response = self.client.get(definition.term.get_absolute_url())
+        self.assertContains(response, definition.rendered_html, html=True)
+
+    def test_rerendering_bumps_the_terms(self):
+        definition = self.create_linking_definition()
+        with mock.patch.object(dependencies, 'bump', wraps=dependencies.bump) as bump:
+            self.assertEqual(rendering.rerender_definitions([definition.id]), 1)
+        bump.assert_called_once_with(dependencies.term_dependency(definition.term_id))
+
+    def test_background_failures_are_logged(self):
+        def fail():
+            raise RuntimeError('database is locked')
+
+        with self.assertLogs('dictionary.rendering', 'ERROR') as logs:
+            rendering.get_executor().submit(rendering._in_background, fail).result()
+        self.assertIn('database is locked', logs.output[0])
+
+
+@override_settings(DEFINITION_RENDER_IN_BACKGROUND=True)
+class BackgroundRenderingTest(TransactionTestCase):
+    def tearDown(self):
+        # the rows are flushed after each test without the indexes being told
+        for index in [sports_catalogue, *in_memory_term_indexes]:
+            index.discard()
+
+    def test_linking_definitions_looked_up_once_committed(self):
+        sport = SportFactory.create()
+        term = TermFactory.create(sport=sport, text='Offside')
+        definition = DefinitionFactory.create(term=TermFactory.create(sport=sport), text=f'Not [[{term.slug}]]')
+
+        with mock.patch.object(rendering, 'definitions_linking_to', wraps=rendering.definitions_linking_to) as linking_to:
+            with transaction.atomic():
+                term.slug = 'renamed'
+                term.save()
+                linking_to.assert_not_called()
+            # the renderer runs one job at a time so this waits for the one submitted on commit
+            rendering.get_executor().submit(lambda: None).result()
+            linking_to.assert_called_once_with({(sport.slug, 'offside'), (sport.slug, 'renamed')})
+
+        self.assertIn('class="bad-link">offside</a>', Definition.objects.get(pk=definition.pk).rendered_html)
+
+
+class RenderDefinitionsCommandTest(TestCase):
+    def test_renders_stale_definitions(self):
+        term = TermFactory.create()
+        DefinitionFactory.create_batch(3, term=term, text=f'[[{term.slug}]]')
+        Definition.objects.update(rendered_html='', rendered_summary='', rendered_version=0)
+
+        out = StringIO()
+        sys.stdout = out
+        call_command('renderdefinitions', processes=1, batch_size=2, stale=True, stdout=out)
+        self.assertIn('Rendered 3 definitions', out.getvalue())
+        self.assertFalse(Definition.objects.exclude(rendered_version=RENDER_VERSION).exists())
+        self.assertFalse(Definition.objects.filter(rendered_html='').exists())
+
+    def test_renders_in_this_process_without_fork(self):
+        DefinitionFactory.create_batch(3)
+
+        out = StringIO()
+        sys.stdout = out
+        # the in-memory test database can't be shared between processes, so this would fail if they were started
+        with mock.patch('dictionary.management.commands.renderdefinitions.CAN_FORK', False):
+            call_command('renderdefinitions', processes=4, batch_size=2, stdout=out)
+        self.assertIn('Rendered 3 definitions with 1 processes', out.getvalue())
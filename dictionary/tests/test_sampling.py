@@ -0,0 +1,160 @@
+import random
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from dictionary.factories import TermFactory
+from dictionary.models import Term
+from dictionary.sampling import TermSampler, term_sampler
+from dictionary.signals import in_memory_term_indexes
+
+
+class TermSamplerTest(TestCase):
+    def setUp(self):
+        self.sampler = TermSampler()
+        self.sampler.load([(term_id, f'Term {term_id}', 'football', f'term-{term_id}') for term_id in range(1, 11)])
+        self.rng = random.Random(0)
+
+    def test_remove_keeps_array_dense(self):
+        self.sampler.remove_term(3)
+        self.sampler.remove_term(10)
+        self.sampler.remove_term(99)
+        self.assertEqual(sorted(self.sampler.term_ids), [1, 2, 4, 5, 6, 7, 8, 9])
+        for term_id, position in self.sampler.positions.items():
+            self.assertEqual(self.sampler.term_ids[position], term_id)
+
+    def test_random_id(self):
+        picked = {self.sampler.random_id(self.rng) for _ in range(200)}
+        self.assertEqual(picked, set(range(1, 11)))
+
+    def test_random_id_when_empty(self):
+        self.assertIsNone(TermSampler().random_id())
+
+    def test_sample_ids_are_distinct(self):
+        term_ids = self.sampler.sample_ids(5, rng=self.rng)
+        self.assertEqual(len(term_ids), 5)
+        self.assertEqual(len(set(term_ids)), 5)
+
+    def test_sample_ids_excludes(self):
+        for k in (1, 3, 6):
+            term_ids = self.sampler.sample_ids(k, exclude=[1, 2, 3, 4], rng=self.rng)
+            self.assertEqual(len(term_ids), k)
+            self.assertFalse({1, 2, 3, 4} & set(term_ids))
+
+    def test_sample_more_than_available(self):
+        term_ids = self.sampler.sample_ids(20, exclude=[1, 42], rng=self.rng)
+        self.assertEqual(sorted(term_ids), list(range(2, 11)))
+
+
+class ApprovedTermManagerSamplingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.terms = TermFactory.create_batch(5)
+
+    def test_random(self):
+        self.assertIn(Term.approved_terms.random(), self.terms)
+
+    def test_random_is_a_single_query(self):
+        term_sampler.ensure_built()
+        with override_settings(IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL=60):
+            term_sampler.ensure_built()
+            with self.assertNumQueries(1):
+                Term.approved_terms.random()
+
+    def test_random_follows_approval_changes(self):
+        for term in self.terms[1:]:
+            term = Term.objects.get(pk=term.pk)
+            term.approvedFl = False
+            term.save()
+        for _ in range(10):
+            self.assertEqual(Term.approved_terms.random(), self.terms[0])
+
+    def test_random_rebuilds_stale_sampler(self):
+        term_sampler.ensure_built()
+        # a queryset update doesn't send signals so the sampler still holds the disapproved terms
+        Term.objects.exclude(pk=self.terms[0].pk).update(approvedFl=False)
+        for _ in range(10):
+            self.assertEqual(Term.approved_terms.random(), self.terms[0])
+
+    def test_sample(self):
+        terms = Term.approved_terms.sample(3, exclude=[self.terms[0].pk])
+        self.assertEqual(len(terms), 3)
+        self.assertNotIn(self.terms[0], terms)
+        self.assertEqual(len(Term.approved_terms.sample(10)), 5)
+
+
+class RandomTermView(TestCase):
+    def test_redirects_to_a_term(self):
+        term = TermFactory.create()
+        response = self.client.get(reverse('random_term'))
+        self.assertRedirects(response, term.get_absolute_url())
+
+    def test_404_when_there_are_no_terms(self):
+        response = self.client.get(reverse('random_term'))
+        self.assertEqual(response.status_code, 404)
+
+
+class SamplerVersionsTest(TestCase):
+    """
+    Two samplers standing in for the copies held by two processes
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.terms = TermFactory.create_batch(3)
+
+    def setUp(self):
+        self.first, self.second = TermSampler(), TermSampler()
+        self.first.ensure_built()
+        self.second.ensure_built()
+
+    def test_change_patches_a_current_copy_in_place(self):
+        self.first.term_deleted(self.terms[0].id)
+        self.assertTrue(self.first._built)
+        self.assertNotIn(self.terms[0].id, self.first.positions)
+
+        # the other copy missed the change so it's rebuilt
+        self.second.ensure_built()
+        self.assertEqual(self.second._version, self.first._version)
+
+    def test_changes_made_from_the_same_version_at_once(self):
+        version = cache.get(TermSampler.version_cache_key)
+        self.first.term_deleted(self.terms[0].id)
+        # the second process read the version before the first one stored its change
+        cache.set(TermSampler.version_cache_key, version, None)
+        self.second.term_deleted(self.terms[1].id)
+
+        self.assertFalse(self.second._built)
+        self.first.ensure_built()
+        # rebuilt from the database, which still has both terms
+        self.assertIn(self.terms[0].id, self.first.positions)
+        self.assertEqual(self.first._version, self.second._current_version())
+
+
+@override_settings(IN_MEMORY_INDEX_CHANGES_ON_COMMIT=True)
+class SamplerTransactionTest(TransactionTestCase):
+    def setUp(self):
+        term_sampler.ensure_built()
+
+    def tearDown(self):
+        # the rows are flushed after each test without the indexes being told
+        for index in in_memory_term_indexes:
+            index.discard()
+
+    def test_change_applied_once_committed(self):
+        with transaction.atomic():
+            term = TermFactory.create()
+            self.assertNotIn(term.id, term_sampler.positions)
+        self.assertIn(term.id, term_sampler.positions)
+
+    def test_rolled_back_change_never_applied(self):
+        try:
+            with transaction.atomic():
+                term_id = TermFactory.create().id
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        term_sampler.ensure_built()
+        self.assertNotIn(term_id, term_sampler.positions)
@@ -0,0 +1,74 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from dictionary import search
+from dictionary.factories import SportFactory, TermFactory, DefinitionFactory
+from dictionary.models import Term
+
+
+class FullTextSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sport = SportFactory.create(name='Football')
+        cls.offside = TermFactory.create(sport=cls.sport, text='Offside')
+        cls.offside_trap = TermFactory.create(sport=cls.sport, text='Offside trap')
+        cls.nutmeg = TermFactory.create(sport=cls.sport, text='Nutmeg')
+        DefinitionFactory.create(term=cls.nutmeg, text='Playing the ball through the legs of an opponent')
+
+    def search(self, search_key):
+        return list(search.search_terms(Term.approved_terms.all(), search_key))
+
+    def test_fts5_available(self):
+        self.assertTrue(search.is_available())
+
+    def test_build_match_query_quotes_tokens(self):
+        self.assertEqual(search.build_match_query('Off "side" OR'), '"off"* "side"* "or"*')
+        self.assertEqual(search.build_match_query('  '), '')
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('offs'), [self.offside, self.offside_trap])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('offside tr'), [self.offside_trap])
+
+    def test_matches_definition_text(self):
+        self.assertEqual(self.search('opponent'), [self.nutmeg])
+
+    def test_term_text_ranked_above_definition_text(self):
+        legs = TermFactory.create(sport=self.sport, text='Legs')
+        self.assertEqual(self.search('legs'), [legs, self.nutmeg])
+
+    def test_index_follows_term_changes(self):
+        offside = Term.objects.get(pk=self.offside.pk)
+        offside.text = 'Onside'
+        offside.save()
+        self.assertEqual(self.search('onside'), [offside])
+        self.assertEqual(self.search('offside'), [self.offside_trap])
+
+        Term.objects.filter(pk=self.offside_trap.pk).delete()
+        self.assertEqual(self.search('offside'), [])
+
+    def test_index_follows_definition_changes(self):
+        definition = self.nutmeg.definitions.get()
+        definition.deleteFl = True
+        definition.save()
+        self.assertEqual(self.search('opponent'), [])
+
+    def test_special_characters_in_search_key(self):
+        self.assertEqual(self.search('offside* trap)'), [self.offside_trap])
+        self.assertEqual(self.search('"offside"'), [self.offside, self.offside_trap])
+
+    def test_rebuild_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+        self.assertEqual(self.search('offside'), [])
+
+        self.assertEqual(search.rebuild_index(batch_size=2), Term.objects.count())
+        self.assertEqual(self.search('offside'), [self.offside, self.offside_trap])
+
+    def test_search_view_uses_index(self):
+        response = self.client.get(reverse('search') + '?term=offs')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['terms']), [self.offside, self.offside_trap])
+        self.assertEqual(response.context['results_count'], 2)
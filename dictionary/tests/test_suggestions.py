@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from dictionary.factories import SportFactory, TermFactory
+from dictionary.models import Term
+from dictionary.suggestions import TrigramIndex, trigram_index, did_you_mean
+
+
+class TrigramIndexTest(TestCase):
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.index.add_term(1, 'Offside', 'football', 'offside')
+        self.index.add_term(2, 'Offside trap', 'football', 'offside-trap')
+        self.index.add_term(3, 'Birdie', 'golf', 'birdie')
+        self.index.add_term(4, 'Googly', 'cricket', 'googly')
+
+    def test_similar_words(self):
+        self.assertEqual(self.index.similar_words('offsides')[0][1], 'offside')
+        self.assertEqual(self.index.similar_words('birdy')[0][1], 'birdie')
+
+    def test_no_similar_words(self):
+        self.assertEqual(self.index.similar_words('zzzz'), [])
+
+    def test_suggest_corrects_misspelt_words_only(self):
+        self.assertEqual(self.index.suggest('offsides trapp'), ['offside trap'])
+
+    def test_suggest_nothing_if_nothing_misspelt(self):
+        self.assertEqual(self.index.suggest('googly'), [])
+
+    def test_removed_term_words_not_suggested(self):
+        self.index.remove_term(3)
+        self.assertEqual(self.index.suggest('birdy'), [])
+
+        self.index.add_term(3, 'Birdie', 'golf', 'birdie')
+        self.assertEqual(self.index.suggest('birdy'), ['birdie'])
+
+
+class DidYouMeanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sport = SportFactory.create(name='Golf')
+        cls.birdie = TermFactory.create(sport=sport, text='Birdie')
+
+    def test_index_follows_term_changes(self):
+        self.assertEqual(did_you_mean('birdy'), ['birdie'])
+
+        birdie = Term.objects.get(pk=self.birdie.pk)
+        birdie.text = 'Bogey'
+        birdie.save()
+        self.assertEqual(did_you_mean('bogy'), ['bogey'])
+        self.assertEqual(did_you_mean('birdy'), [])
+
+    def test_stale_index_rebuilt(self):
+        trigram_index.ensure_built()
+        Term.objects.filter(pk=self.birdie.pk).update(text='Eagle')
+        trigram_index.invalidate()
+        self.assertEqual(did_you_mean('eagel'), ['eagle'])
+
+    def test_search_view_shows_did_you_mean(self):
+        response = self.client.get(reverse('search') + '?term=birdy')
+        self.assertEqual(response.context['did_you_mean'], ['birdie'])
+        self.assertContains(response, 'Did you mean')
+        self.assertContains(response, '<a href="/search/?term=birdie">birdie</a>', html=True)
+
+    def test_search_view_no_did_you_mean_when_results_found(self):
+        response = self.client.get(reverse('search') + '?term=birdie')
+        self.assertNotIn('did_you_mean', response.context)
+        self.assertNotContains(response, 'Did you mean')
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 
@@ -104,6 +105,19 @@ class SportView(TestCase):
         terms = Term.objects.all()
         self.assertEqual(terms.count(), 101)
 
+    def test_definition_counts_stored_and_counted_agree(self):
+        term = Term.objects.filter(sport=self.sport).first()
+        DefinitionFactory.create_batch(2, term=term)
+        DefinitionFactory.create(term=term, deleteFl=True)
+        DefinitionFactory.create(term=term, approvedFl=False)
+
+        for stored in (True, False):
+            with self.settings(STORED_DEFINITION_COUNTS=stored):
+                response = self.client.get(reverse('sport_index', kwargs={'sport_slug': self.sport.slug}))
+                counts = {term.pk: term.definition_count for term in response.context['terms']}
+                self.assertEqual(counts[term.pk], 2)
+                self.assertContains(response, '2 definitions')
+
 
 class TermDetailView(TestCase):
     @classmethod
@@ -169,3 +183,39 @@ class TermDetailView(TestCase):
 
         self.assertEqual(response.context['object_list'].count(), 10)
         self.assertEqual(definitions_for_term.count(), 11)
+
+    def test_top_definition(self):
+        top_definition = DefinitionFactory.create(term=self.term, user=self.user, num_upvotes=3)
+
+        for stored in (True, False):
+            with self.settings(STORED_DEFINITION_COUNTS=stored):
+                response = self.client.get(reverse('term_detail',
+                                                   kwargs={'sport_slug': self.term.sport.slug,
+                                                           'term_slug': self.term.slug}
+                                                   ))
+                self.assertEqual(response.context['top_definition_id'], top_definition.id)
+                self.assertContains(response, 'Top definition', count=1)
+
+    def count_queries(self, url):
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = self.client.get(url)
+        return response, queries
+
+    def test_vote_status_is_loaded_in_one_query(self):
+        url = reverse('term_detail', kwargs={'sport_slug': self.term.sport.slug, 'term_slug': self.term.slug})
+        self.client.force_login(self.user)
+        definitions = list(Definition.objects.filter(term=self.term))
+        definitions[0].upvote(self.user)
+        definitions[1].downvote(self.user)
+
+        # render once so the counts & in-memory indexes are cached
+        self.client.get(url)
+        response, queries = self.count_queries(url)
+        self.assertContains(response, 'voteButton upvoted', count=1)
+        self.assertContains(response, 'voteButton downvoted', count=1)
+        self.assertEqual(sum('FROM "dictionary_vote"' in sql for sql in queries), 1)
+
+        DefinitionFactory.create_batch(5, term=self.term, user=self.user)
+        self.client.get(url)
+        self.assertEqual(len(self.count_queries(url)[1]), len(queries))
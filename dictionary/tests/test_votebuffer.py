@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from dictionary.factories import UserFactory, TermFactory, DefinitionFactory
+from dictionary.models import Definition, Term, Vote
+from dictionary.votebuffer import VoteBuffer, buffer_vote, PENDING_SUFFIX
+
+
+class VoteBufferTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = UserFactory.create_batch(3)
+        cls.term = TermFactory.create()
+        cls.definition = DefinitionFactory.create(term=cls.term)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.vote_buffer = VoteBuffer(self.directory.name, fsync=False, batch_size=2)
+
+    def assertCounts(self, num_upvotes, num_downvotes):
+        definition = Definition.objects.get(pk=self.definition.pk)
+        self.assertEqual((definition.num_upvotes, definition.num_downvotes, definition.net_votes),
+                         (num_upvotes, num_downvotes, num_upvotes - num_downvotes))
+        self.assertEqual(definition.votes.filter(vote_type=Vote.UPVOTE).count(), num_upvotes)
+        self.assertEqual(definition.votes.filter(vote_type=Vote.DOWNVOTE).count(), num_downvotes)
+
+
+class VoteBufferTest(VoteBufferTestCase):
+    def test_flush_applies_buffered_votes(self):
+        for user in self.users:
+            self.vote_buffer.append(self.definition.pk, user.pk, Vote.UPVOTE)
+        self.assertCounts(0, 0)
+
+        self.assertEqual(self.vote_buffer.flush(), (3, 3))
+        self.assertCounts(3, 0)
+        self.assertEqual(Term.objects.get(pk=self.term.pk).top_definition_id, self.definition.pk)
+
+        # nothing left to flush
+        self.assertEqual(self.vote_buffer.flush(), (0, 0))
+
+    def test_toggles_are_folded_per_user_and_definition(self):
+        user = self.users[0]
+        Definition.objects.get(pk=self.definition.pk).upvote(user)
+
+        # upvoting again removes the upvote, then a downvote & an upvote replaces it
+        for vote_type in (Vote.UPVOTE, Vote.DOWNVOTE, Vote.UPVOTE):
+            self.vote_buffer.append(self.definition.pk, user.pk, vote_type)
+        self.vote_buffer.append(self.definition.pk, self.users[1].pk, Vote.DOWNVOTE)
+        self.vote_buffer.append(self.definition.pk, self.users[1].pk, Vote.DOWNVOTE)
+
+        # user ends up with the upvote they started with so no votes change
+        self.assertEqual(self.vote_buffer.flush(), (5, 0))
+        self.assertCounts(1, 0)
+
+    def test_votes_on_deleted_definitions_are_dropped(self):
+        other_definition = DefinitionFactory.create()
+        self.vote_buffer.append(other_definition.pk, self.users[0].pk, Vote.UPVOTE)
+        self.vote_buffer.append(self.definition.pk, self.users[0].pk, Vote.UPVOTE)
+        other_definition.delete()
+
+        self.assertEqual(self.vote_buffer.flush(), (2, 1))
+        self.assertCounts(1, 0)
+
+    def test_incomplete_line_is_skipped(self):
+        self.vote_buffer.append(self.definition.pk, self.users[0].pk, Vote.UPVOTE)
+        with open(self.vote_buffer.log_path, 'a') as f:
+            f.write('{"d": ')
+
+        self.assertEqual(self.vote_buffer.flush(), (1, 1))
+        self.assertCounts(1, 0)
+
+    def test_replay_after_crash_before_applying(self):
+        for user in self.users:
+            self.vote_buffer.append(self.definition.pk, user.pk, Vote.DOWNVOTE)
+        # resolve the votes but crash before applying them, leaving the pending file behind too
+        self.vote_buffer._rotate_log()
+        pending_path = self.vote_buffer._files(PENDING_SUFFIX)[0]
+        with open(pending_path) as f:
+            pending = f.read()
+        self.vote_buffer._resolve([pending_path])
+        with open(pending_path, 'w') as f:
+            f.write(pending)
+
+        self.vote_buffer.flush()
+        self.assertCounts(0, 3)
+        self.assertEqual(os.listdir(self.directory.name), ['flush.lock'])
+
+    def test_replay_after_crash_part_way_through_applying(self):
+        for user in self.users:
+            self.vote_buffer.append(self.definition.pk, user.pk, Vote.UPVOTE)
+        self.vote_buffer._rotate_log()
+        resolved_path, _ = self.vote_buffer._resolve(self.vote_buffer._files(PENDING_SUFFIX))
+
+        # apply the first batch of the resolved votes only
+        with open(resolved_path) as f:
+            first_vote = json.loads(f.readline())
+        Definition.objects.get(pk=first_vote[0]).upvote(self.users[0])
+        self.assertCounts(1, 0)
+
+        self.vote_buffer.flush()
+        self.assertCounts(3, 0)
+
+
+class BufferedVoteViewsTest(VoteBufferTestCase):
+    def test_vote_is_buffered(self):
+        with override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_DIR=self.directory.name):
+            self.client.force_login(self.users[0])
+            response = self.client.post(f'/ajax/upvote/{self.definition.pk}')
+            self.assertEqual(json.loads(response.content), {'net_votes': 1})
+            self.assertCounts(0, 0)
+
+            out = StringIO()
+            sys.stdout = out
+            call_command('flushvotes', once=True, stdout=out)
+            self.assertIn('Flushed 1 buffered votes (1 votes changed)', out.getvalue())
+            self.assertCounts(1, 0)
+
+            # a second click removes the upvote
+            response = self.client.post(f'/ajax/upvote/{self.definition.pk}')
+            self.assertEqual(json.loads(response.content), {'net_votes': 0})
+
+    def test_buffer_vote_on_missing_definition(self):
+        with self.assertRaises(Definition.DoesNotExist):
+            buffer_vote(0, self.users[0].pk, Vote.UPVOTE, vote_buffer=self.vote_buffer)
+        self.assertFalse(os.path.exists(self.vote_buffer.log_path))
@@ -0,0 +1,104 @@
+import json
+
+from django.test import TestCase
+
+from dictionary import votes
+from dictionary.factories import UserFactory, TermFactory, DefinitionFactory
+from dictionary.models import Definition, Term, Vote
+
+
+class VoteServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory.create()
+        cls.term = TermFactory.create()
+        cls.definition = DefinitionFactory.create(term=cls.term)
+
+    def assertCounts(self, num_upvotes, num_downvotes):
+        definition = Definition.objects.get(pk=self.definition.pk)
+        self.assertEqual((definition.num_upvotes, definition.num_downvotes, definition.net_votes),
+                         (num_upvotes, num_downvotes, num_upvotes - num_downvotes))
+        self.assertEqual(definition.votes.filter(vote_type=Vote.UPVOTE).count(), num_upvotes)
+        self.assertEqual(definition.votes.filter(vote_type=Vote.DOWNVOTE).count(), num_downvotes)
+
+    def test_cast_vote(self):
+        vote_counts = votes.cast_vote(self.definition.pk, self.user.pk, Vote.UPVOTE)
+        self.assertEqual(vote_counts, (1, 0, 1))
+        self.assertCounts(1, 0)
+
+    def test_cast_vote_twice(self):
+        votes.cast_vote(self.definition.pk, self.user.pk, Vote.UPVOTE)
+        with self.assertRaises(votes.AlreadyVoted):
+            votes.cast_vote(self.definition.pk, self.user.pk, Vote.UPVOTE)
+        self.assertCounts(1, 0)
+
+    def test_cast_vote_replaces_opposite_vote(self):
+        votes.cast_vote(self.definition.pk, self.user.pk, Vote.UPVOTE)
+        vote_counts = votes.cast_vote(self.definition.pk, self.user.pk, Vote.DOWNVOTE)
+        self.assertEqual(vote_counts.net_votes, -1)
+        self.assertCounts(0, 1)
+
+    def test_retract_vote(self):
+        votes.cast_vote(self.definition.pk, self.user.pk, Vote.DOWNVOTE)
+        self.assertEqual(votes.retract_vote(self.definition.pk, self.user.pk, Vote.DOWNVOTE).net_votes, 0)
+        self.assertCounts(0, 0)
+
+        # retracting a vote which doesn't exist changes nothing
+        self.assertEqual(votes.retract_vote(self.definition.pk, self.user.pk, Vote.DOWNVOTE).net_votes, 0)
+        self.assertCounts(0, 0)
+
+    def test_toggle_vote(self):
+        self.assertEqual(votes.toggle_vote(self.definition.pk, self.user.pk, Vote.UPVOTE).net_votes, 1)
+        self.assertEqual(votes.toggle_vote(self.definition.pk, self.user.pk, Vote.DOWNVOTE).net_votes, -1)
+        self.assertEqual(votes.toggle_vote(self.definition.pk, self.user.pk, Vote.DOWNVOTE).net_votes, 0)
+        self.assertCounts(0, 0)
+
+    def test_vote_updates_top_definition(self):
+        other_definition = DefinitionFactory.create(term=self.term)
+        votes.cast_vote(self.definition.pk, self.user.pk, Vote.UPVOTE)
+        self.assertEqual(Term.objects.get(pk=self.term.pk).top_definition_id, self.definition.pk)
+
+        votes.cast_vote(other_definition.pk, self.user.pk, Vote.UPVOTE)
+        votes.cast_vote(other_definition.pk, UserFactory.create().pk, Vote.UPVOTE)
+        self.assertEqual(Term.objects.get(pk=self.term.pk).top_definition_id, other_definition.pk)
+
+    def test_vote_on_missing_definition_is_rolled_back(self):
+        with self.assertRaises(Definition.DoesNotExist):
+            votes.cast_vote(0, self.user.pk, Vote.UPVOTE)
+        self.assertFalse(Vote.objects.filter(definition_id=0).exists())
+
+
+class VoteViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory.create()
+        cls.definition = DefinitionFactory.create()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post_vote(self, action, definition_pk):
+        return self.client.post(f'/ajax/{action}/{definition_pk}')
+
+    def test_upvote_toggles(self):
+        response = self.post_vote('upvote', self.definition.pk)
+        self.assertEqual(json.loads(response.content), {'net_votes': 1})
+
+        response = self.post_vote('upvote', self.definition.pk)
+        self.assertEqual(json.loads(response.content), {'net_votes': 0})
+
+    def test_downvote_replaces_upvote(self):
+        self.post_vote('upvote', self.definition.pk)
+        response = self.post_vote('downvote', self.definition.pk)
+        self.assertEqual(json.loads(response.content), {'net_votes': -1})
+
+    def test_vote_on_missing_definition_404s(self):
+        self.assertEqual(self.post_vote('upvote', 0).status_code, 404)
+
+    def test_delete_definition_keeps_vote_counters(self):
+        votes.cast_vote(self.definition.pk, self.user.pk, Vote.UPVOTE)
+
+        self.client.post(f'/ajax/delete-definition/{self.definition.pk}')
+        definition = Definition.objects.get(pk=self.definition.pk)
+        self.assertTrue(definition.deleteFl)
+        self.assertEqual(definition.net_votes, 1)
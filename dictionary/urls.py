@@ -15,4 +15,7 @@ urlpatterns += [
     path('ajax/upvote/<int:definition_pk>', views.upvote),
     path('ajax/downvote/<int:definition_pk>', views.downvote),
     path('ajax/delete-definition/<int:definition_pk>', views.delete_definition),
+    path('ajax/autocomplete/', views.autocomplete_terms, name='autocomplete'),
+    path('ajax/cache-stats/', views.cache_stats, name='cache_stats'),
+    path('ajax/page-cache-stats/', views.page_cache_stats, name='page_cache_stats'),
 ]
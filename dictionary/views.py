@@ -1,12 +1,21 @@
+import hashlib
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
-from django.http import HttpResponse
+from django.core.cache import caches
+from django.db.models import Count, F, Q
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.views import generic
 from django.views.generic.list import MultipleObjectMixin
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 
+from . import autocomplete, dependencies, middleware, rendering, search, suggestions, votebuffer, votes
+from .catalogue import sport_slugs_to_ids
+from .pagination import CachedCountMixin, CursorPaginationMixin
 from .models import Term, Category, Definition, Sport, TermOfTheDay, Vote
 
 try:
@@ -15,11 +24,82 @@ except ImportError:
     import json
 
 
+def annotate_definition_count(queryset, term_lookup=''):
+    """
+    Annotates definition_count, the number of approved definitions of each term, onto a queryset of terms or of models
+    related to a term through term_lookup. Reads the stored Term.num_definitions counter when STORED_DEFINITION_COUNTS
+    is on, otherwise counts the definitions.
+    """
+    if settings.STORED_DEFINITION_COUNTS:
+        return queryset.annotate(definition_count=F(f'{term_lookup}num_definitions'))
+
+    definitions = f'{term_lookup}definitions'
+    return queryset.annotate(definition_count=Count(
+        definitions, distinct=True,
+        filter=Q(**{f'{definitions}__approvedFl': True, f'{definitions}__deleteFl': False})))
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional GETs with a 304 Not Modified before the view queries its list or renders anything. The ETag
+    and Last-Modified validators are built from the generations of the dependencies returned by
+    get_validator_dependencies, which runs before the view so can only go by the URL, and of the sports list shown on
+    every page. get_validator_dependencies returns None to not send validators.
+
+    The generations are also attached to the response as dependency_generations for the page cache. They're read before
+    the view reads any rows, so a change committed while the page is being rendered leaves the cached page stale.
+    """
+
+    def get_validator_dependencies(self):
+        return []
+
+    def dispatch(self, request, *args, **kwargs):
+        validators = {}
+
+        def get_validator(name):
+            if not validators:
+                validators.update(self.get_validators())
+            return validators[name]
+
+        response = condition(etag_func=lambda *args, **kwargs: get_validator('etag'),
+                             last_modified_func=lambda *args, **kwargs: get_validator('last_modified'))\
+            (super().dispatch)(request, *args, **kwargs)
+        if validators.get('dependency_generations') is not None:
+            response.dependency_generations = validators['dependency_generations']
+        return response
+
+    def get_validators(self):
+        page_dependencies = self.get_validator_dependencies()
+        if page_dependencies is None:
+            return {'etag': None, 'last_modified': None, 'dependency_generations': None}
+
+        page_dependencies = sorted({dependencies.SPORTS_LIST, *page_dependencies})
+        generations = dependencies.generations(page_dependencies)
+        # the terms of the day up to today are listed, so pages change at midnight too, and logged in users see their
+        # own votes & name
+        today = date.today()
+        key = [self.request.user.pk, today.isoformat(), page_dependencies, generations]
+        start_of_today = datetime.combine(today, datetime.min.time()).timestamp()
+        return {
+            'etag': hashlib.md5(json.dumps(key, separators=(',', ':')).encode()).hexdigest(),
+            'last_modified': datetime.fromtimestamp(max(dependencies.last_changed(generations), start_of_today),
+                                                    tz=timezone.utc),
+            'dependency_generations': dict(zip(page_dependencies, generations)),
+        }
+
+
 def get_page_range_to_display_for_pagination(page_obj):
+    # cursor pages don't know the total number of pages so only get next/previous links
+    if getattr(page_obj, 'is_cursor_page', False):
+        return range(0)
+
     display_left = display_right = 5
 
     current_page = page_obj.number
     last_page = page_obj.paginator.page_range.stop - 1
+    if getattr(page_obj.paginator, 'count_capped', False):
+        # only the pages up to the capped count are known, plus the next one when there are more rows
+        last_page = max(last_page, current_page + page_obj.has_next())
 
     if current_page <= display_left:
         display_left = current_page - 1
@@ -37,13 +117,27 @@ def get_page_range_to_display_for_pagination(page_obj):
     return range(current_page - display_left, current_page + display_right + 1)
 
 
-class IndexView(generic.ListView):
+class IndexView(ConditionalGetMixin, CursorPaginationMixin, CachedCountMixin, generic.ListView):
     context_object_name = 'terms_of_the_day'
     template_name = 'dictionary/index.html'
     paginate_by = 20
     paginate_orphans = 5
-    queryset = TermOfTheDay.terms.today_and_before()\
-        .annotate(num_definitions=Count('term__definitions', filter=Q(term__definitions__deleteFl=False)))
+    cursor_ordering = ('-day',)
+
+    def get_queryset(self):
+        terms_of_the_day = TermOfTheDay.terms.today_and_before().select_related('term__sport')\
+            .prefetch_related('term__categories')
+        return annotate_definition_count(terms_of_the_day, term_lookup='term__')
+
+    def get_count_cache_key_parts(self):
+        # today's date is part of the key as a new term of the day joins the list each day
+        return 'index', date.today().isoformat()
+
+    def get_cache_dependencies(self):
+        return [dependencies.TOTD_LIST]
+
+    def get_validator_dependencies(self):
+        return self.get_cache_dependencies()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -55,23 +149,37 @@ class IndexView(generic.ListView):
         return context
 
 
-class SearchResultsView(generic.ListView):
+class SearchResultsView(CursorPaginationMixin, CachedCountMixin, generic.ListView):
     context_object_name = 'terms'
     template_name = 'dictionary/search.html'
     paginate_by = 20
     paginate_orphans = 5
+    # keyset pagination needs a real column to seek on so cursor paginated results are alphabetical, not ranked
+    cursor_ordering = ('text', 'id')
+    count_limit = settings.SEARCH_RESULTS_COUNT_LIMIT
+    count_cache_timeout = settings.SEARCH_RESULTS_COUNT_CACHE_TIMEOUT
+
+    def get_count_cache_key_parts(self):
+        search_key = ' '.join((self.request.GET.get('term') or '').lower().split())
+        return 'search', search_key
+
+    def get_cache_dependencies(self):
+        return [dependencies.TERM_LISTS]
 
     def get_queryset(self):
         search_key = self.request.GET.get('term')
-        terms = Term.approved_terms.select_related('sport').prefetch_related('categories')\
-            .filter(text__icontains=search_key)\
-            .annotate(num_definitions=Count('definitions', filter=Q(definitions__deleteFl=False)))
+        terms = Term.approved_terms.select_related('sport').prefetch_related('categories')
+        terms = annotate_definition_count(search.search_terms(terms, search_key))
         return terms
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_term'] = self.request.GET.get('term')
-        context['results_count'] = context['paginator'].count
+        if not self.uses_cursor_pagination():
+            context['results_count'] = context['paginator'].count
+            context['results_count_capped'] = context['paginator'].count_capped
+        if not context['object_list']:
+            context['did_you_mean'] = suggestions.did_you_mean(context['search_term'])
 
         page_obj = context['page_obj']
         page_range_to_display = get_page_range_to_display_for_pagination(page_obj)
@@ -81,11 +189,12 @@ class SearchResultsView(generic.ListView):
         return context
 
 
-class SportIndexView(generic.ListView):
+class SportIndexView(ConditionalGetMixin, CursorPaginationMixin, CachedCountMixin, generic.ListView):
     context_object_name = 'terms'
     template_name = 'dictionary/sport_index.html'
     paginate_by = 20
     paginate_orphans = 5
+    cursor_ordering = ('text', 'id')
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -98,17 +207,33 @@ class SportIndexView(generic.ListView):
         category_list = self.request.GET.getlist('category')
 
         if not category_list:
-            return Term.approved_terms.select_related('sport').prefetch_related('categories')\
-                .filter(sport=self.sport)\
-                .annotate(num_definitions=Count('definitions', filter=Q(definitions__deleteFl=False)))
+            terms = Term.approved_terms.select_related('sport').prefetch_related('categories')\
+                .filter(sport=self.sport)
+            return annotate_definition_count(terms)
         else:
             categories = []
             for category_name in category_list:
                 category = get_object_or_404(Category, sport=self.sport, name=category_name)
                 categories.append(category)
             self.categories_filtered_by = categories
-            return Term.approved_terms.filter(sport=self.sport, categories__in=categories)\
-                .annotate(num_catgories=Count('categories')).filter(num_catgories=len(categories))
+            terms = Term.approved_terms.select_related('sport').prefetch_related('categories')\
+                .filter(sport=self.sport, categories__in=categories)\
+                .annotate(num_catgories=Count('categories', distinct=True)).filter(num_catgories=len(categories))
+            return annotate_definition_count(terms)
+
+    def get_count_cache_key_parts(self):
+        category_ids = sorted(category.id for category in self.categories_filtered_by)
+        return 'sport', self.sport.id, category_ids
+
+    def get_cache_dependencies(self):
+        return [dependencies.sport_dependency(self.sport.slug)]
+
+    def get_validator_dependencies(self):
+        sport_slug = self.kwargs['sport_slug']
+        # the view responds with a 404 when there's no such sport, which mustn't leave a generation behind in the cache
+        if sport_slug not in sport_slugs_to_ids([sport_slug]):
+            return None
+        return [dependencies.sport_dependency(sport_slug)]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -124,11 +249,13 @@ class SportIndexView(generic.ListView):
         return context
 
 
-class TermDetailView(generic.DetailView, MultipleObjectMixin):
+class TermDetailView(ConditionalGetMixin, CursorPaginationMixin, CachedCountMixin, generic.DetailView,
+                     MultipleObjectMixin):
     context_object_name = 'term'
     slug_url_kwarg = 'term_slug'
     template_name = 'dictionary/term_detail.html'
     paginate_by = 15
+    cursor_ordering = Definition.RANKING
 
     def get_object(self):
         sport_slug = self.kwargs['sport_slug']
@@ -138,30 +265,94 @@ class TermDetailView(generic.DetailView, MultipleObjectMixin):
 
         return term
 
+    def get_count_cache_key_parts(self):
+        return 'definitions', self.object.id
+
+    def get_cache_dependencies(self):
+        return [dependencies.term_dependency(self.object.id)]
+
+    def get_validator_dependencies(self):
+        term_id = Term.objects.filter(sport__slug=self.kwargs['sport_slug'], slug=self.kwargs[self.slug_url_kwarg])\
+            .values_list('id', flat=True).first()
+        # the view responds with a 404 when there's no such term
+        return [dependencies.term_dependency(term_id)] if term_id is not None else None
+
     def get_context_data(self, **kwargs):
-        definitions = Definition.approved_definitions.filter(term=self.object).order_by('-net_votes')
+        definitions = Definition.approved_definitions.filter(term=self.object)\
+            .select_related('term', 'user').order_by(*self.cursor_ordering)
         context = super(TermDetailView, self).get_context_data(object_list=definitions, **kwargs)
+        rendering.prefetch_for_display(context['object_list'])
+        votes.prefetch_user_votes(context['object_list'], self.request.user)
+
+        if settings.STORED_DEFINITION_COUNTS:
+            context['top_definition_id'] = self.object.top_definition_id
+        elif not context['page_obj'].has_previous():
+            top_definition = next(iter(context['object_list']), None)
+            context['top_definition_id'] = top_definition and top_definition.id
         return context
 
 
+def autocomplete_terms(request):
+    prefix = request.GET.get('term', '')
+    sport_slug = request.GET.get('sport') or None
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 25)
+    except ValueError:
+        limit = 10
+
+    response = {
+        'results': autocomplete.complete(prefix, sport_slug=sport_slug, limit=limit),
+    }
+
+    return HttpResponse(json.dumps(response), content_type='application/json')
+
+
+@staff_member_required
+def cache_stats(request):
+    # the counters are kept by each process so these are only the stats of the process which served the request
+    default_cache = caches['default']
+    if not hasattr(default_cache, 'stats'):
+        raise Http404('The cache backend keeps no stats')
+    response = {
+        'backend': f'{type(default_cache).__module__}.{type(default_cache).__name__}',
+        'stats': default_cache.stats(),
+    }
+    return HttpResponse(json.dumps(response), content_type='application/json')
+
+
+@staff_member_required
+def page_cache_stats(request):
+    # like the cache stats these are the counters of the process which served the request
+    return HttpResponse(json.dumps(middleware.page_cache_stats()), content_type='application/json')
+
+
 def random_term(request):
     term = Term.approved_terms.random()
+    if term is None:
+        raise Http404('No terms found')
     return redirect(term)
 
 
+def vote(definition_id, user_id, vote_type):
+    """
+    Toggles a user's vote on a definition and returns its net votes, through the write-behind vote buffer when it is
+    enabled
+    """
+    if settings.VOTE_BUFFER_ENABLED:
+        return votebuffer.buffer_vote(definition_id, user_id, vote_type)
+    return votes.toggle_vote(definition_id, user_id, vote_type).net_votes
+
+
 @login_required
 @require_POST
 def upvote(request, definition_pk):
-    user = request.user
-    definition = Definition.objects.get(pk=definition_pk)
-
-    if definition.votes.filter(user=user).filter(vote_type=Vote.UPVOTE).exists():
-        definition.delete_upvote(user)
-    else:
-        definition.upvote(user)
+    try:
+        net_votes = vote(definition_pk, request.user.pk, Vote.UPVOTE)
+    except Definition.DoesNotExist:
+        raise Http404('No definition found')
 
     response = {
-        'net_votes': definition.net_votes,
+        'net_votes': net_votes,
     }
 
     return HttpResponse(json.dumps(response), content_type='application/json')
@@ -170,16 +361,13 @@ def upvote(request, definition_pk):
 @login_required
 @require_POST
 def downvote(request, definition_pk):
-    user = request.user
-    definition = Definition.objects.get(pk=definition_pk)
-
-    if definition.votes.filter(user=user).filter(vote_type=Vote.DOWNVOTE).exists():
-        definition.delete_downvote(user)
-    else:
-        definition.downvote(user)
+    try:
+        net_votes = vote(definition_pk, request.user.pk, Vote.DOWNVOTE)
+    except Definition.DoesNotExist:
+        raise Http404('No definition found')
 
     response = {
-        'net_votes': definition.net_votes,
+        'net_votes': net_votes,
     }
 
     return HttpResponse(json.dumps(response), content_type='application/json')
@@ -191,7 +379,8 @@ def delete_definition(request, definition_pk):
     definition = Definition.objects.get(pk=definition_pk)
 
     definition.deleteFl = True
-    definition.save()
+    # only save the flag so the vote counters can't be overwritten with the values read above
+    definition.save(update_fields=['deleteFl', 'last_updated'])
 
     response = {
         'definition_deleted': definition.deleteFl,
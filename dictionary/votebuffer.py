@@ -0,0 +1,249 @@
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import locks
+from django.db import transaction
+from django.db.models import F
+
+from dictionary import dependencies
+from dictionary.models import Definition, Term, Vote
+
+LOG_FILE_NAME = 'votes.log'
+FLUSH_LOCK_FILE_NAME = 'flush.lock'
+# votes.log is renamed to a pending file when it is flushed, the toggles in pending files are then resolved against the
+# votes in the database into a resolved file of the final vote of each user which is applied to the database
+PENDING_SUFFIX = '.pending'
+RESOLVED_SUFFIX = '.resolved'
+
+
+class VoteBuffer:
+    """
+    Write-behind buffer for votes. Each vote is appended to an append-only log file (shared by all the processes on a
+    host) and is applied to the database later, in batches, by flush.
+
+    Votes in the log are toggles, like a click on the vote buttons. Flushing folds the toggles of each (user,
+    definition) into that user's final vote so a user clicking repeatedly costs one row change, and writes those final
+    votes to a resolved file before touching the database. Applying a resolved file is idempotent so a flush which
+    crashed part way through is safely replayed by the next flush.
+    """
+
+    def __init__(self, directory, fsync=True, batch_size=400):
+        self.directory = directory
+        self.fsync = fsync
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def log_path(self):
+        return os.path.join(self.directory, LOG_FILE_NAME)
+
+    def append(self, definition_id, user_id, vote_type):
+        line = json.dumps({'d': definition_id, 'u': user_id, 'v': vote_type, 't': time.time()}) + '\n'
+        while True:
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                locks.lock(fd, locks.LOCK_SH)
+                # the log may have been renamed for flushing since it was opened, if so append to the new log
+                try:
+                    if os.fstat(fd).st_ino != os.stat(self.log_path).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                os.write(fd, line.encode())
+                if self.fsync:
+                    os.fsync(fd)
+                return
+            finally:
+                os.close(fd)
+
+    def flush(self):
+        """
+        Applies the buffered votes to the database, first replaying any flush which didn't finish. Returns the number
+        of buffered votes read & the number of votes changed in the database.
+        """
+        lock_fd = os.open(os.path.join(self.directory, FLUSH_LOCK_FILE_NAME), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            locks.lock(lock_fd, locks.LOCK_EX)
+            num_changed = 0
+            for resolved_path in self._files(RESOLVED_SUFFIX):
+                # a crash after resolving may have left behind the pending files which were resolved
+                for pending_path in self._files(PENDING_SUFFIX):
+                    if pending_path[:-len(PENDING_SUFFIX)] <= resolved_path[:-len(RESOLVED_SUFFIX)]:
+                        os.remove(pending_path)
+                num_changed += self._apply_resolved(resolved_path)
+
+            self._rotate_log()
+            pending_paths = self._files(PENDING_SUFFIX)
+            if not pending_paths:
+                return 0, num_changed
+            resolved_path, num_read = self._resolve(pending_paths)
+            num_changed += self._apply_resolved(resolved_path)
+            return num_read, num_changed
+        finally:
+            os.close(lock_fd)
+
+    def _files(self, suffix):
+        # the file names start with a zero padded timestamp so sort in the order they were written
+        return sorted(glob.glob(os.path.join(self.directory, f'*{suffix}')))
+
+    def _rotate_log(self):
+        pending_path = os.path.join(self.directory, f'{time.time_ns():020d}{PENDING_SUFFIX}')
+        try:
+            os.rename(self.log_path, pending_path)
+        except FileNotFoundError:
+            return
+        # wait for any appends which opened the log before it was renamed
+        fd = os.open(pending_path, os.O_RDONLY)
+        try:
+            locks.lock(fd, locks.LOCK_EX)
+        finally:
+            os.close(fd)
+
+    def _resolve(self, pending_paths):
+        """
+        Folds the toggles in the pending files into the final vote of each (definition, user), starting from their
+        votes in the database, and writes them to a resolved file which replaces the pending files
+        """
+        toggles = []
+        for path in pending_paths:
+            with open(path) as f:
+                for line in f:
+                    # a line cut short by a crash while it was being written is skipped
+                    if line.endswith('\n'):
+                        entry = json.loads(line)
+                        toggles.append((entry['d'], entry['u'], entry['v']))
+
+        current_votes = current_vote_types({(definition_id, user_id) for definition_id, user_id, _ in toggles})
+        final_votes = dict(current_votes)
+        for definition_id, user_id, vote_type in toggles:
+            key = (definition_id, user_id)
+            final_votes[key] = 0 if final_votes.get(key, 0) == vote_type else vote_type
+
+        resolved_path = pending_paths[-1][:-len(PENDING_SUFFIX)] + RESOLVED_SUFFIX
+        with open(resolved_path + '.tmp', 'w') as f:
+            for (definition_id, user_id), vote_type in final_votes.items():
+                if vote_type != current_votes.get((definition_id, user_id), 0):
+                    f.write(json.dumps([definition_id, user_id, vote_type]) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(resolved_path + '.tmp', resolved_path)
+
+        for path in pending_paths:
+            os.remove(path)
+        return resolved_path, len(toggles)
+
+    def _apply_resolved(self, path):
+        with open(path) as f:
+            final_votes = [tuple(json.loads(line)) for line in f]
+
+        num_changed = 0
+        for start in range(0, len(final_votes), self.batch_size):
+            num_changed += apply_final_votes(final_votes[start:start + self.batch_size])
+        os.remove(path)
+        return num_changed
+
+
+def current_vote_types(keys, chunk_size=400):
+    """
+    Returns a dict of (definition id, user id) -> vote type for the keys which have a vote
+    """
+    keys = sorted(keys)
+    current = {}
+    for start in range(0, len(keys), chunk_size):
+        chunk = set(keys[start:start + chunk_size])
+        votes = Vote.objects.filter(definition_id__in={definition_id for definition_id, _ in chunk},
+                                    user_id__in={user_id for _, user_id in chunk})\
+            .values_list('definition_id', 'user_id', 'vote_type')
+        current.update(((definition_id, user_id), vote_type) for definition_id, user_id, vote_type in votes
+                       if (definition_id, user_id) in chunk)
+    return current
+
+
+def apply_final_votes(final_votes):
+    """
+    Sets the vote of each (definition id, user id, vote type) in one transaction, a vote type of 0 removes the vote.
+    Votes which are already set are left alone so applying the same votes again changes nothing. Returns the number of
+    votes changed.
+    """
+    with transaction.atomic():
+        definition_ids = set(Definition.objects.filter(id__in={d for d, _, _ in final_votes})
+                             .values_list('id', flat=True))
+        user_ids = set(User.objects.filter(id__in={u for _, u, _ in final_votes}).values_list('id', flat=True))
+        # votes on definitions or by users deleted since they were buffered are dropped
+        final_votes = [vote for vote in final_votes if vote[0] in definition_ids and vote[1] in user_ids]
+
+        existing = {}
+        votes = Vote.objects.filter(definition_id__in=definition_ids, user_id__in=user_ids)\
+            .values_list('id', 'definition_id', 'user_id', 'vote_type')
+        for vote_id, definition_id, user_id, vote_type in votes:
+            existing[(definition_id, user_id)] = (vote_id, vote_type)
+
+        to_create = []
+        to_delete = []
+        to_flip = defaultdict(list)
+        deltas = defaultdict(lambda: [0, 0])
+        for definition_id, user_id, vote_type in final_votes:
+            vote_id, current_type = existing.get((definition_id, user_id), (None, 0))
+            if vote_type == current_type:
+                continue
+            if current_type == 0:
+                to_create.append(Vote(definition_id=definition_id, user_id=user_id, vote_type=vote_type))
+            elif vote_type == 0:
+                to_delete.append(vote_id)
+            else:
+                to_flip[vote_type].append(vote_id)
+            for changed_type, change in ((current_type, -1), (vote_type, 1)):
+                if changed_type == Vote.UPVOTE:
+                    deltas[definition_id][0] += change
+                elif changed_type == Vote.DOWNVOTE:
+                    deltas[definition_id][1] += change
+
+        Vote.objects.bulk_create(to_create)
+        Vote.objects.filter(id__in=to_delete).delete()
+        for vote_type, vote_ids in to_flip.items():
+            Vote.objects.filter(id__in=vote_ids).update(vote_type=vote_type)
+
+        # one UPDATE for each distinct change to the counters rather than one per definition
+        definitions_by_delta = defaultdict(list)
+        for definition_id, (upvotes, downvotes) in deltas.items():
+            if upvotes or downvotes:
+                definitions_by_delta[(upvotes, downvotes)].append(definition_id)
+        for (upvotes, downvotes), ids in definitions_by_delta.items():
+            Definition.objects.filter(id__in=ids).update(
+                num_upvotes=F('num_upvotes') + upvotes,
+                num_downvotes=F('num_downvotes') + downvotes,
+                net_votes=F('net_votes') + upvotes - downvotes,
+            )
+        if deltas:
+            Term.objects.filter(definitions__in=list(deltas)).update(**Term.definition_stats())
+            # votes are created in bulk, flipped & counted without sending signals
+            term_ids = Definition.objects.filter(id__in=list(deltas)).values_list('term_id', flat=True).distinct()
+            dependencies.bump(*map(dependencies.term_dependency, term_ids))
+
+    return len(to_create) + len(to_delete) + sum(len(vote_ids) for vote_ids in to_flip.values())
+
+
+def get_vote_buffer():
+    return VoteBuffer(settings.VOTE_BUFFER_DIR, fsync=settings.VOTE_BUFFER_FSYNC,
+                      batch_size=settings.VOTE_BUFFER_BATCH_SIZE)
+
+
+def buffer_vote(definition_id, user_id, vote_type, vote_buffer=None):
+    """
+    Buffers a toggle of a user's vote on a definition and returns the definition's net votes as they will be once the
+    vote is flushed, assuming the user has no other votes on it waiting to be flushed. Raises Definition.DoesNotExist
+    if the definition doesn't exist.
+    """
+    net_votes = Definition.objects.filter(pk=definition_id).values_list('net_votes', flat=True).get()
+    current_type = Vote.objects.filter(definition_id=definition_id, user_id=user_id)\
+        .values_list('vote_type', flat=True).first() or 0
+
+    (vote_buffer or get_vote_buffer()).append(definition_id, user_id, vote_type)
+
+    new_type = 0 if current_type == vote_type else vote_type
+    return net_votes - current_type + new_type
@@ -0,0 +1,116 @@
+from collections import namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from dictionary import dependencies
+from dictionary.models import Definition, Term, Vote
+
+VOTE_COUNTERS = {
+    Vote.UPVOTE: 'num_upvotes',
+    Vote.DOWNVOTE: 'num_downvotes',
+}
+
+VoteCounts = namedtuple('VoteCounts', ['num_upvotes', 'num_downvotes', 'net_votes'])
+
+
+class AlreadyVoted(Exception):
+    pass
+
+
+def cast_vote(definition_id, user_id, vote_type):
+    """
+    Records a vote by a user on a definition, replacing their vote of the other type if they have one, and returns the
+    definition's fresh VoteCounts. Raises AlreadyVoted if the user has already voted this way.
+    """
+    with transaction.atomic():
+        deltas = _cast_vote(definition_id, user_id, vote_type)
+        if deltas is None:
+            raise AlreadyVoted
+        return _apply_deltas(definition_id, deltas)
+
+
+def retract_vote(definition_id, user_id, vote_type):
+    """
+    Removes a vote by a user on a definition, if they have one, and returns the definition's fresh VoteCounts
+    """
+    with transaction.atomic():
+        deltas = _retract_vote(definition_id, user_id, vote_type)
+        return _apply_deltas(definition_id, deltas)
+
+
+def toggle_vote(definition_id, user_id, vote_type):
+    """
+    Removes a user's vote on a definition if they have already voted this way, otherwise casts it. Returns the
+    definition's fresh VoteCounts.
+    """
+    with transaction.atomic():
+        deltas = _retract_vote(definition_id, user_id, vote_type)
+        if not deltas:
+            deltas = _cast_vote(definition_id, user_id, vote_type) or {}
+        return _apply_deltas(definition_id, deltas)
+
+
+def prefetch_user_votes(definitions, user):
+    """
+    Loads the user's votes on all of the definitions in one query and stores them on each definition as user_votes, a
+    dict of definition id -> vote type for the definitions they've voted on, for the vote_status filter
+    """
+    definitions = list(definitions)
+    user_votes = {}
+    if user.is_authenticated and definitions:
+        user_votes = dict(Vote.objects.filter(user=user, definition__in=[definition.pk for definition in definitions])
+                          .values_list('definition_id', 'vote_type'))
+    for definition in definitions:
+        definition.user_votes = user_votes
+
+
+def _cast_vote(definition_id, user_id, vote_type):
+    """
+    Upserts the user's vote row and returns the changes to make to the counters, or None if the vote already exists.
+    The counter changes are derived from the number of rows the statements changed, never from values read earlier,
+    so concurrent votes can't be double counted.
+    """
+    opposite_type = -vote_type
+    votes = Vote.objects.filter(definition_id=definition_id, user_id=user_id)
+
+    if votes.filter(vote_type=opposite_type).update(vote_type=vote_type, created=timezone.now()):
+        return {vote_type: 1, opposite_type: -1}
+
+    try:
+        # the savepoint lets the transaction carry on if the unique constraint on (user, definition) is violated
+        with transaction.atomic():
+            Vote.objects.create(definition_id=definition_id, user_id=user_id, vote_type=vote_type)
+    except IntegrityError:
+        return None
+    return {vote_type: 1}
+
+
+def _retract_vote(definition_id, user_id, vote_type):
+    num_deleted, _ = Vote.objects.filter(definition_id=definition_id, user_id=user_id, vote_type=vote_type).delete()
+    return {vote_type: -num_deleted} if num_deleted else {}
+
+
+def _apply_deltas(definition_id, deltas):
+    """
+    Applies the changes to the vote counters in a single UPDATE and returns the fresh counts
+    """
+    definitions = Definition.objects.filter(pk=definition_id)
+    if deltas:
+        upvotes = deltas.get(Vote.UPVOTE, 0)
+        downvotes = deltas.get(Vote.DOWNVOTE, 0)
+        definitions.update(
+            num_upvotes=F('num_upvotes') + upvotes,
+            num_downvotes=F('num_downvotes') + downvotes,
+            net_votes=F('net_votes') + upvotes - downvotes,
+        )
+        # the definition may have become (or stopped being) the top definition of its term
+        Term.objects.filter(definitions__pk=definition_id).update(**Term.definition_stats())
+
+    # raising here rolls back the vote if the definition doesn't exist
+    *counts, term_id = definitions.values_list('num_upvotes', 'num_downvotes', 'net_votes', 'term_id').get()
+    if deltas:
+        # flipped votes & the counters are updated without sending signals
+        dependencies.bump(dependencies.term_dependency(term_id))
+    return VoteCounts(*counts)
@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'dictionary.middleware.PageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -105,4 +106,123 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'index'
 LOGOUT_REDIRECT_URL = 'index'
 
-SITE_URL = 'sportsdictionary'
\ No newline at end of file
+SITE_URL = 'sportsdictionary'
+
+
+# Caches
+# Each settings module picks one of these with the CACHE_TYPE environment variable. 'tiered' keeps recently used
+# entries in the memory of each process in front of a file based cache in CACHE_DIR shared by the processes on the host
+# (see dictionary/cache.py), 'database' stores everything in the cache_table (run createcachetable first). Template
+# fragments are cached under keys which change along with what they show, so each process keeps its own in memory.
+
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+FRAGMENT_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'template-fragments',
+    'OPTIONS': {
+        'MAX_ENTRIES': 5000,
+    },
+}
+CACHE_CONFIGS = {
+    'tiered': {
+        'default': {
+            'BACKEND': 'dictionary.cache.TieredCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'MAX_SIZE': 32 * 1024 * 1024,
+                'LOCAL_TIMEOUT': 60,
+                'INVALIDATION_CHECK_INTERVAL': 1,
+            },
+        },
+        'shared': {
+            'BACKEND': 'dictionary.cache.LockingFileBasedCache',
+            'LOCATION': CACHE_DIR,
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        },
+        'template_fragments': FRAGMENT_CACHE,
+    },
+    'database': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_table',
+        },
+        'template_fragments': FRAGMENT_CACHE,
+    },
+}
+
+CACHES = CACHE_CONFIGS[os.environ.get('CACHE_TYPE', 'tiered')]
+
+
+# Search
+# Full-text search uses an SQLite FTS5 index kept in sync by signals (see dictionary/search.py), when it is
+# disabled or unavailable searches fall back to a case insensitive substring match on the term text
+
+SEARCH_FULL_TEXT_ENABLED = True
+SEARCH_INDEX_DEFINITIONS = True
+
+# List counts
+# The number of terms in each list is cached under a key which changes when the terms in it are changed, the entries
+# are kept for this many seconds so the counts of lists which changed through update() without a bump are corrected too
+
+LIST_COUNT_CACHE_TIMEOUT = 60 * 60
+
+# Search result counts stop at this many, after which the count is shown as e.g. "1000+", and are cached for this
+# many seconds as edits to definitions can change which terms match without invalidating them
+
+SEARCH_RESULTS_COUNT_LIMIT = 1000
+SEARCH_RESULTS_COUNT_CACHE_TIMEOUT = 60 * 5
+
+# Definition counts
+# Read the number of definitions of each term in the term listings from the stored Term.num_definitions counter rather
+# than counting the definitions with a GROUP BY on every page (run reconciledefinitioncounts after bulk imports)
+
+STORED_DEFINITION_COUNTS = True
+
+# Definition rendering
+# Definitions are rendered to HTML when they are saved, definitions linking to a term which is created, renamed or
+# deleted are looked up & rendered again by a background thread once the change commits rather than during the request,
+# they show their old links until then
+
+DEFINITION_RENDER_IN_BACKGROUND = True
+
+# Vote buffer
+# When enabled votes are appended to a log in VOTE_BUFFER_DIR and answered straight away with the net votes they will
+# lead to, `manage.py flushvotes` applies the buffered votes to the database in batches (see dictionary/votebuffer.py)
+
+VOTE_BUFFER_ENABLED = False
+VOTE_BUFFER_DIR = os.path.join(BASE_DIR, 'vote_buffer')
+VOTE_BUFFER_FSYNC = True
+VOTE_BUFFER_BATCH_SIZE = 400
+VOTE_BUFFER_FLUSH_INTERVAL = 1
+
+# In-memory term indexes (autocomplete & "did you mean" suggestions)
+# How often, in seconds, each process checks the shared cache for changes made to the terms by other processes
+
+IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL = 5
+# Changes to the terms & sports are applied to the in-memory indexes once the transaction making them commits, so the
+# other processes don't rebuild theirs before they can see the change and a rolled back change is never applied
+
+IN_MEMORY_INDEX_CHANGES_ON_COMMIT = True
+
+# Pagination
+# Cursor (keyset) pagination fetches each page by seeking past the last row of the previous one rather than with an
+# OFFSET and doesn't count the rows, so the term listings only get next/previous links instead of page numbers
+
+CURSOR_PAGINATION = False
+
+# Page cache
+# The index, sport & term pages are served to anonymous users from the cache without running the view until anything
+# they show changes, or for at most this many seconds (see dictionary/middleware.py)
+
+PAGE_CACHE = True
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Benchmark datasets
+# builddataset writes the snapshot of each size tier of the benchmark dataset here, for benchmarks to copy rather than
+# build the data every time they run
+
+BENCHMARK_DATASET_DIR = os.path.join(BASE_DIR, 'benchmark_datasets')
+# the benchmark commands write their results here as JSON, for later runs to be compared against
+BENCHMARK_RESULTS_DIR = os.path.join(BASE_DIR, 'benchmark_results')
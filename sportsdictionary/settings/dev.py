@@ -17,12 +17,7 @@ DATABASES = {
     }
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-        'LOCATION': 'cache_table',
-    }
-}
+CACHES = CACHE_CONFIGS[os.environ.get('CACHE_TYPE', 'tiered')]
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -12,15 +12,23 @@ DATABASES = {
     }
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-        'LOCATION': 'cache_table',
-    }
-}
+# the database cache is rolled back with each test along with the rest of the database
+CACHES = CACHE_CONFIGS[os.environ.get('CACHE_TYPE', 'database')]
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# each test runs in a transaction which is rolled back so always check whether the in-memory indexes are stale
+IN_MEMORY_INDEX_VERSION_CHECK_INTERVAL = 0
+
+# tests never commit so definitions are re-rendered straight away rather than once the transaction commits
+DEFINITION_RENDER_IN_BACKGROUND = False
+
+# likewise the in-memory indexes are changed straight away rather than once the transaction commits
+IN_MEMORY_INDEX_CHANGES_ON_COMMIT = False
+
+# the tests inspect the context the views render pages with, which pages served from the page cache don't have
+PAGE_CACHE = False
+
 try:
     from sportsdictionary.settings.local import *
 except: